@@ -0,0 +1,409 @@
+"""
+Benchmarks for the work the firmware does every cycle.
+
+    python sim/bench.py                    # run, record, compare with the last run
+    python sim/bench.py --only stats       # cases whose name contains "stats"
+    python sim/bench.py --threshold 0.15   # fail on >15% regressions
+
+Each case reports one number (lower is better), the best of --runs
+runs, and the spread of those runs. Results for the current git commit
+go to --out, and every run is appended to --history. The run is
+compared with the previous commit in the history, or with --baseline,
+and exits 1 if any case got slower than its threshold: --threshold, or
+NOISE_FACTOR times the larger spread of the two runs if that is wider.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import hostenv
+
+# name -> (function, unit, threshold or None for the default)
+CASES = {}
+
+
+def case(name, unit="us", threshold=None):
+    def register(fn):
+        CASES[name] = (fn, unit, threshold)
+        return fn
+    return register
+
+
+def best_of(fn, number, repeat=5):
+    """Best per-call time over `repeat` batches of `number` calls, in µs."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = (time.perf_counter() - start) / number
+        if best is None or elapsed < best:
+            best = elapsed
+    return best * 1_000_000
+
+
+# Data
+
+def write_data_log(rows):
+    """
+    A data_log.csv with `rows` readings. It has a header row, which
+    read_csv_column() needs to find its column; without one it returns []
+    after reading a single line and the scan cost never shows.
+    """
+    with open("data_log.csv", "w") as f:
+        f.write("timestamp,temp_celc,rh,temp_celc_outside,lux,roof_open,fan_on,heat_pad_on,cover_on,is_night\n")
+        for n in range(rows):
+            f.write(
+                f"2025-07-07T{n // 720 % 24:02d}:{n // 12 % 60:02d}:{n % 12 * 5:02d},"
+                f"{18 + n % 97 / 10:.2f},{55 + n % 31:.2f},{9 + n % 53 / 10:.2f},"
+                f"{n % 900 * 40:.2f},{n % 4 * 33},{n % 2 == 0},False,False,False\n"
+            )
+
+
+def forecast_url():
+    import world
+    from weather import api_url_gen
+    endpoints = world.endpoints
+    return api_url_gen(endpoints.latitude, endpoints.longitude, endpoints.timezone)
+
+
+def forecast_payload():
+    """The Forecast get_weather_data() returns, fetched from the stand-in."""
+    import ahttp
+    import uasyncio
+
+    from weather import get_weather_data
+
+    async def fetch():
+        # Connections kept by an earlier case belong to its event loop
+        await ahttp.close_all()
+        return await get_weather_data(forecast_url())
+    return uasyncio.run(fetch())
+
+
+# Cases
+
+def stats_case(rows):
+    def run():
+        import stats
+        write_data_log(rows)
+        return best_of(lambda: stats.read_csv_column("temp_celc"), 1, 3)
+    return run
+
+
+def stats_summary_case(rows):
+    def run():
+        import stats
+        write_data_log(rows)
+
+        def summary():
+            for column in ("temp_celc", "temp_celc_outside", "rh"):
+                stats.average(column)
+                stats.low(column)
+                stats.high(column)
+        return best_of(summary, 1, 3)
+    return run
+
+
+for _rows in (1_000, 17_280, 100_000):
+    case(f"stats.read_csv_column[{_rows}]")(stats_case(_rows))
+    case(f"stats_check[{_rows}]")(stats_summary_case(_rows))
+
+
+@case("logging.log")
+def bench_log():
+    from logging import log
+    return best_of(lambda: log(21.5, 60.2, 12.25, 1500.0, 33, True, False, False, False), 500)
+
+
+@case("logging.system_log")
+def bench_system_log():
+    from logging import system_log
+    return best_of(lambda: system_log("Weather data acquired. Sunrise at 06:12 on 2025-07-07"), 500)
+
+
+@case("actuator_logic")
+def bench_actuator_logic():
+    from actuators import actuator_logic
+    temps = [10 + n * 0.25 for n in range(120)]
+
+    def sweep():
+        roof = 0
+        prev_rh = None
+        for temp in temps:
+            result = actuator_logic(15, 25, 40, 70, temp, prev_rh, roof, None, roof, False, False, temp, 75.0, False)
+            prev_rh = result[1]
+            roof = result[4]
+    return best_of(sweep, 20) / len(temps)
+
+
+@case("forecast.sunrise_temp")
+def bench_sunrise_temp():
+    forecast = forecast_payload()
+    return best_of(forecast.sunrise_temp, 2000)
+
+
+@case("forecast.overnight_low")
+def bench_overnight_low():
+    forecast = forecast_payload()
+
+    def queries():
+        forecast.overnight_low()
+        forecast.hours_below(15)
+    return best_of(queries, 2000)
+
+
+def peak_alloc(fn):
+    """Peak Python allocation, in bytes, while `fn` runs."""
+    import tracemalloc
+    fn()  # warm up imports and caches
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def forecast_body():
+    import urequests
+    return urequests.get(forecast_url()).content
+
+
+@case("weather forecast parse peak", unit="B")
+def bench_forecast_parse_peak():
+    """The forecast body fed to the streaming parser as ahttp delivers it."""
+    import ahttp
+    from forecast import Forecast
+    body = forecast_body()
+
+    def parse():
+        forecast = Forecast()
+        parser = forecast.parser()
+        for i in range(0, len(body), ahttp.PIECE):
+            parser.feed(body[i:i + ahttp.PIECE])
+        forecast.done(parser)
+    return peak_alloc(parse)
+
+
+@case("ujson.loads forecast peak", unit="B")
+def bench_forecast_loads_peak():
+    """The same body parsed whole, as response.json() did, for comparison."""
+    import ujson
+    body = forecast_body()
+    return peak_alloc(lambda: ujson.loads(body))
+
+
+@case("weather.forecast_summary")
+def bench_forecast_summary():
+    from weather import forecast_summary
+    forecast = forecast_payload()
+    return best_of(lambda: forecast_summary(forecast), 2000)
+
+
+@case("alerts.check, 100 rules")
+def bench_alert_rules():
+    from alerts import AlertEngine
+    from state import state
+    # Four rules on the inside temperature, the rest spread over other channels
+    channels = ("rh_current", "temp_celc_outside_current", "lux_current", "roof_open")
+    extra = [
+        {"name": f"extra{i}", "channel": channels[i % 4], "op": ">", "threshold": 1000 + i}
+        for i in range(96)
+    ]
+    engine = AlertEngine()
+    engine.load(extra)
+    state.temp_celc_current = 21.5
+    return best_of(lambda: engine.check("temp_celc_current", 0), 2000)
+
+
+@case("sun table build")
+def bench_sun_table():
+    from sun import SunTable
+    return best_of(lambda: SunTable(51.5, -0.12, 2026), 5)
+
+
+@case("sun.is_night")
+def bench_is_night():
+    import sun
+    t = 1781000000
+    sun.table(51.5, -0.12, 2026)
+    return best_of(lambda: sun.is_night(51.5, -0.12, t), 2000)
+
+
+def render_case(name, changed):
+    def run():
+        from picographics import PicoGraphics
+        import bench_render
+        display = PicoGraphics()
+        pens = (display.create_pen(15, 25, 35), display.create_pen(255, 255, 255), display.create_pen(255, 165, 0))
+        for row in bench_render.bench_pages(display, pens, 20):
+            if row[0] == name:
+                return row[3 if changed else 1]["ms"] * 1000
+    return run
+
+
+for _page in ("temperature_inside", "actuations", "trend_temperature_inside"):
+    case(f"render[{_page}] page change")(render_case(_page, False))
+    case(f"render[{_page}] values changed")(render_case(_page, True))
+
+
+@case("render start_screen frame")
+def bench_splash():
+    from picographics import PicoGraphics
+    import bench_render
+    display = PicoGraphics()
+    pens = tuple(display.create_pen(n * 30, 100, 100) for n in range(7))
+    return bench_render.bench_splash(display, pens, 60)["ms"] * 1000
+
+
+@case("sensor() cycle", threshold=0.4)
+def bench_sensor_cycle():
+    import contextlib
+    import io
+    import clock
+    import virtual_loop
+    import world
+    from sensors import sensor
+
+    sim_clock = clock.VirtualClock()
+    real_clock = world.clock
+    world.clock = sim_clock
+    world.greenhouse.clock = sim_clock
+    clock.install(sim_clock)
+    loop = virtual_loop.VirtualLoop(sim_clock)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return best_of(lambda: loop.run_until_complete(sensor()), 50)
+    finally:
+        loop.close()
+        world.clock = real_clock
+        world.greenhouse.clock = real_clock
+        clock.install(real_clock)
+
+
+# Runner
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(hostenv.SIM_DIR), capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_history(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+# A case's threshold is at least this many times its run-to-run spread
+NOISE_FACTOR = 3
+
+
+def measure(fn, runs):
+    """
+    The best of `runs` runs of a case, and their spread: the worst over
+    the best, less one.
+    """
+    values = [fn() for _ in range(runs)]
+    best = min(values)
+    return best, (max(values) / best - 1) if best else 0.0
+
+
+def compare(results, baseline, default_threshold):
+    """Print deltas against `baseline`; return the names that regressed."""
+    regressed = []
+    print()
+    print(f"{'case':<44}{'now':>12}{'base':>12}{'change':>9}")
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<44}{result['value']:>12.2f}{'-':>12}")
+            continue
+        change = result["value"] / before["value"] - 1 if before["value"] else 0.0
+        threshold = result["threshold"] if result["threshold"] is not None else default_threshold
+        # Never tighter than a few times the spread either run measured
+        threshold = max(threshold, NOISE_FACTOR * max(result.get("spread", 0), before.get("spread", 0)))
+        flag = " REGRESSED" if change > threshold else ""
+        print(f"{name:<44}{result['value']:>12.2f}{before['value']:>12.2f}{change:>+9.1%}{flag}")
+        if flag:
+            regressed.append(name)
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", help="run cases whose name contains this")
+    parser.add_argument("--out", default="bench_results.json", help="results for this run")
+    parser.add_argument("--history", default="bench_history.json", help="all runs, one entry per run")
+    parser.add_argument("--baseline", help="commit to compare with (default: previous commit in history)")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="allowed slowdown, 0.5 = 50%%; widened for cases with a larger spread")
+    parser.add_argument("--runs", type=int, default=5, help="runs of each case; the best is kept")
+    args = parser.parse_args(argv)
+
+    out = os.path.abspath(args.out)
+    history_path = os.path.abspath(args.history)
+
+    hostenv.setup()
+    import clock
+    import contextlib
+    import io
+    import world
+
+    workdir = tempfile.mkdtemp(prefix="icu_grow_bench_")
+    os.chdir(workdir)
+    world.install()
+
+    commit = git_commit()
+    results = {}
+    try:
+        for name, (fn, unit, threshold) in CASES.items():
+            if args.only and args.only not in name:
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                value, spread = measure(fn, args.runs)
+            results[name] = {"value": value, "unit": unit, "threshold": threshold, "spread": spread}
+            print(f"{name:<44}{value:>12.2f} {unit:<3}{spread:>+8.1%}")
+    finally:
+        world.shutdown()
+
+    run = {"commit": commit, "time": int(clock.real_time()), "python": sys.version.split()[0], "results": results}
+    with open(out, "w") as f:
+        json.dump(run, f, indent=1)
+
+    history = load_history(history_path)
+    if args.baseline:
+        candidates = [r for r in history if r["commit"] == args.baseline]
+    else:
+        # Prefer the last other commit, else the last run of this one
+        candidates = [r for r in history if r["commit"] != commit] or history[:]
+    history.append(run)
+    with open(history_path, "w") as f:
+        json.dump(history, f, indent=1)
+
+    if not candidates:
+        print("\nno baseline to compare with")
+        return 0
+    baseline = candidates[-1]
+    print(f"\nbaseline {baseline['commit']}")
+    regressed = compare(results, baseline, args.threshold)
+    if regressed:
+        print(f"\n{len(regressed)} regression(s) over threshold")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
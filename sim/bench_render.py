@@ -0,0 +1,152 @@
+"""
+Render cost of every status page and the splash animation on the
+headless display.
+
+    python sim/bench_render.py [--partial] [--frames N]
+
+For each page: a first draw (page change), a steady refresh with nothing
+changed and a refresh after every value changed. Reports wall time,
+draw calls, pixels touched and bytes pushed to the panel.
+"""
+import argparse
+import os
+import sys
+import time
+
+import hostenv
+
+
+def measure(display, fn, repeat=1):
+    display.reset_counters()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) * 1000 / repeat
+    counters = display.counters()
+    for key in counters:
+        counters[key] //= repeat
+    counters["ms"] = elapsed
+    return counters
+
+
+def bench_pages(display, pens, repeat):
+    from state import state
+    import trends
+    from layout import PAGES, render_page
+
+    # Plausible values and a full day of trend data
+    t0 = 1_700_000_000
+    for n in range(0, 24 * 3600, 60):
+        state.temp_celc_current = 18 + (n % 7200) / 720
+        state.temp_celc_outside_current = 9 + (n % 5400) / 900
+        state.rh_current = 55 + (n % 3600) / 180
+        trends.record(state, t0 + n)
+    for prefix in ("temp_celc", "temp_celc_outside", "rh"):
+        setattr(state, prefix + "_average", 20.0)
+        setattr(state, prefix + "_low", 12.0)
+        setattr(state, prefix + "_high", 27.5)
+
+    def nudge():
+        state.temp_celc_current += 0.1
+        state.temp_celc_outside_current += 0.1
+        state.rh_current += 1
+        state.fan_on = not state.fan_on
+        for trend in trends.TRENDS.values():
+            trend.version += 1
+
+    rows = []
+    for name in PAGES:
+        # Show some other page first so this draw is a page change
+        render_page(display, "humidity" if name == "actuations" else "actuations", *pens)
+        cold = measure(display, lambda: render_page(display, name, *pens))
+        steady = measure(display, lambda: render_page(display, name, *pens), repeat)
+
+        def changed():
+            nudge()
+            render_page(display, name, *pens)
+
+        change = measure(display, changed, repeat)
+        rows.append((name, cold, steady, change))
+    return rows
+
+
+def bench_splash(display, pens, frames):
+    import uasyncio as asyncio
+    import screen
+
+    real_sleep = asyncio.sleep
+
+    async def no_wait(seconds):
+        await real_sleep(0)
+
+    async def run():
+        running = asyncio.Event()
+        running.set()
+        task = asyncio.create_task(screen.start_screen(display, running, *pens))
+        while display.updates < frames:
+            await real_sleep(0)
+        running.clear()
+        await real_sleep(0)
+        task.cancel()
+
+    screen.asyncio.sleep = no_wait
+    try:
+        display.reset_counters()
+        start = time.perf_counter()
+        asyncio.run(run())
+        elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        screen.asyncio.sleep = real_sleep
+    counters = display.counters()
+    updates = max(counters["updates"], 1)
+    return {
+        "ms": elapsed / updates,
+        "calls": counters["calls"] // updates,
+        "pixels": counters["pixels"] // updates,
+        "bytes_pushed": counters["bytes_pushed"] // updates,
+        "updates": updates,
+    }
+
+
+def fmt_row(label, c):
+    return (
+        f"{label:<44}{c['ms']:>9.3f}{c['calls']:>8}{c['pixels']:>9}"
+        f"{c['bytes_pushed']:>10}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--partial", action="store_true", help="windowed partial_update(), as with \"partial_update\": true")
+    parser.add_argument("--frames", type=int, default=60, help="splash frames to draw")
+    parser.add_argument("--repeat", type=int, default=50, help="steady-state repeats")
+    args = parser.parse_args(argv)
+
+    if args.partial:
+        os.environ["PICO_SIM_PARTIAL"] = "1"
+    hostenv.setup()
+    from picographics import PicoGraphics, DISPLAY_PICO_EXPLORER
+    from screen import retained
+
+    retained.partial = args.partial
+
+    display = PicoGraphics(display=DISPLAY_PICO_EXPLORER)
+    BG = display.create_pen(15, 25, 35)
+    WHITE = display.create_pen(255, 255, 255)
+    ORANGE = display.create_pen(255, 165, 0)
+    splash_pens = tuple(display.create_pen(*rgb) for rgb in (
+        (15, 25, 35), (30, 160, 60), (50, 210, 100), (60, 180, 80),
+        (240, 120, 160), (255, 230, 120), (0, 255, 0),
+    ))
+
+    print(f"{'render':<44}{'ms':>9}{'calls':>8}{'pixels':>9}{'bytes':>10}")
+    for name, cold, steady, change in bench_pages(display, (BG, WHITE, ORANGE), args.repeat):
+        print(fmt_row(f"{name} (page change)", cold))
+        print(fmt_row(f"{name} (unchanged)", steady))
+        print(fmt_row(f"{name} (values changed)", change))
+    print(fmt_row("start_screen (per frame)", bench_splash(display, splash_pens, args.frames)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
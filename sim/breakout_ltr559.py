@@ -0,0 +1,19 @@
+"""Fake LTR559 light sensor reading lux from the greenhouse model."""
+import world
+
+
+class BreakoutLTR559:
+    CH0 = 0
+    CH1 = 1
+    GAIN = 2
+    INTEGRATION_TIME = 3
+    RATIO = 4
+    LUX = 5
+    PROXIMITY = 6
+
+    def __init__(self, i2c, interrupt=None):
+        pass
+
+    def get_reading(self):
+        lux = world.greenhouse.lux()
+        return [int(lux), int(lux / 2), 1, 50, 0.5, lux, 0]
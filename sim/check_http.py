@@ -0,0 +1,217 @@
+"""
+Checks src/ahttp.py, the forecast fetch and notifications against the local stand-in endpoints.
+
+    python sim/check_http.py
+    python sim/check_http.py --latency 3
+
+Each case runs a request next to a task that ticks every 10 ms and
+records the longest gap between ticks: with the old blocking client
+that gap was the whole request. Exits 1 if any case fails.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import hostenv
+
+# Longest tolerated gap between ticks while a request is in flight, in s
+MAX_GAP = 0.1
+
+
+async def ticking(coro):
+    """Run `coro` while ticking; returns (its result or exception, longest gap)."""
+    import uasyncio as asyncio
+
+    gap = 0.0
+    done = False
+
+    async def tick():
+        nonlocal gap
+        last = time.monotonic()
+        while not done:
+            await asyncio.sleep(0.01)
+            now = time.monotonic()
+            gap = max(gap, now - last)
+            last = now
+
+    ticker = asyncio.create_task(tick())
+    try:
+        result = await coro
+    except Exception as e:
+        result = e
+    done = True
+    await ticker
+    return result, gap
+
+
+async def run_cases(latency):
+    import ahttp
+    import world
+
+    endpoints = world.endpoints
+    failures = []
+
+    def check(name, ok, detail):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {detail}")
+        if not ok:
+            failures.append(name)
+
+    # Slow server: the loop keeps ticking for the whole wait
+    endpoints.latency = latency
+    start = time.monotonic()
+    response, gap = await ticking(ahttp.get("http://ip-api.com/json/", timeout=latency + 5))
+    took = time.monotonic() - start
+    check(
+        "slow response",
+        not isinstance(response, Exception) and response.json()["status"] == "success" and gap < MAX_GAP,
+        f"{took:.2f} s request, longest loop gap {gap * 1000:.0f} ms",
+    )
+
+    # Read timeout: gives up after `timeout`, not after the server
+    start = time.monotonic()
+    response, gap = await ticking(ahttp.get("http://worldtimeapi.org/api/timezone/Europe/London", timeout=latency / 3))
+    took = time.monotonic() - start
+    check(
+        "read timeout",
+        isinstance(response, OSError) and took < latency and gap < MAX_GAP,
+        f"{response!r} after {took:.2f} s, longest loop gap {gap * 1000:.0f} ms",
+    )
+    endpoints.latency = 0.0
+
+    # Chunked body trickled in with pauses between chunks
+    endpoints.chunked.add("api.open-meteo.com")
+    endpoints.chunk_delay = 0.2
+    url = "https://api.open-meteo.com/v1/forecast?latitude=51.5&longitude=-0.12&hourly=temperature_2m&daily=sunrise,sunset&forecast_days=2"
+    response, gap = await ticking(ahttp.get(url, timeout=5))
+    ok = not isinstance(response, Exception) and len(response.json()["hourly"]["temperature_2m"]) == 48
+    check("chunked response", ok and gap < MAX_GAP, f"longest loop gap {gap * 1000:.0f} ms")
+
+    # The same, parsed as it streams in by the forecast fetch
+    from weather import api_url_gen, get_weather_data
+    url = api_url_gen(endpoints.latitude, endpoints.longitude, endpoints.timezone)
+    forecast, gap = await ticking(get_weather_data(url))
+    ok = not isinstance(forecast, Exception) and len(forecast.temps) == 72 and len(forecast.sunrises) == 3
+    check("streamed forecast", ok and gap < MAX_GAP, f"longest loop gap {gap * 1000:.0f} ms")
+    endpoints.chunked.clear()
+    endpoints.chunk_delay = 0.0
+
+    # An unchanged forecast is not sent again
+    before = endpoints.not_modified
+    again = await get_weather_data(url, forecast)
+    check(
+        "conditional forecast",
+        again is forecast and endpoints.not_modified == before + 1,
+        f"ETag {forecast.etag}, {endpoints.not_modified - before} not modified",
+    )
+
+    # The flash cache gives back the same forecast
+    import forecast_cache
+    cached, fetched_at = forecast_cache.decode(forecast_cache.encode(forecast, 1234))
+    ok = (
+        fetched_at == 1234 and cached.start == forecast.start and cached.etag == forecast.etag
+        and list(cached.temps) == list(forecast.temps)
+        and list(cached.sunrises) == list(forecast.sunrises)
+        and list(cached.sunsets) == list(forecast.sunsets)
+    )
+    check("forecast cache", ok, f"{len(forecast_cache.encode(forecast, 1234))} bytes")
+
+    # Keep-alive: more requests to one host share a connection
+    await ahttp.close_all()
+    before = endpoints.connections
+    for _ in range(3):
+        await ahttp.post("https://ntfy.sh/check", data="hello", headers={"Content-Type": "text/plain"})
+    opened = endpoints.connections - before
+    check("keep-alive", opened == 1, f"3 requests on {opened} connection(s)")
+
+    # A kept connection the server has dropped is replaced transparently
+    for _, writer in ahttp._idle.values():
+        writer.transport.abort()
+    response = await ahttp.get("http://ip-api.com/json/", timeout=5)
+    check("stale connection", response.status_code == 200, f"HTTP {response.status_code}")
+
+    # An error from the sink is not a dropped connection: nothing is sent again
+    def broken(piece):
+        raise ValueError("sink failed")
+
+    before = endpoints.requests.get("ip-api.com", 0)
+    response, _ = await ticking(ahttp.get("http://ip-api.com/json/", timeout=5, sink=broken))
+    sent = endpoints.requests.get("ip-api.com", 0) - before
+    check("sink error", isinstance(response, ValueError) and sent == 1, f"{response!r}, sent {sent} time(s)")
+
+    # A cancelled request closes its socket
+    import uasyncio as asyncio
+    writers = []
+    real_open = ahttp._open
+
+    async def recording_open(key, timeout):
+        conn = await real_open(key, timeout)
+        writers.append(conn[1])
+        return conn
+
+    await ahttp.close_all()
+    ahttp._open = recording_open
+    endpoints.latency = 1.0
+    task = asyncio.create_task(ahttp.get("http://ip-api.com/json/", timeout=5))
+    await asyncio.sleep(0.3)
+    task.cancel()
+    await asyncio.sleep(0.05)
+    ahttp._open = real_open
+    endpoints.latency = 0.0
+    check(
+        "cancelled request",
+        len(writers) == 1 and writers[0].is_closing() and not ahttp._idle,
+        f"{len(writers)} connection(s), closed: {all(w.is_closing() for w in writers)}",
+    )
+
+    # Notifications queue without blocking, coalesce, wait in the outbox
+    # while ntfy.sh is down and go out once it is back
+    import notify
+    notify.BACKOFF = 0.2
+    notifier = notify.Notifier()
+    sender = asyncio.create_task(notifier.run())
+    endpoints.fail.add("ntfy.sh")
+    before = len(endpoints.messages)
+    for temp in (41, 42, 43):
+        notifier.send(f"Too hot: {temp}", key="high_temp")
+    notifier.send("Goodnight!")
+    notifier.send("Goodnight!")
+    await asyncio.sleep(1)
+    queued = len(notifier.queue)
+    stored = os.path.exists(notify.OUTBOX)
+    endpoints.fail.clear()
+    notifier.retry_now()
+    await asyncio.sleep(1)
+    sent = [text for _, text in endpoints.messages[before:]]
+    sender.cancel()
+    check(
+        "notification outbox",
+        queued == 2 and stored and sent == ["Too hot: 43", "Goodnight!"] and not os.path.exists(notify.OUTBOX),
+        f"{queued} queued while down, sent {sent}",
+    )
+
+    await ahttp.close_all()
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=1.5, help="slow-server delay in seconds")
+    args = parser.parse_args(argv)
+
+    hostenv.setup()
+    import uasyncio
+    import world
+
+    os.chdir(tempfile.mkdtemp(prefix="icu_grow_http_"))
+    world.install()
+    try:
+        failures = uasyncio.run(run_cases(args.latency))
+    finally:
+        world.shutdown()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Simulated time for the board.
+
+The world clock is naive local time in epoch seconds. The device clock
+is the world clock plus an offset that machine.RTC().datetime() sets;
+like a Pico after power-on it starts at 2021-01-01 00:00:00.
+
+install() points CPython's time module at this clock with MicroPython
+semantics: 8-tuple localtime(), mktime() that takes 8 or 9 fields,
+no host timezone, plus ticks_ms/ticks_us/ticks_diff/ticks_add and
+sleep_ms/sleep_us.
+"""
+import calendar
+import time
+
+# Originals, for the simulator's own use
+real_time = time.time
+real_sleep = time.sleep
+real_monotonic = time.monotonic
+real_gmtime = time.gmtime
+
+PICO_EPOCH_START = calendar.timegm((2021, 1, 1, 0, 0, 0, 0, 0, 0))
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALFPERIOD = TICKS_PERIOD // 2
+
+
+def to_tuple(seconds):
+    """MicroPython localtime(): (year, month, mday, hour, minute, second, weekday, yearday)."""
+    t = real_gmtime(int(seconds))
+    return (t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min, t.tm_sec, t.tm_wday, t.tm_yday)
+
+
+def from_tuple(fields):
+    """MicroPython mktime(): the first six fields are all that count."""
+    year, month, day, hour, minute, second = (int(x) for x in fields[:6])
+    return calendar.timegm((year, month, day, hour, minute, second, 0, 0, 0))
+
+
+class Clock:
+    def __init__(self, start=None):
+        if start is None:
+            # Host local wall time, as naive epoch seconds
+            now = time.localtime()
+            start = calendar.timegm(now)
+        self.start = start
+        self.device_offset = PICO_EPOCH_START - start
+        self._t0 = real_monotonic()
+
+    def elapsed(self):
+        """Seconds since the simulation started."""
+        return real_monotonic() - self._t0
+
+    def world(self):
+        return self.start + self.elapsed()
+
+    def device(self):
+        return self.world() + self.device_offset
+
+    def set_device(self, seconds):
+        self.device_offset = seconds - self.world()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            real_sleep(seconds)
+
+    # time module replacements
+
+    def time(self):
+        return int(self.device())
+
+    def localtime(self, seconds=None):
+        return to_tuple(self.device() if seconds is None else seconds)
+
+    def mktime(self, fields):
+        return from_tuple(fields)
+
+    def ticks_us(self):
+        return int(self.elapsed() * 1_000_000) & TICKS_MAX
+
+    def ticks_ms(self):
+        return int(self.elapsed() * 1000) & TICKS_MAX
+
+    def sleep_ms(self, ms):
+        self.sleep(ms / 1000)
+
+    def sleep_us(self, us):
+        self.sleep(us / 1_000_000)
+
+
+def ticks_diff(new, old):
+    return ((new - old + TICKS_HALFPERIOD) & TICKS_MAX) - TICKS_HALFPERIOD
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & TICKS_MAX
+
+
+# Hooks run whenever firmware reads the tick counter (see machine.Pin.irq)
+tick_hooks = []
+
+
+def install(clock):
+    """Route CPython's time module through `clock`."""
+
+    def ticks_ms():
+        now = clock.ticks_ms()
+        for hook in tick_hooks:
+            hook()
+        return now
+
+    time.time = clock.time
+    time.localtime = clock.localtime
+    time.gmtime = clock.localtime
+    time.mktime = clock.mktime
+    time.sleep = clock.sleep
+    time.sleep_ms = clock.sleep_ms
+    time.sleep_us = clock.sleep_us
+    time.ticks_ms = ticks_ms
+    time.ticks_us = clock.ticks_us
+    time.ticks_diff = ticks_diff
+    time.ticks_add = ticks_add
+    time.ticks_cpu = clock.ticks_us
+
+
+class VirtualClock(Clock):
+    """
+    A clock that only moves when told to. Blocking sleeps advance it
+    instantly and the virtual event loop jumps it to the next timer.
+    """
+
+    def __init__(self, start=None):
+        super().__init__(start)
+        self.now = 0.0
+
+    def elapsed(self):
+        return self.now
+
+    def advance(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+
+    def sleep(self, seconds):
+        self.advance(seconds)
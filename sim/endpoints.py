@@ -0,0 +1,204 @@
+"""
+Local stand-ins for the web services the firmware calls.
+
+One HTTP server on 127.0.0.1 answers for every host; requests are routed
+on the Host header:
+
+    ip-api.com          GET /json/                 geo-IP (timezone, lat, lon)
+    worldtimeapi.org    GET /api/timezone/<tz>     current local time
+    api.open-meteo.com  GET /v1/forecast?...       hourly temperature, sunrise, sunset
+    ntfy.sh             POST /<topic>              notifications (recorded)
+
+Answers are generated from the simulated clock and greenhouse model.
+`latency` delays every response, `fail` makes a host return HTTP 503,
+and hosts in `chunked` answer with chunked transfer encoding, waiting
+`chunk_delay` seconds between chunks. Connections stay open (HTTP/1.1
+keep-alive); `connections` counts the ones opened. Forecasts carry an
+ETag and a request whose If-None-Match matches it gets 304 Not
+Modified; `not_modified` counts those.
+"""
+import json
+import zlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import clock as clock_module
+import world
+
+HOSTS = ("ip-api.com", "worldtimeapi.org", "api.open-meteo.com", "ntfy.sh")
+
+
+class Endpoints:
+    def __init__(self, latency=0.0, timezone="Europe/London", latitude=51.5, longitude=-0.12, utc_offset=0):
+        self.latency = latency
+        self.timezone = timezone
+        self.latitude = latitude
+        self.longitude = longitude
+        self.utc_offset = utc_offset
+        self.fail = set()
+        self.chunked = set()
+        self.chunk_delay = 0.0
+        self.connections = 0
+        self.not_modified = 0
+        self.messages = []
+        self.requests = {}
+        self.server = None
+        self.thread = None
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def start(self):
+        endpoints = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                endpoints.connections += 1
+                super().setup()
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionError:
+                    # The client gave up (timed out) before the reply
+                    pass
+
+            def do_GET(self):
+                endpoints.handle(self, "GET")
+
+            def do_POST(self):
+                endpoints.handle(self, "POST")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    # Routing
+
+    def handle(self, request, method):
+        host = request.headers.get("Host", "").split(":")[0]
+        self.requests[host] = self.requests.get(host, 0) + 1
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        if self.latency:
+            clock_module.real_sleep(self.latency)
+
+        request.chunked = host in self.chunked
+        if host in self.fail:
+            return self.reply(request, 503, {"error": "unavailable"})
+        url = urlsplit(request.path)
+        if host == "ip-api.com" and method == "GET":
+            return self.reply(request, 200, self.geo())
+        if host == "worldtimeapi.org" and method == "GET":
+            return self.reply(request, 200, self.local_time())
+        if host == "api.open-meteo.com" and method == "GET":
+            return self.reply(request, 200, self.forecast(parse_qs(url.query)), etag=True)
+        if host == "ntfy.sh" and method == "POST":
+            self.messages.append((url.path.strip("/"), body.decode("utf-8")))
+            return self.reply(request, 200, {"id": len(self.messages)})
+        self.reply(request, 404, {"error": "not found"})
+
+    def reply(self, request, status, payload, etag=False):
+        data = json.dumps(payload).encode()
+        if etag:
+            tag = '"%08x"' % zlib.crc32(data)
+            if request.headers.get("If-None-Match") == tag:
+                self.not_modified += 1
+                request.send_response(304)
+                request.send_header("ETag", tag)
+                request.end_headers()
+                return
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        if etag:
+            request.send_header("ETag", tag)
+        if not getattr(request, "chunked", False):
+            request.send_header("Content-Length", str(len(data)))
+            request.end_headers()
+            request.wfile.write(data)
+            return
+        request.send_header("Transfer-Encoding", "chunked")
+        request.end_headers()
+        for i in range(0, len(data), 512):
+            part = data[i:i + 512]
+            request.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+            request.wfile.flush()
+            if self.chunk_delay:
+                clock_module.real_sleep(self.chunk_delay)
+        request.wfile.write(b"0\r\n\r\n")
+
+    # Payloads
+
+    def geo(self):
+        return {
+            "status": "success",
+            "timezone": self.timezone,
+            "lat": self.latitude,
+            "lon": self.longitude,
+        }
+
+    def local_time(self):
+        now = world.clock.world()
+        y, mo, d, h, mi, s, wd, yd = clock_module.to_tuple(now)
+        sign = "-" if self.utc_offset < 0 else "+"
+        offset = abs(self.utc_offset)
+        utc_offset = f"{sign}{offset // 3600:02d}:{offset % 3600 // 60:02d}"
+        return {
+            "datetime": f"{y:04d}-{mo:02d}-{d:02d}T{h:02d}:{mi:02d}:{s:02d}.000000{utc_offset}",
+            "utc_offset": utc_offset,
+            "timezone": self.timezone,
+            "unixtime": int(now) - self.utc_offset,
+        }
+
+    def forecast(self, query):
+        model = world.greenhouse
+        today = int(world.clock.world()) // 86400 * 86400
+        days = int(query.get("forecast_days", ["2"])[0])
+        hourly_fields = ",".join(query.get("hourly", [])).split(",")
+        daily_fields = ",".join(query.get("daily", [])).split(",")
+
+        unixtime = query.get("timeformat", ["iso8601"])[0] == "unixtime"
+
+        def stamp(t, with_time=True):
+            if unixtime:
+                # Epoch seconds in UTC; the local times are naive
+                return int(t) - self.utc_offset
+            y, mo, d, h, mi = clock_module.to_tuple(t)[:5]
+            if with_time:
+                return f"{y:04d}-{mo:02d}-{d:02d}T{h:02d}:{mi:02d}"
+            return f"{y:04d}-{mo:02d}-{d:02d}"
+
+        hours = [today + 3600 * i for i in range(24 * days)]
+        hourly = {"time": [stamp(t) for t in hours]}
+        if "temperature_2m" in hourly_fields:
+            hourly["temperature_2m"] = [round(model.outside_temp(t), 1) for t in hours]
+
+        day_starts = [today + 86400 * i for i in range(days)]
+        daily = {"time": [stamp(t, False) for t in day_starts]}
+        if "sunrise" in daily_fields:
+            daily["sunrise"] = [stamp(t + int(model.sun_hours(t)[0] * 3600)) for t in day_starts]
+        if "sunset" in daily_fields:
+            daily["sunset"] = [stamp(t + int(model.sun_hours(t)[1] * 3600)) for t in day_starts]
+
+        return {
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "utc_offset_seconds": self.utc_offset,
+            "timezone": query.get("timezone", [self.timezone])[0],
+            "hourly": hourly,
+            "daily": daily,
+        }
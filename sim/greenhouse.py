@@ -0,0 +1,135 @@
+"""
+Lumped thermal model of the greenhouse the fake sensors read from.
+
+Inside air gains heat from the sun and the heat pad and loses it to the
+outside through the glazing, the roof vents and the fan (rates in °C/s,
+closed-up time constant about an hour):
+
+    dT/dt = k_sun * sun + k_heat * heat - (k_wall + k_roof * roof + k_fan * fan) * (T - T_out)
+
+Outside temperature follows a daily sine peaking mid-afternoon, the sun
+rises and sets with a seasonal day length, and the soil slowly dries.
+"""
+import math
+import time
+
+import world
+
+
+class Greenhouse:
+    def __init__(
+        self,
+        clock,
+        latitude=51.5,
+        outside_mean=12.0,
+        outside_swing=6.0,
+        k_sun=0.0045,
+        k_heat=0.0024,
+        k_wall=0.0003,
+        k_roof=0.0012,
+        k_fan=0.0015,
+        covered=False,
+    ):
+        self.clock = clock
+        self.latitude = latitude
+        self.outside_mean = outside_mean
+        self.outside_swing = outside_swing
+        self.k_sun = k_sun
+        self.k_heat = k_heat
+        self.k_wall = k_wall
+        self.k_roof = k_roof
+        self.k_fan = k_fan
+        self.covered = covered
+
+        self.last = clock.world()
+        self.temp_in = self.outside_temp(self.last)
+        self.roof = 0.0  # 0 closed .. 1 fully open
+        self.dryness = 0.3  # 0 wet .. 1 dry
+
+    # Weather
+
+    def day_length(self, t):
+        """Hours from sunrise to sunset at the model's latitude, with refraction."""
+        yearday = time.gmtime(int(t))[7]
+        declination = math.radians(-23.44) * math.cos(2 * math.pi * (yearday + 10) / 365)
+        lat = math.radians(self.latitude)
+        cos_ha = (math.cos(math.radians(90.833)) - math.sin(lat) * math.sin(declination)) / (
+            math.cos(lat) * math.cos(declination)
+        )
+        return 2 * math.degrees(math.acos(min(1.0, max(-1.0, cos_ha)))) / 15
+
+    def sun_hours(self, t):
+        """(sunrise, sunset) as local hours of the day."""
+        half = self.day_length(t) / 2
+        return 12.0 - half, 12.0 + half
+
+    def sun(self, t):
+        """Irradiance 0..1."""
+        hour = (t % 86400) / 3600
+        rise, set_ = self.sun_hours(t)
+        if hour <= rise or hour >= set_:
+            return 0.0
+        return math.sin(math.pi * (hour - rise) / (set_ - rise))
+
+    def outside_temp(self, t):
+        hour = (t % 86400) / 3600
+        return self.outside_mean + self.outside_swing * math.sin(2 * math.pi * (hour - 9) / 24)
+
+    # Actuators, read back from the fake hardware
+
+    def fan_on(self):
+        return bool(world.pins.get(2, 0))
+
+    def heat_on(self):
+        return bool(world.pins.get(1, 0))
+
+    def move_roof(self, speed, seconds):
+        # The roof opens in ~1.35 s at 0.75 and drops shut in ~0.9 s at -0.35
+        if speed > 0:
+            self.roof += speed * seconds / 1.0125
+        else:
+            self.roof += speed * seconds / 0.315
+        self.roof = max(0.0, min(1.0, self.roof))
+
+    # Integration
+
+    def step(self):
+        now = self.clock.world()
+        dt = now - self.last
+        t = self.last
+        while dt > 0:
+            h = min(dt, 60.0)
+            t += h
+            outside = self.outside_temp(t)
+            gain = self.k_sun * self.sun(t) + self.k_heat * self.heat_on()
+            loss = (self.k_wall + self.k_roof * self.roof + self.k_fan * self.fan_on()) * (self.temp_in - outside)
+            self.temp_in += (gain - loss) * h
+            self.dryness = min(1.0, self.dryness + h / (4 * 86400))
+            dt -= h
+        self.last = now
+
+    # Sensor values
+
+    def inside(self):
+        self.step()
+        return self.temp_in
+
+    def outside(self):
+        self.step()
+        return self.outside_temp(self.last)
+
+    def humidity(self):
+        self.step()
+        outside = self.outside_temp(self.last)
+        rh = 80 - 2.0 * (outside - self.outside_mean) - 3.0 * (self.temp_in - outside)
+        rh += 10 * (1 - self.roof) * (1 - self.fan_on())
+        return max(15.0, min(99.0, rh))
+
+    def lux(self):
+        self.step()
+        if self.covered:
+            return 0.0
+        return 40000.0 * self.sun(self.last)
+
+    def moisture_hz(self):
+        return 7 + 24 * self.dryness
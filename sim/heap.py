@@ -0,0 +1,34 @@
+"""
+MicroPython's gc.mem_free()/gc.mem_alloc() on CPython.
+
+tracemalloc counts the bytes Python has allocated since install(); the
+free figure is that subtracted from a fixed heap size, like the Pico's
+GC heap. The count includes the simulator's own objects and CPython
+objects are larger, so absolute numbers differ from the board; growth
+and leaks show the same way.
+"""
+import gc
+import tracemalloc
+
+PICO_HEAP = 192 * 1024
+
+
+def install(size=PICO_HEAP):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+
+    def mem_alloc():
+        return max(0, tracemalloc.get_traced_memory()[0] - base)
+
+    def mem_free():
+        return max(0, size - mem_alloc())
+
+    gc.mem_alloc = mem_alloc
+    gc.mem_free = mem_free
+
+
+def uninstall():
+    for name in ("mem_alloc", "mem_free"):
+        if hasattr(gc, name):
+            delattr(gc, name)
+    tracemalloc.stop()
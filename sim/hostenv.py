@@ -0,0 +1,23 @@
+"""
+Puts src/ on the import path for host-side tools.
+
+src/logging.py shadows the standard library module of the same name,
+which CPython's asyncio needs while it imports. asyncio is imported
+first so it binds the real logging module, then the cached entry is
+dropped so `from logging import system_log` finds src/logging.py.
+"""
+import os
+import sys
+
+import asyncio  # noqa: F401  (must bind stdlib logging before src/ is on the path)
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(SIM_DIR), "src")
+
+
+def setup():
+    if SIM_DIR not in sys.path:
+        sys.path.insert(0, SIM_DIR)
+    if SRC_DIR not in sys.path:
+        sys.path.insert(1, SRC_DIR)
+    sys.modules.pop("logging", None)
@@ -0,0 +1,108 @@
+"""Fake machine module: Pin, ADC, RTC, WDT and reset, backed by the sim world."""
+import clock
+import world
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_RISING = 4
+    IRQ_FALLING = 8
+
+    def __init__(self, id, mode=IN, pull=None, value=None):
+        self.id = id
+        self.mode = mode
+        if value is not None:
+            self.value(value)
+
+    def value(self, v=None):
+        if v is None:
+            return world.pins.get(self.id, 0)
+        world.pins[self.id] = 1 if v else 0
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def irq(self, handler=None, trigger=IRQ_RISING):
+        # A new handler replaces the old one, as on the RP2040
+        world.pulse_irqs[self.id] = [handler, self, world.clock.ticks_ms(), 0.0]
+
+
+def deliver_pulses():
+    """
+    Fire the moisture sensor's pulse train up to now. Called whenever
+    firmware reads ticks_ms(), which is how Moisture measures frequency.
+    """
+    entry = world.pulse_irqs.get(5)
+    if entry is None or entry[0] is None:
+        return
+    handler, pin, last, carry = entry
+    now = world.clock.ticks_ms()
+    pulses = carry + world.greenhouse.moisture_hz() * clock.ticks_diff(now, last) / 1000
+    for _ in range(int(pulses)):
+        handler(pin)
+    entry[2] = now
+    entry[3] = pulses - int(pulses)
+
+
+class ADC:
+    def __init__(self, pin):
+        self.pin = pin
+
+    def read_u16(self):
+        # RP2040 temperature sensor at about 27°C
+        return int(0.706 / 3.3 * 65535)
+
+
+class RTC:
+    def datetime(self, dt=None):
+        if dt is None:
+            y, mo, d, h, mi, s, wd, yd = world.clock.localtime()
+            return (y, mo, d, wd, h, mi, s, 0)
+        year, month, day, weekday, hour, minute, second = dt[:7]
+        world.clock.set_device(clock.from_tuple((year, month, day, hour, minute, second)))
+
+
+class WDT:
+    """
+    Resets the board, by raising SimReset, the first time firmware reads
+    the tick counter more than `timeout` ms after the last feed.
+    """
+
+    def __init__(self, id=0, timeout=5000):
+        self.timeout = timeout
+        self.last_feed = world.clock.ticks_ms()
+        self.feeds = 0
+        world.wdt = self
+        clock.tick_hooks.append(self.check)
+
+    def feed(self):
+        self.last_feed = world.clock.ticks_ms()
+        self.feeds += 1
+
+    def check(self):
+        starved = clock.ticks_diff(world.clock.ticks_ms(), self.last_feed)
+        if starved > self.timeout:
+            clock.tick_hooks.remove(self.check)
+            raise SimReset(f"watchdog: not fed for {starved} ms")
+
+
+class SimReset(SystemExit):
+    """Raised where the board would reboot."""
+
+
+def reset():
+    raise SimReset("machine.reset()")
+
+
+def soft_reset():
+    raise SimReset("machine.soft_reset()")
+
+
+def freq(hz=None):
+    return 125_000_000
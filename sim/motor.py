@@ -0,0 +1,43 @@
+"""Fake motor module. Motor (8, 9) drives the roof in the greenhouse model."""
+import world
+
+ROOF_PINS = (8, 9)
+
+
+class Motor:
+    def __init__(self, pins, direction=0, speed_scale=1.0):
+        self.pins = tuple(pins)
+        self._enabled = False
+        self._speed = 0.0
+        self._since = None
+
+    def _settle(self):
+        if self._since is not None and self.pins == ROOF_PINS:
+            world.greenhouse.move_roof(self._speed, world.clock.elapsed() - self._since)
+        self._since = world.clock.elapsed() if self._enabled and self._speed else None
+
+    def enable(self):
+        self._settle()
+        self._enabled = True
+        self._settle()
+
+    def disable(self):
+        self._settle()
+        self._enabled = False
+        self._settle()
+
+    def is_enabled(self):
+        return self._enabled
+
+    def speed(self, speed=None):
+        if speed is None:
+            return self._speed
+        self._settle()
+        self._speed = speed
+        self._settle()
+
+    def stop(self):
+        self.speed(0.0)
+
+    def coast(self):
+        self.stop()
@@ -0,0 +1,35 @@
+"""Fake network module: a station interface that follows world.wifi_up."""
+import world
+
+STA_IF = 0
+AP_IF = 1
+
+
+# Interface state; every WLAN(STA_IF) is the same radio
+_active = {}
+_ssid = {}
+
+
+class WLAN:
+    def __init__(self, interface=STA_IF):
+        self.interface = interface
+
+    def active(self, state=None):
+        if state is None:
+            return _active.get(self.interface, False)
+        _active[self.interface] = bool(state)
+
+    def connect(self, ssid, password=None):
+        _ssid[self.interface] = ssid
+
+    def disconnect(self):
+        _ssid.pop(self.interface, None)
+
+    def isconnected(self):
+        return self.active() and self.interface in _ssid and world.wifi_up
+
+    def status(self):
+        return 3 if self.isconnected() else 0
+
+    def ifconfig(self):
+        return ("192.168.4.20", "255.255.255.0", "192.168.4.1", "192.168.4.1")
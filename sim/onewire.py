@@ -0,0 +1,9 @@
+"""Fake onewire module."""
+
+
+class OneWire:
+    def __init__(self, pin):
+        self.pin = pin
+
+    def scan(self):
+        return [bytearray(b"\x28\xff\x64\x1e\x0f\x00\x00\x5a")]
@@ -0,0 +1,191 @@
+"""
+Headless stand-in for Pimoroni's picographics module.
+
+Draws into an in-memory RGB framebuffer with the same calls screen.py
+uses on the Pico Explorer, counts draw calls, pixels touched and bytes
+pushed to the panel, and can dump each update as a PNG.
+
+Set PICO_SIM_DUMP_DIR to write every update() to numbered PNG files.
+partial_update() is always there, as on the board, but does nothing
+unless PICO_SIM_PARTIAL=1, which makes it behave like a panel that
+supports windowed writes.
+"""
+import os
+import struct
+import zlib
+
+DISPLAY_PICO_EXPLORER = 0
+
+# Panel size per display constant
+_BOUNDS = {DISPLAY_PICO_EXPLORER: (240, 240)}
+
+# bitmap8 is 8px tall; glyphs are drawn as solid 5x7 cells on a 6px pitch
+_GLYPH_W = 5
+_GLYPH_H = 7
+_PITCH = 6
+_BYTES_PER_PIXEL = 2  # RGB565 over SPI
+
+
+class PicoGraphics:
+    def __init__(self, display=DISPLAY_PICO_EXPLORER, **kwargs):
+        self.width, self.height = _BOUNDS.get(display, (240, 240))
+        self.fb = bytearray(self.width * self.height * 3)
+        self.pens = []
+        self.pen = b"\x00\x00\x00"
+        self.dump_dir = os.environ.get("PICO_SIM_DUMP_DIR")
+        self.windowed = os.environ.get("PICO_SIM_PARTIAL") == "1"
+        self.frame = 0
+        self.reset_counters()
+
+    # Counters
+
+    def reset_counters(self):
+        self.calls = {}
+        self.pixels = 0
+        self.updates = 0
+        self.bytes_pushed = 0
+
+    def counters(self):
+        return {
+            "calls": sum(self.calls.values()),
+            "pixels": self.pixels,
+            "updates": self.updates,
+            "bytes_pushed": self.bytes_pushed,
+        }
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    # Pens
+
+    def create_pen(self, r, g, b):
+        self.pens.append(bytes((r & 0xFF, g & 0xFF, b & 0xFF)))
+        return len(self.pens) - 1
+
+    def set_pen(self, pen):
+        self._count("set_pen")
+        self.pen = self.pens[pen]
+
+    def get_bounds(self):
+        return self.width, self.height
+
+    def set_font(self, font):
+        pass
+
+    def set_backlight(self, brightness):
+        pass
+
+    # Drawing
+
+    def _span(self, x0, x1, y):
+        """Fill pixels x0..x1 inclusive on row y, clipped to the panel."""
+        if y < 0 or y >= self.height:
+            return
+        x0 = max(0, x0)
+        x1 = min(self.width - 1, x1)
+        if x1 < x0:
+            return
+        n = x1 - x0 + 1
+        start = (y * self.width + x0) * 3
+        self.fb[start:start + n * 3] = self.pen * n
+        self.pixels += n
+
+    def clear(self):
+        self._count("clear")
+        self.fb[:] = self.pen * (self.width * self.height)
+        self.pixels += self.width * self.height
+
+    def pixel(self, x, y):
+        self._count("pixel")
+        self._span(x, x, y)
+
+    def rectangle(self, x, y, w, h):
+        self._count("rectangle")
+        for row in range(y, y + h):
+            self._span(x, x + w - 1, row)
+
+    def line(self, x0, y0, x1, y1, thickness=1):
+        self._count("line")
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while True:
+            self._span(x0, x0, y0)
+            if x0 == x1 and y0 == y1:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    def circle(self, x, y, r):
+        self._count("circle")
+        r2 = r * r
+        for dy in range(-r, r + 1):
+            dx = 0
+            while (dx + 1) * (dx + 1) + dy * dy <= r2:
+                dx += 1
+            self._span(x - dx, x + dx, y + dy)
+
+    def measure_text(self, text, scale=2, spacing=1, fixed_width=False):
+        return len(text) * _PITCH * scale
+
+    def text(self, text, x, y, wordwrap=None, scale=2, angle=0, spacing=1):
+        self._count("text")
+        cx = x
+        cy = y
+        for ch in text:
+            if wordwrap is not None and cx + _PITCH * scale > x + wordwrap:
+                cx = x
+                cy += 8 * scale
+            if ch != " ":
+                for row in range(cy, cy + _GLYPH_H * scale):
+                    self._span(cx, cx + _GLYPH_W * scale - 1, row)
+            cx += _PITCH * scale
+
+    # Panel
+
+    def update(self):
+        self._count("update")
+        self.updates += 1
+        self.bytes_pushed += self.width * self.height * _BYTES_PER_PIXEL
+        self._dump()
+
+    def partial_update(self, x, y, w, h):
+        self._count("partial_update")
+        if not self.windowed:
+            # Like a driver without windowed writes: nothing reaches the panel
+            return
+        self.updates += 1
+        self.bytes_pushed += w * h * _BYTES_PER_PIXEL
+        self._dump()
+
+    def _dump(self):
+        if self.dump_dir:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            self.save_png(os.path.join(self.dump_dir, f"frame_{self.frame:05d}.png"))
+        self.frame += 1
+
+    def save_png(self, path):
+        """Write the framebuffer as an 8-bit RGB PNG."""
+        stride = self.width * 3
+        raw = b"".join(
+            b"\x00" + bytes(self.fb[row * stride:(row + 1) * stride])
+            for row in range(self.height)
+        )
+
+        def chunk(tag, data):
+            body = tag + data
+            return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\n")
+            f.write(chunk(b"IHDR", header))
+            f.write(chunk(b"IDAT", zlib.compress(raw)))
+            f.write(chunk(b"IEND", b""))
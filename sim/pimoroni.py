@@ -0,0 +1,22 @@
+"""Fake pimoroni module: Pico Explorer pins and buttons pressed on a schedule."""
+import world
+
+PICO_EXPLORER_I2C_PINS = {"sda": 20, "scl": 21}
+
+
+class Button:
+    def __init__(self, button, invert=True, repeat_time=200, hold_time=1000):
+        self.pin = button
+
+    def raw(self):
+        now = world.clock.elapsed()
+        for start, end in world.presses.get(self.pin, ()):
+            if start <= now < end:
+                return True
+        return False
+
+    def read(self):
+        return self.raw()
+
+    def is_pressed(self):
+        return self.raw()
@@ -0,0 +1,7 @@
+"""Fake pimoroni_i2c module."""
+
+
+class PimoroniI2C:
+    def __init__(self, sda=4, scl=5, baudrate=400_000):
+        self.sda = sda
+        self.scl = scl
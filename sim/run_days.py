@@ -0,0 +1,103 @@
+"""
+Run the firmware for days of simulated time on a virtual clock.
+
+    python sim/run_days.py --days 30
+
+Every sleep, blocking or async, jumps the clock instead of waiting.
+At each simulated midnight the run records CPU time spent and the size
+of data_log.csv and system_log.csv, and prints a per-day report at the end.
+Firmware output goes to <workdir>/stdout.txt.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+import hostenv
+from run_main import add_model_args, install_faults, install_heap, model_kwargs, prepare_workdir, run_firmware, report
+
+LOGS = ("data_log.csv", "system_log.csv")
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class DayRecorder:
+    """Samples CPU time and log sizes each time the clock passes midnight."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.rows = []
+        self.day = self.today()
+        self.cpu = time.process_time()
+
+    def today(self):
+        return int(self.clock.world()) // 86400
+
+    def __call__(self):
+        day = self.today()
+        if day != self.day:
+            self.close_day()
+            self.day = day
+
+    def close_day(self):
+        cpu = time.process_time()
+        self.rows.append((cpu - self.cpu,) + tuple(file_size(name) for name in LOGS))
+        self.cpu = cpu
+
+    def print(self):
+        print()
+        print(f"{'day':>4}{'cpu s':>9}{'data_log':>12}{'+/day':>10}{'system_log':>12}{'+/day':>10}")
+        prev = (0,) * len(LOGS)
+        for n, (cpu, *sizes) in enumerate(self.rows, 1):
+            grow = [size - p for size, p in zip(sizes, prev)]
+            print(f"{n:>4}{cpu:>9.2f}{sizes[0]:>12}{grow[0]:>10}{sizes[1]:>12}{grow[1]:>10}")
+            prev = sizes
+        total = sum(row[0] for row in self.rows)
+        days = max(len(self.rows), 1)
+        print(f"total cpu {total:.1f} s, {total / days:.2f} s per simulated day")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=float, default=30, help="simulated days to run")
+    add_model_args(parser)
+    args = parser.parse_args(argv)
+
+    hostenv.setup()
+    import clock
+    import uasyncio
+    import virtual_loop
+    import world
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="icu_grow_days_")
+    prepare_workdir(workdir)
+    sim_clock = clock.VirtualClock(args.start)
+    world.install(sim_clock, latency=0.0, **model_kwargs(args))
+    install_heap(args)
+    install_faults(args)
+    recorder = DayRecorder(sim_clock)
+    virtual_loop.install(sim_clock, recorder)
+
+    uasyncio.run_for = args.days * 86400
+    started = time.perf_counter()
+    try:
+        with open("stdout.txt", "w") as out, contextlib.redirect_stdout(out):
+            run_firmware()
+    finally:
+        recorder.close_day()
+        report(workdir)
+        world.shutdown()
+    print(f"wall time {time.perf_counter() - started:.1f} s")
+    recorder.print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
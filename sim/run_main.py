@@ -0,0 +1,143 @@
+"""
+Run the unmodified firmware (src/main.py) on Linux against the
+simulated board, greenhouse and web services.
+
+    python sim/run_main.py --seconds 120 --press 12@30
+
+Logs and config.json live in --workdir (a fresh temp dir by default),
+just as they live in the Pico's flash root.
+"""
+import argparse
+import calendar
+import json
+import os
+import runpy
+import sys
+import tempfile
+import time
+
+import hostenv
+
+BUTTONS = {"a": 12, "b": 13, "x": 14, "y": 15}
+
+
+def parse_start(text):
+    """'2025-06-21T06:00' -> naive local epoch seconds."""
+    fields = time.strptime(text, "%Y-%m-%dT%H:%M")
+    return calendar.timegm(fields)
+
+
+def parse_press(text):
+    """'a@30' or '12@30' -> (pin, seconds into the run)."""
+    button, at = text.split("@")
+    pin = BUTTONS.get(button.lower())
+    return (pin if pin is not None else int(button)), float(at)
+
+
+def prepare_workdir(workdir):
+    os.makedirs(workdir, exist_ok=True)
+    config = os.path.join(workdir, "config.json")
+    if not os.path.exists(config):
+        with open(config, "w") as f:
+            json.dump({"SSID": "sim", "PASSWORD": "sim"}, f)
+    os.chdir(workdir)
+
+
+def count_lines(path):
+    try:
+        with open(path) as f:
+            return sum(1 for _ in f)
+    except OSError:
+        return 0
+
+
+def report(workdir):
+    import world
+
+    model = world.greenhouse
+    print()
+    print(f"workdir:          {workdir}")
+    print(f"simulated:        {world.clock.elapsed():.0f} s")
+    print(f"inside now:       {model.inside():.1f}°C (outside {model.outside():.1f}°C)")
+    print(f"roof:             {model.roof * 100:.0f}% open")
+    print(f"data_log.csv:     {count_lines('data_log.csv')} rows")
+    print(f"system_log.csv:   {count_lines('system_log.csv')} lines")
+    print(f"requests:         {world.endpoints.requests}")
+    print(f"notifications:    {len(world.endpoints.messages)}")
+    if world.wdt is not None:
+        print(f"watchdog feeds:   {world.wdt.feeds}")
+    if os.path.exists("boot_report.txt"):
+        print()
+        with open("boot_report.txt") as f:
+            print(f.read(), end="")
+
+
+def add_model_args(parser):
+    parser.add_argument("--start", type=parse_start, help="world time to start at, YYYY-MM-DDTHH:MM")
+    parser.add_argument("--outside-mean", type=float, default=12.0, help="mean outside temperature")
+    parser.add_argument("--outside-swing", type=float, default=6.0, help="daily outside swing")
+    parser.add_argument("--covered", action="store_true", help="greenhouse is covered (no light)")
+    parser.add_argument("--latency", type=float, default=0.0, help="web service latency in seconds")
+    parser.add_argument("--workdir", help="flash root for logs and config.json")
+    parser.add_argument("--heap-kb", type=int, help="emulate gc.mem_free()/mem_alloc() over a heap this size")
+    parser.add_argument("--fail", action="append", default=[], metavar="HOST",
+                        help="web service host that answers HTTP 503, e.g. api.open-meteo.com")
+
+
+def model_kwargs(args):
+    return {
+        "outside_mean": args.outside_mean,
+        "outside_swing": args.outside_swing,
+        "covered": args.covered,
+    }
+
+
+def install_heap(args):
+    if args.heap_kb:
+        import heap
+        heap.install(args.heap_kb * 1024)
+
+
+def install_faults(args):
+    import world
+    world.endpoints.fail.update(args.fail)
+
+
+def run_firmware():
+    try:
+        runpy.run_path(os.path.join(hostenv.SRC_DIR, "main.py"), run_name="__main__")
+    except SystemExit as e:
+        print(f"main exited: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=60, help="how long to run")
+    parser.add_argument("--press", action="append", type=parse_press, default=[],
+                        help="press a button, e.g. a@30 or 12@30")
+    add_model_args(parser)
+    args = parser.parse_args(argv)
+
+    hostenv.setup()
+    import uasyncio
+    import world
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="icu_grow_sim_")
+    prepare_workdir(workdir)
+    world.install(start=args.start, latency=args.latency, **model_kwargs(args))
+    install_heap(args)
+    install_faults(args)
+    for pin, at in args.press:
+        world.press(pin, at)
+
+    uasyncio.run_for = args.seconds
+    try:
+        run_firmware()
+    finally:
+        report(workdir)
+        world.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""uasyncio on the host is CPython's asyncio plus the MicroPython extras."""
+import asyncio as _asyncio
+from asyncio import *
+
+# Set by the simulator to stop the application after this many seconds
+run_for = None
+
+
+async def sleep_ms(ms):
+    await sleep(ms / 1000)
+
+
+if hasattr(_asyncio, "timeout"):
+    async def wait_for(aw, timeout):
+        """
+        CPython 3.11's wait_for() can swallow a cancellation that lands
+        just as `aw` finishes, leaving the task running; uasyncio's cannot.
+        """
+        async with _asyncio.timeout(timeout):
+            return await aw
+
+
+async def _waiting(coro):
+    import world
+
+    world.io_waiting += 1
+    try:
+        return await coro
+    finally:
+        world.io_waiting -= 1
+
+
+class _Reader:
+    """A StreamReader whose pending reads count in world.io_waiting."""
+
+    def __init__(self, reader):
+        self.reader = reader
+
+    def read(self, n=-1):
+        return _waiting(self.reader.read(n))
+
+    def readline(self):
+        return _waiting(self.reader.readline())
+
+    def readexactly(self, n):
+        return _waiting(self.reader.readexactly(n))
+
+
+async def open_connection(host, port, ssl=None, **kw):
+    """Every host is answered by the local stand-in endpoints, over plain HTTP."""
+    import world
+
+    address, local_port = world.endpoints.address
+    reader, writer = await _waiting(_asyncio.open_connection(address, local_port))
+    return _Reader(reader), writer
+
+
+def run(main):
+    if run_for is None:
+        return _asyncio.run(main)
+
+    async def bounded():
+        try:
+            await _asyncio.wait_for(main, run_for)
+        except _asyncio.TimeoutError:
+            pass
+
+    return _asyncio.run(bounded())
@@ -0,0 +1,2 @@
+"""ujson on the host is CPython's json."""
+from json import *
@@ -0,0 +1,65 @@
+"""
+Fake urequests. Every request goes over real HTTP to the local
+stand-in endpoints, with the original host in the Host header.
+"""
+import http.client
+import json as _json
+
+import world
+
+
+class Response:
+    def __init__(self, status_code, content, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.reason = b""
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return _json.loads(self.content)
+
+    def close(self):
+        pass
+
+
+def request(method, url, data=None, json=None, headers=None, timeout=None, stream=None):
+    headers = dict(headers or {})
+    _, _, host, *rest = url.split("/", 3)
+    path = "/" + (rest[0] if rest else "")
+    if json is not None:
+        data = _json.dumps(json)
+        headers.setdefault("Content-Type", "application/json")
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    headers["Host"] = host
+
+    address, port = world.endpoints.address
+    conn = http.client.HTTPConnection(address, port, timeout=timeout)
+    try:
+        conn.request(method, path, body=data, headers=headers)
+        response = conn.getresponse()
+        return Response(response.status, response.read(), dict(response.getheaders()))
+    except OSError as e:
+        raise OSError(f"{host}: {e}")
+    finally:
+        conn.close()
+
+
+def get(url, **kw):
+    return request("GET", url, **kw)
+
+
+def post(url, **kw):
+    return request("POST", url, **kw)
+
+
+def put(url, **kw):
+    return request("PUT", url, **kw)
+
+
+def delete(url, **kw):
+    return request("DELETE", url, **kw)
@@ -0,0 +1,6 @@
+"""utime on the host is the time module as patched by clock.install()."""
+import time as _time
+
+
+def __getattr__(name):
+    return getattr(_time, name)
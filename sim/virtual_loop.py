@@ -0,0 +1,62 @@
+"""
+An asyncio event loop that runs on a VirtualClock.
+
+When nothing is ready the loop does not wait: it polls for real I/O
+and, if there is none, moves the clock straight to the next timer. A
+task set that mostly sleeps therefore runs as fast as the CPU allows,
+and time.localtime()/mktime() follow the same clock through
+clock.install().
+
+While the firmware waits on a socket (world.io_waiting, an HTTP
+request in flight) the loop waits for it in real time and moves the
+clock by the time actually waited, so network timeouts and latency
+keep their real length.
+"""
+import asyncio
+import selectors
+
+import world
+from clock import real_monotonic
+
+
+class _JumpSelector(selectors.DefaultSelector):
+    def __init__(self, clock, on_advance):
+        super().__init__()
+        self.clock = clock
+        self.on_advance = on_advance
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if events or timeout is None or timeout <= 0:
+            if not events and timeout is None:
+                # Only real I/O can wake us; wait for it in real time
+                return super().select(None)
+            return events
+        if world.io_waiting:
+            start = real_monotonic()
+            events = super().select(timeout)
+            self.clock.advance(min(timeout, real_monotonic() - start))
+            self.on_advance()
+            return events
+        self.clock.advance(timeout)
+        self.on_advance()
+        return []
+
+
+class VirtualLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock, on_advance=lambda: None):
+        super().__init__(_JumpSelector(clock, on_advance))
+        self.clock = clock
+
+    def time(self):
+        return self.clock.elapsed()
+
+
+def install(clock, on_advance=lambda: None):
+    """Make asyncio.run() and new_event_loop() build virtual loops."""
+
+    class Policy(asyncio.DefaultEventLoopPolicy):
+        def new_event_loop(self):
+            return VirtualLoop(clock, on_advance)
+
+    asyncio.set_event_loop_policy(Policy())
@@ -0,0 +1,54 @@
+"""
+Shared state of the simulated board and its surroundings.
+
+The fake hardware modules (machine, network, pimoroni, breakouts, ...)
+read and write here; install() builds the clock, the greenhouse model
+and the local stand-in HTTP endpoints.
+"""
+clock = None
+greenhouse = None
+endpoints = None
+
+# The machine.WDT once firmware starts one
+wdt = None
+
+# Socket connects and reads the firmware is waiting on (see uasyncio.py)
+io_waiting = 0
+
+# Wi-Fi association; tests flip this to simulate outages
+wifi_up = True
+
+# Output pin levels by GPIO number (LEDs double as fan and heat pad)
+pins = {}
+
+# Button presses by GPIO number: list of (start, end) in sim seconds
+presses = {}
+
+# Rising-edge handlers by GPIO number: [handler, pin, ticks of last delivery, fractional pulses]
+pulse_irqs = {}
+
+
+def install(clock_obj=None, start=None, latency=0.0, **model):
+    """Create the simulated world and patch the time module to follow it."""
+    global clock, greenhouse, endpoints
+    import clock as clock_module
+    import endpoints as endpoints_module
+    import machine
+    from greenhouse import Greenhouse
+
+    clock = clock_obj or clock_module.Clock(start)
+    clock_module.install(clock)
+    clock_module.tick_hooks.append(machine.deliver_pulses)
+    greenhouse = Greenhouse(clock, **model)
+    endpoints = endpoints_module.Endpoints(latency=latency)
+    endpoints.start()
+
+
+def press(pin, at, duration=0.2):
+    """Hold button `pin` down from `at` seconds into the run for `duration`."""
+    presses.setdefault(pin, []).append((at, at + duration))
+
+
+def shutdown():
+    if endpoints is not None:
+        endpoints.stop()
@@ -0,0 +1,240 @@
+import uasyncio as asyncio
+import ujson
+
+# Idle keep-alive connections: (host, port, ssl) -> (reader, writer)
+_idle = {}
+
+# Connections opened and requests sent, for the diagnostics
+opened = 0
+sent = 0
+
+# Largest read from the socket, so a streamed body is never held whole
+PIECE = 256
+
+
+class _Stale(OSError):
+    """The connection failed before any of the response arrived."""
+
+
+class Response:
+    """
+    A finished response; the same attributes as urequests' Response
+    that the firmware uses. The body has already been read.
+    """
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return ujson.loads(self.content)
+
+    def close(self):
+        pass
+
+
+def split_url(url):
+    """'https://host:port/path' -> (host, port, ssl, path)."""
+    scheme, _, rest = url.partition("://")
+    ssl = scheme == "https"
+    host, slash, path = rest.partition("/")
+    path = slash + path if slash else "/"
+    port = 443 if ssl else 80
+    if ":" in host:
+        host, port = host.split(":")
+        port = int(port)
+    return host, port, ssl, path
+
+
+async def _open(key, timeout):
+    global opened
+    host, port, ssl = key
+    # ssl=None rather than False, which not every uasyncio accepts
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=True if ssl else None), timeout
+        )
+    except asyncio.TimeoutError:
+        raise OSError(f"{host}: connect timed out")
+    opened += 1
+    return reader, writer
+
+
+async def _close(writer):
+    try:
+        writer.close()
+        await writer.wait_closed()
+    except Exception:
+        pass
+
+
+async def _readline(reader, timeout):
+    line = await asyncio.wait_for(reader.readline(), timeout)
+    if not line:
+        raise OSError("connection closed")
+    return line
+
+
+async def _read_exactly(reader, size, timeout, out):
+    while size > 0:
+        part = await asyncio.wait_for(reader.read(min(size, PIECE)), timeout)
+        if not part:
+            raise OSError("connection closed")
+        out(part)
+        size -= len(part)
+
+
+async def _read_body(reader, headers, timeout, out):
+    """
+    Pass the body to `out` in pieces of at most PIECE bytes. Returns
+    whether the connection may be reused after it.
+    """
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await _readline(reader, timeout)).split(b";")[0].strip(), 16)
+            if size == 0:
+                # Trailers, up to the blank line
+                while (await _readline(reader, timeout)).strip():
+                    pass
+                return True
+            await _read_exactly(reader, size, timeout, out)
+            await _readline(reader, timeout)
+
+    length = headers.get("content-length")
+    if length is not None:
+        await _read_exactly(reader, int(length), timeout, out)
+        return True
+
+    # No length: the body runs to the end of the connection
+    while True:
+        part = await asyncio.wait_for(reader.read(PIECE), timeout)
+        if not part:
+            return False
+        out(part)
+
+
+async def _exchange(reader, writer, head, body, timeout, sink):
+    # Up to the status line, a reset or EOF means nothing was answered,
+    # so the request may be sent again
+    try:
+        writer.write(head)
+        if body:
+            writer.write(body)
+        await asyncio.wait_for(writer.drain(), timeout)
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+    except asyncio.TimeoutError:
+        raise
+    except OSError as e:
+        raise _Stale(f"connection lost: {e}")
+    if not status_line:
+        raise _Stale("connection closed")
+    version, status = status_line.split(None, 2)[:2]
+    headers = {}
+    while True:
+        line = await _readline(reader, timeout)
+        if line in (b"\r\n", b"\n"):
+            break
+        name, _, value = line.decode().partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    status = int(status)
+    parts = []
+    if status in (204, 304) or 100 <= status < 200:
+        reusable = True
+    elif sink is not None and 200 <= status < 300:
+        reusable = await _read_body(reader, headers, timeout, sink)
+    else:
+        reusable = await _read_body(reader, headers, timeout, parts.append)
+    content = b"".join(parts)
+
+    connection = headers.get("connection", "").lower()
+    if connection == "close" or (version == b"HTTP/1.0" and connection != "keep-alive"):
+        reusable = False
+    return Response(status, headers, content), reusable
+
+
+async def request(method, url, data=None, json=None, headers=None, timeout=10, sink=None):
+    """
+    One HTTP/1.1 request without blocking the event loop. `timeout` (in
+    seconds) bounds the connect and each read. Connections are kept
+    open per host and reused by the next request to it.
+
+    With `sink`, a successful (2xx) response's body is passed to
+    `sink(piece)` as it arrives instead of being kept in `content`.
+    """
+    global sent
+    host, port, ssl, path = split_url(url)
+    key = (host, port, ssl)
+
+    if json is not None:
+        data = ujson.dumps(json)
+        headers = dict(headers or {})
+        headers["Content-Type"] = "application/json"
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}", "Connection: keep-alive"]
+    for name, value in (headers or {}).items():
+        lines.append(f"{name}: {value}")
+    if data:
+        lines.append(f"Content-Length: {len(data)}")
+    head = ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+    conn = _idle.pop(key, None)
+    reused = conn is not None
+    if conn is None:
+        conn = await _open(key, timeout)
+
+    while True:
+        reader, writer = conn
+        try:
+            response, reusable = await _exchange(reader, writer, head, data, timeout, sink)
+            break
+        except _Stale:
+            await _close(writer)
+            if not reused:
+                raise
+            # The server dropped the idle connection; try once on a new one
+            reused = False
+            conn = await _open(key, timeout)
+        except asyncio.TimeoutError:
+            await _close(writer)
+            raise OSError(f"{host}: timed out")
+        except asyncio.CancelledError:
+            # e.g. the caller's timeout: don't leave the socket open
+            writer.close()
+            raise
+        except Exception:
+            # Including errors from `sink`; the request is not sent again
+            await _close(writer)
+            raise
+
+    sent += 1
+    if reusable:
+        old = _idle.pop(key, None)
+        if old is not None:
+            await _close(old[1])
+        _idle[key] = conn
+    else:
+        await _close(writer)
+    return response
+
+
+async def get(url, **kw):
+    return await request("GET", url, **kw)
+
+
+async def post(url, **kw):
+    return await request("POST", url, **kw)
+
+
+async def close_all():
+    """Drop every idle connection, e.g. after Wi-Fi came back."""
+    while _idle:
+        _, (reader, writer) = _idle.popitem()
+        await _close(writer)
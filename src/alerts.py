@@ -1,51 +1,221 @@
-import urequests
-import ujson
+import uasyncio as asyncio
 import time
+
+import monitor
 from logging import system_log
+from notify import notifier
+from state import state
+
+# Built-in rules; config.json "alert_rules" entries replace the one of the
+# same name, add new ones, or turn one off with "enabled": false.
+# channel is a state field; op one of > >= < <=. The alert clears once
+# the value is `hysteresis` back past the threshold, fires only after
+# the condition has held for `for` seconds, again every `repeat` seconds
+# while it holds (if set), and never within `cooldown` seconds of the
+# last time. `log` and `notify` are templates for the system log and a
+# notification, with {value}, {threshold} and {name}.
+DEFAULT_RULES = (
+    {
+        "name": "high_temp_warning", "channel": "temp_celc_current", "op": ">", "threshold": 30,
+        "hysteresis": 1, "log": "High temperature alert! {value:.1f}°C",
+    },
+    {
+        "name": "low_temp_warning", "channel": "temp_celc_current", "op": "<", "threshold": 5,
+        "hysteresis": 1, "log": "Low temperature warning! {value:.1f}°C",
+    },
+    {
+        "name": "high_temp", "channel": "temp_celc_current", "op": ">", "threshold": 40,
+        "hysteresis": 2, "repeat": 3600, "cooldown": 3600,
+        "log": "Temperature Alert Message Queued",
+        "notify": (
+            "Hey Clare!\n\n"
+            "RED ALERT! It's bloody cooking in here... 🥵 {value:.1f}°C!\n\n"
+            "Remove those plant babies"
+        ),
+    },
+    {
+        # Sampled on every forecast fetch, so it repeats each day it holds
+        "name": "chilly_night", "channel": "temp_at_sunrise", "op": "<", "threshold": 15,
+        "repeat": 6 * 3600,
+        "notify": (
+            "Hey Clare!\n\n"
+            "It's going to be chilly tonight... {value:.1f}°C 🥶\n"
+            "Best put some blankets on those plant babies!"
+        ),
+    },
+)
+
+OPS = {
+    ">": lambda value, limit: value > limit,
+    ">=": lambda value, limit: value >= limit,
+    "<": lambda value, limit: value < limit,
+    "<=": lambda value, limit: value <= limit,
+}
+
+
+class Rule:
+    """One compiled alert rule and where it stands."""
+    __slots__ = (
+        "name", "channel", "compare", "threshold", "clear_at", "duration", "repeat", "cooldown",
+        "log", "notify", "active", "since", "fired_at", "fired", "suppressed",
+    )
+
+    def __init__(self, spec):
+        self.name = spec["name"]
+        self.channel = spec["channel"]
+        op = spec.get("op", ">")
+        if op not in OPS:
+            raise ValueError(f"rule {self.name}: unknown op {op}")
+        self.compare = OPS[op]
+        self.threshold = spec["threshold"]
+        hysteresis = spec.get("hysteresis", 0)
+        self.clear_at = self.threshold - hysteresis if op[0] == ">" else self.threshold + hysteresis
+        self.duration = spec.get("for", 0)
+        self.repeat = spec.get("repeat")
+        self.cooldown = spec.get("cooldown", 0)
+        self.log = spec.get("log")
+        self.notify = spec.get("notify")
+        self.active = False
+        self.since = None
+        self.fired_at = None
+        self.fired = 0
+        self.suppressed = 0
+
+    def check(self, value, now):
+        """Update with a new sample; True if the rule fires now."""
+        if not self.active:
+            if not self.compare(value, self.threshold):
+                self.since = None
+                return False
+            if self.since is None:
+                self.since = now
+            if now - self.since < self.duration:
+                return False
+            self.active = True
+        elif not self.compare(value, self.clear_at):
+            self.active = False
+            self.since = None
+            return False
+        elif self.repeat is None or now - self.fired_at < self.repeat:
+            return False
+
+        if self.fired_at is not None and now - self.fired_at < self.cooldown:
+            self.suppressed += 1
+            # Counts as fired for `repeat`, so it is not retried every sample
+            if self.repeat is not None:
+                self.fired_at = now
+            return False
+        self.fired_at = now
+        self.fired += 1
+        return True
+
+    def fire(self, value):
+        fields = {"value": value, "threshold": self.threshold, "name": self.name}
+        if self.log:
+            text = self.log.format(**fields)
+            print(text)
+            system_log(text)
+        if self.notify:
+            # A newer one replaces a copy not yet sent
+            notifier.send(self.notify.format(**fields), key=self.name)
+
+
+class AlertEngine:
+    """
+    The alert rules, compiled into a table of the rules on each state
+    channel. A change to a channel queues it, and run() checks only that
+    channel's rules against the new value, so a sample costs the rules
+    on its own channel whatever the number of rules in all.
+    """
 
-# Global variables to track alerts
-last_high_temp_alert_time = 0
-alert_cooldown = 3600  # seconds (1 hour cooldown)
-
-def high_temp_alert(temp_celc_current, temp_celc_outside_current, roof_open, fan_on):
-    global last_high_temp_alert_time
-    current_struct = time.localtime()
-    current_time = time.mktime(current_struct)  # convert to seconds
-
-    # Only trigger if conditions met AND cooldown passed
-    if temp_celc_current > 40:
-        if current_time - last_high_temp_alert_time > alert_cooldown:
-            MESSAGE = (
-                f"Hey Clare!\n\n"
-                f"RED ALERT! It's bloody cooking in here... 🥵 {temp_celc_current}°C!\n\n"
-                "Remove those plant babies"
-            )
+    def __init__(self):
+        self.table = {}
+        self.pending = []
+        self.wake = asyncio.Event()
+        self.reported = None
+
+    def load(self, overrides=None):
+        """
+        Compile DEFAULT_RULES with `overrides` (a list of rule dicts)
+        applied by name, and start watching their channels. Call once.
+        """
+        specs = {spec["name"]: spec for spec in DEFAULT_RULES}
+        for spec in overrides or ():
+            merged = dict(specs.get(spec["name"], {}))
+            merged.update(spec)
+            specs[spec["name"]] = merged
+        table = {}
+        for spec in specs.values():
+            if not spec.get("enabled", True):
+                continue
             try:
-                response = urequests.post(
-                    "https://ntfy.sh/charitylane_greenhouse",
-                    data=MESSAGE.encode("utf-8"),
-                    headers={"Content-Type": "text/plain"},
-                )
-                response.close()
+                rule = Rule(spec)
+                getattr(state, rule.channel)
             except Exception as e:
-                print("Error sending high_temp notification:", e)
-                system_log(f"Error sending high_temp notification: {e}")
+                print(f"Alert rule {spec.get('name')} skipped: {e}")
+                system_log(f"Alert rule {spec.get('name')} skipped: {e}")
+                continue
+            table.setdefault(rule.channel, []).append(rule)
+        self.table = {channel: tuple(rules) for channel, rules in table.items()}
+        state.subscribe(tuple(self.table), self.changed)
+        count = sum(len(rules) for rules in self.table.values())
+        print(f"{count} alert rules on {len(self.table)} channels")
+        system_log(f"{count} alert rules on {len(self.table)} channels: {', '.join(self.table)}")
 
-            print("Temperature Alert Message Sent")
-            system_log("Temperature Alert Message Sent")
-            last_high_temp_alert_time = current_time
+    def changed(self, names):
+        for name in names:
+            if name in self.table:
+                self.sample(name)
 
-def goodnight_message():
-    MESSAGE = ("Goodnight!")
-    try:
-        response = urequests.post(
-            "https://ntfy.sh/charitylane_greenhouse",
-            data=MESSAGE.encode("utf-8"),
-            headers={"Content-Type": "text/plain"},
-        )
-        response.close()
-    except Exception as e:
-        print("Error sending notification:", e)
-    
-    return
+    def sample(self, channel):
+        """Queue `channel` for checking, e.g. after a fetch that left its value unchanged."""
+        if channel not in self.pending:
+            self.pending.append(channel)
+        self.wake.set()
+
+    def check(self, channel, now):
+        value = getattr(state, channel)
+        if value is None:
+            return
+        for rule in self.table.get(channel, ()):
+            if rule.check(value, now):
+                rule.fire(value)
+
+    async def run(self):
+        """Supervisor task: checks each queued channel's rules."""
+        probe = monitor.probe("alerts")
+        while True:
+            await probe.wait(self.wake)
+            self.wake.clear()
+            try:
+                now = time.time()
+                while self.pending:
+                    self.check(self.pending.pop(0), now)
+                state.clear_error("alerts")
+            except Exception as e:
+                print(f"Alert check failed: {e}")
+                system_log(f"Alert check failed: {e}")
+                state.add_error("alerts", e)
+                await probe.sleep(1)
 
+    async def report(self):
+        """
+        Hourly line in the system log: rules that fired or were held back,
+        left out if unchanged since the last.
+        """
+        parts = []
+        for rules in self.table.values():
+            for rule in rules:
+                if rule.fired or rule.suppressed or rule.active:
+                    parts.append(f"{rule.name}:{rule.fired}/{rule.suppressed}{'!' if rule.active else ''}")
+        text = " ".join(parts)
+        if text and text != self.reported:
+            self.reported = text
+            system_log(f"Alerts: {text}")
+
+
+engine = AlertEngine()
+
+
+def goodnight_message():
+    notifier.send("Goodnight!", key="goodnight")
@@ -4,36 +4,40 @@ import time
 import utime
 import machine
 
+import ahttp
+import forecast_cache
+import sun
 from actuators import actuator_logic
-from alerts import high_temp_alert, goodnight_message
-from breakout_ltr559 import BreakoutLTR559
-from led import red_led_on, red_led_off, green_led_on, green_led_off
+from alerts import engine as alert_engine, goodnight_message
+from led import red_led_on, red_led_off, green_led_on, green_led_off, blue_led_on, blue_led_off
 from logging import system_log, log
 from moisture import water_me
+from notify import notifier
 from motors import move_roof
 from sensors import sensor
 from stats import average, low, high
-from utils import get_local_time, seconds_until
+from utils import get_local_time, offset_seconds
 from weather import (
     get_weather_data,
-    get_sunrise_hour,
-    get_sunrise_time,
-    get_sunset_time,
-    get_temperature_at_hour,
-    weather_message,
+    apply_forecast,
     api_url_gen,
+    log_forecast,
 )
-from screen import (
-    screen_temperature_inside,
-    screen_temperature_outside,
-    screen_humidity,
-    screen_actuations,
-)
-import state
+from layout import render_page, polled, watched
+from scheduler import scheduler
+from errors import errors
+import monitor
+import trends
+from state import state
+
+# Readings since the last batch was handed to cloud_upload
+_samples = 0
 
 async def goodnight_routine(goodnight):
+    """Runs when state.is_night changes; `goodnight` is state.event("is_night")."""
+    probe = monitor.probe("goodnight_routine")
     while True:
-        await goodnight.wait()
+        await probe.wait(goodnight)
         goodnight.clear()
         try:
             current_timestamp = time.mktime(time.localtime())
@@ -52,71 +56,51 @@ async def goodnight_routine(goodnight):
         except Exception as e:
             print(f"Goodnight routine error: {e}")
             system_log(f"Goodnight routine error: {e}")
-            state.add_error("goodnight_routine")
+            state.add_error("goodnight_routine", e)
             # optional: short sleep to prevent tight error loop
-            await asyncio.sleep(1)
-
-async def temperature_alert(temp_alert, goodnight):
-    while True:
-        await temp_alert.wait()
-        temp_alert.clear()
-
-        try:
-            if state.temp_celc_current is not None:
-                if state.temp_celc_current > 30:  # High temperature threshold
-                    print(f"High temperature alert! {state.temp_celc_current}°C")
-                    system_log(f"High temperature alert! {state.temp_celc_current}°C")
-                    await high_temp_alert(state.temp_celc_current)
-                elif state.temp_celc_current < 5:  # Low temperature threshold
-                    print(f"Low temperature warning! {state.temp_celc_current}°C")
-                    system_log(f"Low temperature warning! {state.temp_celc_current}°C")
-            
-            # Clear error if everything went fine
-            state.clear_error("temperature_alert")
-
-        except Exception as e:
-            print(f"Temperature alert failed: {e}")
-            system_log(f"Temperature alert failed: {e}")
-            state.add_error("temperature_alert")
-
-        await asyncio.sleep(1)
-
-
-async def sensor_log(csv_complete, actuator_update):
-    while True:
-        for _ in range(state.cloud_upload_interval):
-            try:
-                (
-                    state.temp_celc_current,
-                    state.rh_current,
-                    state.temp_celc_outside_current,
-                    state.lux_current,
-                    moisture_value,
-                ) = await sensor()
-                log(
-                    state.temp_celc_current,
-                    state.rh_current,
-                    state.temp_celc_outside_current,
-                    state.lux_current,
-                    state.roof_open,
-                    state.fan_on,
-                    state.heat_pad_on,
-                    state.cover_on,
-                    state.is_night,
-                )
-                state.clear_error("sensor_log")
-            except Exception as e:
-                print("Sensor log error:", e)
-                system_log(f"Sensor log error: {e}")
-                state.add_error("sensor_log")
-            await asyncio.sleep(state.record_interval)
-
+            await probe.sleep(1)
+
+async def sensor_log(csv_complete):
+    """One reading every record_interval; a batch is cloud_upload_interval readings."""
+    global _samples
+    try:
+        reading = await sensor()
+        with state.batch():
+            (
+                state.temp_celc_current,
+                state.rh_current,
+                state.temp_celc_outside_current,
+                state.lux_current,
+                moisture_value,
+            ) = reading
+        log(
+            state.temp_celc_current,
+            state.rh_current,
+            state.temp_celc_outside_current,
+            state.lux_current,
+            state.roof_open,
+            state.fan_on,
+            state.heat_pad_on,
+            state.cover_on,
+            state.is_night,
+        )
+        trends.record(state)
+        state.clear_error("sensor_log")
+    except Exception as e:
+        print("Sensor log error:", e)
+        system_log(f"Sensor log error: {e}")
+        state.add_error("sensor_log", e)
+
+    _samples += 1
+    if _samples >= state.cloud_upload_interval:
+        _samples = 0
         csv_complete.set()
 
 
 async def cloud_upload(csv_complete, actuator_update):
+    probe = monitor.probe("cloud_upload")
     while True:
-        await csv_complete.wait()
+        await probe.wait(csv_complete)
         try:
             print("Uploading CSV to cloud...")
             system_log("Uploading CSV to cloud...")
@@ -134,222 +118,130 @@ async def cloud_upload(csv_complete, actuator_update):
         except Exception as e:
             print(f"Cloud upload failed: {e}")
             system_log(f"Cloud upload failed: {e}")
-            state.add_error("cloud_upload")
-
-        await asyncio.sleep(1)
-
-
-async def temp_inside_display(display, button_a, button_b, button_x, button_y, BG, WHITE, ORANGE):
-    while True:
-        if button_a.read():
-            while button_a.read():
-                await asyncio.sleep(0.01)
-            await asyncio.sleep(0.05)
-
-            while True:
-                await screen_temperature_inside(
-                    display,
-                    BG,
-                    WHITE,
-                    ORANGE,
-                    state.temp_celc_current,
-                    state.temp_celc_average,
-                    state.temp_celc_low,
-                    state.temp_celc_high,
-                )
-
-                exit_pressed = False
-                for _ in range(100):
-                    if button_b.read() or button_x.read() or button_y.read():
-                        exit_pressed = True
-                        while button_b.read() or button_x.read() or button_y.read():
-                            await asyncio.sleep(0.01)
-                        await asyncio.sleep(0.05)
-                        break
-                    await asyncio.sleep(0.1)
-
-                if exit_pressed:
-                    break
-        else:
-            await asyncio.sleep(0.1)
-
-
-async def temp_outside_display(display, button_a, button_b, button_x, button_y, BG, WHITE, ORANGE):
-    while True:
-        if button_b.read():
-            while button_b.read():
-                await asyncio.sleep(0.01)
-            await asyncio.sleep(0.05)
-
-            while True:
-                await screen_temperature_outside(
-                    display,
-                    BG,
-                    WHITE,
-                    ORANGE,
-                    state.temp_celc_outside_current,
-                    state.temp_celc_outside_average,
-                    state.temp_celc_outside_low,
-                    state.temp_celc_outside_high,
-                )
-
-                exit_pressed = False
-                for _ in range(100):
-                    if button_a.read() or button_x.read() or button_y.read():
-                        exit_pressed = True
-                        while button_a.read() or button_x.read() or button_y.read():
-                            await asyncio.sleep(0.01)
-                        await asyncio.sleep(0.05)
-                        break
-                    await asyncio.sleep(0.1)
-
-                if exit_pressed:
+            state.add_error("cloud_upload", e)
+
+        await probe.sleep(1)
+
+
+async def page_display(display, buttons, BG, WHITE, ORANGE, refresh=10):
+    """
+    Shows the page for the last button pressed. `buttons` is a sequence
+    of (button, page names); pressing a button again steps through its
+    pages. The page is redrawn when one of the state fields it shows
+    changes; pages showing values from outside the state are also
+    refreshed every `refresh` seconds.
+    """
+    probe = monitor.probe("page_display")
+    page = None
+    ticks = 0
+    redraw = False
+    changed = asyncio.Event()
+
+    def on_change(names):
+        changed.set()
+
+    try:
+        while True:
+            for button, names in buttons:
+                if button.read():
+                    while button.read():
+                        await asyncio.sleep(0.01)
+                    await asyncio.sleep(0.05)
+                    if page in names:
+                        page = names[(names.index(page) + 1) % len(names)]
+                    else:
+                        page = names[0]
+                    # Watch only what the new page shows
+                    state.unsubscribe(on_change)
+                    keys = watched(page)
+                    if keys:
+                        state.subscribe(keys, on_change)
+                    ticks = 0
+                    redraw = True
                     break
-        else:
-            await asyncio.sleep(0.1)
-
-
-async def humidity_display(display, button_a, button_b, button_x, button_y, BG, WHITE, ORANGE):
-    while True:
-        if button_x.read():
-            while button_x.read():
-                await asyncio.sleep(0.01)
-            await asyncio.sleep(0.05)
-
-            while True:
-                await screen_humidity(
-                    display,
-                    BG,
-                    WHITE,
-                    ORANGE,
-                    state.rh_current,
-                    state.rh_average,
-                    state.rh_low,
-                    state.rh_high,
-                )
-
-                exit_pressed = False
-                for _ in range(100):
-                    if button_a.read() or button_b.read() or button_y.read():
-                        exit_pressed = True
-                        while button_a.read() or button_b.read() or button_y.read():
-                            await asyncio.sleep(0.01)
-                        await asyncio.sleep(0.05)
-                        break
-                    await asyncio.sleep(0.1)
-
-                if exit_pressed:
-                    break
-        else:
-            await asyncio.sleep(0.1)
-
 
-async def actuations_display(display, button_a, button_b, button_x, button_y, BG, WHITE, ORANGE):
-    while True:
-        if button_y.read():
-            while button_y.read():
-                await asyncio.sleep(0.01)
-            await asyncio.sleep(0.05)
-
-            while True:
-                error_count = state.error_total()
-                await screen_actuations(
-                    display,
-                    BG,
-                    WHITE,
-                    ORANGE,
-                    state.fan_on,
-                    state.roof_open,
-                    state.heat_pad_on,
-                    error_count,
-                )
-
-                exit_pressed = False
-                for _ in range(100):
-                    if button_a.read() or button_b.read() or button_x.read():
-                        exit_pressed = True
-                        while button_a.read() or button_b.read() or button_x.read():
-                            await asyncio.sleep(0.01)
-                        await asyncio.sleep(0.05)
-                        break
-                    await asyncio.sleep(0.1)
-
-                if exit_pressed:
-                    break
-        else:
-            await asyncio.sleep(0.1)
+            if page is not None and (redraw or changed.is_set() or (ticks == 0 and polled(page))):
+                changed.clear()
+                redraw = False
+                render_page(display, page, BG, WHITE, ORANGE)
+            ticks = (ticks + 1) % (refresh * 10)
+            await probe.sleep(0.1)
+    finally:
+        # A restarted task subscribes afresh
+        state.unsubscribe(on_change)
 
 
-async def actuators(actuator_update, temp_alert):
+async def actuators(actuator_update):
     temp_setpoint_low = 15
     temp_setpoint_high = 25
     rh_setpoint_low = 40
     rh_setpoint_high = 70
 
-    prev_temp = None
-    prev_rh = None
-    prev_roof = 0
+    # The roof is where the state (restored from a snapshot) says it is
+    prev_roof = state.roof_open
     last_change_time = None
     hold_time = 1
 
-    state.roof_open = 0
-    state.fan_on = False
-    state.heat_pad_on = False
+    moisture_current = None
+    probe = monitor.probe("actuators")
 
     while True:
-        await actuator_update.wait()
+        await probe.wait(actuator_update)
         actuator_update.clear()
 
         try:
-            (
-                state.temp_celc_current,
-                state.rh_current,
-                state.temp_celc_outside_current,
-                state.lux_current,
-                moisture_current,
-            ) = await sensor()
+            reading = await sensor()
+            with state.batch():
+                (
+                    state.temp_celc_current,
+                    state.rh_current,
+                    state.temp_celc_outside_current,
+                    state.lux_current,
+                    moisture_current,
+                ) = reading
             state.clear_error("actuators")
         except Exception as e:
             print("Sensor log error (actuation):", e)
             system_log(f"Sensor log error (actuation): {e}")
-            state.add_error("actuators")
+            state.add_error("actuators", e)
 
-        (
-            prev_temp,
-            prev_rh,
-            prev_roof,
-            last_change_time,
-            state.roof_open,
-            state.fan_on,
-            state.heat_pad_on,
-            state.temp_celc_current,
-            state.rh_current,
-        ) = actuator_logic(
-            temp_setpoint_low,
-            temp_setpoint_high,
-            rh_setpoint_low,
-            rh_setpoint_high,
-            prev_temp,
-            prev_rh,
-            prev_roof,
-            last_change_time,
-            state.roof_open,
-            state.fan_on,
-            state.heat_pad_on,
-            state.temp_celc_current,
-            state.rh_current,
-            state.is_night,
-        )
+        with state.batch():
+            (
+                state.prev_temp,
+                state.prev_rh,
+                prev_roof,
+                last_change_time,
+                state.roof_open,
+                state.fan_on,
+                state.heat_pad_on,
+                state.temp_celc_current,
+                state.rh_current,
+            ) = actuator_logic(
+                temp_setpoint_low,
+                temp_setpoint_high,
+                rh_setpoint_low,
+                rh_setpoint_high,
+                state.prev_temp,
+                state.prev_rh,
+                prev_roof,
+                last_change_time,
+                state.roof_open,
+                state.fan_on,
+                state.heat_pad_on,
+                state.temp_celc_current,
+                state.rh_current,
+                state.is_night,
+            )
 
-        if state.cover_on:
-            if state.roof_open != 0 or state.fan_on:
-                state.roof_open = 0
-                state.fan_on = False
-                system_log("Cover detected: forced roof closed and fan off")
+            if state.cover_on:
+                if state.roof_open != 0 or state.fan_on:
+                    state.roof_open = 0
+                    state.fan_on = False
+                    system_log("Cover detected: forced roof closed and fan off")
 
         move_roof(prev_roof, state.roof_open)
 
-        water_me = water_me(moisture_current, state.water_me_threshold)
+        needs_water = moisture_current is not None and water_me(moisture_current, state.water_me_threshold)
         
         if state.fan_on:
             green_led_on()
@@ -361,149 +253,126 @@ async def actuators(actuator_update, temp_alert):
         else:
             red_led_off()
         
-        if water_me:
+        if needs_water:
             blue_led_on()
         else:
             blue_led_off()
 
         print(f"roof open: {state.roof_open}, fan on: {state.fan_on}, heat pad on: {state.heat_pad_on}")
-        temp_alert.set()
-        await asyncio.sleep(hold_time)
+        await probe.sleep(hold_time)
 
 
 async def weather_check():
-    await asyncio.sleep(seconds_until(3))
-
-    while True:
-        try:
-            api_url = api_url_gen(state.latitude, state.longitude, state.timezone)
-            data = get_weather_data(api_url)
-
-            year, month, day, *_ = state.rtc.datetime()
-            date = "{:04d}-{:02d}-{:02d}".format(year, month, day)
-
-            if data:
-                state.sunrise_hour = str(get_sunrise_hour(data))
-                state.sunrise_time = get_sunrise_time(data)
-                temp_at_sunrise = get_temperature_at_hour(data, state.sunrise_hour)
-                state.temp_at_sunrise = float(temp_at_sunrise) if temp_at_sunrise is not None else None
-
-                if state.temp_at_sunrise is not None:
-                    print(
-                        f"Weather data acquired. Sunrise is at {state.sunrise_time} on {date}. "
-                        f"Temperature at sunrise is {state.temp_at_sunrise}°C"
-                    )
-                    system_log(
-                        f"Weather data acquired. Sunrise is at {state.sunrise_time} on {date}. "
-                        f"Temperature at sunrise is {state.temp_at_sunrise}°C"
-                    )
-                    weather_message(15, state.temp_at_sunrise)
-
-                    sunset_timestamp = get_sunset_time(data)
-                    state.sunset_time = int(sunset_timestamp) if sunset_timestamp is not None else None
-
-                    if state.sunset_time:
-                        sunset_struct = utime.localtime(state.sunset_time)
-                        year, month, day, hour, minute, second, weekday, yearday = sunset_struct
-                        system_log(f"Sunset time is {hour}:{minute} on {date}")
-
-                state.clear_error("weather_check")
+    try:
+        api_url = api_url_gen(state.latitude, state.longitude, state.timezone)
+        forecast = await get_weather_data(api_url, state.forecast)
+        now = time.time()
+
+        if forecast:
+            day, date = apply_forecast(forecast, now)
+            state.weather_fetched_at = now
+            forecast_cache.save(forecast, now)
+            log_forecast(forecast, day, date)
+            if state.temp_at_sunrise is not None:
+                # Checked against the alert rules even if unchanged since yesterday
+                alert_engine.sample("temp_at_sunrise")
+
+            state.clear_error("weather_check")
+            state.clear_error("start_weather_data")
+        else:
+            state.add_error("weather_check", "no data")
+            # One retry at a time, backing off from a minute up to the daily run
+            retry = scheduler.retry("weather_check", weather_check, 60, timeout=60)
+            if retry is None:
+                message = "Weather API failed; trying again at the daily check"
             else:
-                print("Weather API failed; retrying in 60 seconds")
-                system_log("Weather API failed; retrying in 60 seconds")
-                state.add_error("weather_check")
-
-        except Exception as e:
-            print(f"Weather check error: {e}")
-            system_log(f"Weather check error: {e}")
-            state.add_error("weather_check")
-
-        await asyncio.sleep(seconds_until(3))
-
-
-async def cover_check(i2c):
-    ltr = BreakoutLTR559(i2c)
-    prev_is_night = None
-    prev_cover_on = None
-
-    while True:
-        try:
-            lux_records = []
-            for _ in range(4):
-                try:
+                message = f"Weather API failed; retrying in {(retry.due - scheduler.now()) // 1000} seconds"
+            print(message)
+            system_log(message)
+            # Until then, move the cached forecast on to today
+            if state.forecast is not None:
+                sunset_time = state.sunset_time
+                day, date = apply_forecast(state.forecast, now)
+                if state.sunset_time != sunset_time:
+                    print(f"Using cached forecast for {date}")
+                    system_log(f"Using cached forecast for {date}, sunrise at {state.sunrise_time}")
+
+    except Exception as e:
+        print(f"Weather check error: {e}")
+        system_log(f"Weather check error: {e}")
+        state.add_error("weather_check", e)
+
+
+async def cover_check():
+    try:
+        lux_records = []
+        for _ in range(4):
+            try:
+                reading = await sensor()
+                with state.batch():
                     (
                         state.temp_celc_current,
                         state.rh_current,
                         state.temp_celc_outside_current,
                         lux,
                         moisture_value,
-                    ) = await sensor()
-                    lux_records.append(lux)
-                    await asyncio.sleep(1)
-                    state.clear_error("cover_check")
-                except Exception as e:
-                    print("Lux sensor log error:", e)
-                    system_log(f"Lux sensor log error: {e}")
-                    state.add_error("cover_check")
-
-            dark = sum(lux_records) == 0
-            current_timestamp = time.mktime(time.localtime())
-
-            new_is_night = (current_timestamp > state.sunset_time) if state.sunset_time else dark
-            new_cover_on = dark and not new_is_night
-
-            if new_is_night != prev_is_night:
-                prev_is_night = new_is_night
-
-            if new_cover_on != prev_cover_on:
-                prev_cover_on = new_cover_on
+                    ) = reading
+                lux_records.append(lux)
+                await asyncio.sleep(1)
+                state.clear_error("cover_check")
+            except Exception as e:
+                print("Lux sensor log error:", e)
+                system_log(f"Lux sensor log error: {e}")
+                state.add_error("cover_check", e)
 
-            state.is_night = new_is_night
-            state.cover_on = new_cover_on
+        dark = sum(lux_records) == 0
+        current_timestamp = time.mktime(time.localtime())
 
-        except Exception as e:
-            print(f"Cover check failed: {e}")
-            system_log(f"Cover check failed: {e}")
-            state.add_error("cover_check")
+        with state.batch():
+            if state.latitude is not None and state.longitude is not None and state.utc_offset is not None:
+                # Worked out on the board from the location, no network needed
+                state.is_night = sun.is_night(state.latitude, state.longitude, current_timestamp - state.utc_offset)
+            else:
+                state.is_night = (current_timestamp > state.sunset_time) if state.sunset_time else dark
+            state.cover_on = dark and not state.is_night
 
-        await asyncio.sleep(30)
+    except Exception as e:
+        print(f"Cover check failed: {e}")
+        system_log(f"Cover check failed: {e}")
+        state.add_error("cover_check", e)
 
 
 async def clock_sync():
-    seconds_until_3am = seconds_until(3)
-    await asyncio.sleep(seconds_until_3am)
-
-    while True:
-        try:
-            t = await get_local_time(state.timezone)
-            struct_raw = t["struct_time"]
-            struct = tuple(int(x) for x in struct_raw[:6]) + (0, 0, -1)
+    try:
+        t = await get_local_time(state.timezone)
+        struct_raw = t["struct_time"]
+        struct = tuple(int(x) for x in struct_raw[:6]) + (0, 0, -1)
 
-            if not hasattr(state, "rtc") or state.rtc is None:
-                state.rtc = machine.RTC()
+        if not hasattr(state, "rtc") or state.rtc is None:
+            state.rtc = machine.RTC()
 
-            weekday = utime.localtime(time.mktime(struct))[6]
-            state.rtc.datetime(
-                (struct[0], struct[1], struct[2], weekday, struct[3], struct[4], struct[5], 0)
-            )
-
-            print("Clock synced")
-            system_log("Clock synced")
-            state.clear_error("clock_sync")
+        weekday = utime.localtime(time.mktime(struct))[6]
+        state.rtc.datetime(
+            (struct[0], struct[1], struct[2], weekday, struct[3], struct[4], struct[5], 0)
+        )
+        if struct[0] != 1970:
+            state.utc_offset = offset_seconds(t["offset"])
+            # Not cleared for the default time, so wifi_watch keeps retrying
             state.clear_error("start_clock_sync")
 
-        except Exception as e:
-            print("Clock sync failed:", e)
-            system_log(f"Clock sync failed: {e}")
-            state.add_error("clock_sync")
+        print("Clock synced")
+        system_log("Clock synced")
+        state.clear_error("clock_sync")
 
-        seconds_until_3am = seconds_until(3)
-        await asyncio.sleep(seconds_until_3am)
+    except Exception as e:
+        print("Clock sync failed:", e)
+        system_log(f"Clock sync failed: {e}")
+        state.add_error("clock_sync", e)
 
 
 async def stats_check():
-    while True:
-        try:
+    try:
+        with state.batch():
             state.temp_celc_average = average("temp_celc")
             state.temp_celc_outside_average = average("temp_celc_outside")
             state.rh_average = average("rh")
@@ -516,46 +385,53 @@ async def stats_check():
             state.temp_celc_outside_high = high("temp_celc_outside")
             state.rh_high = high("rh")
 
-            state.clear_error("stats_check")
-        except Exception as e:
-            print("Stats calcs failed:", e)
-            system_log(f"Stats calcs failed: {e}")
-            state.add_error("stats_check")
+        state.clear_error("stats_check")
+    except Exception as e:
+        print("Stats calcs failed:", e)
+        system_log(f"Stats calcs failed: {e}")
+        state.add_error("stats_check", e)
 
-        await asyncio.sleep(10)
-        
 
-async def wifi_watch(ssid, password, check_interval=10):
-    """Periodically checks Wi-Fi connection and reconnects if dropped."""
+async def wifi_watch(ssid, password):
+    """Checks the Wi-Fi connection and reconnects if it dropped."""
     wlan = network.WLAN(network.STA_IF)
     wlan.active(True)
 
-    while True:
-        try:
-            if not wlan.isconnected():
-                print("Wi-Fi disconnected. Attempting reconnect...")
-                system_log("Wi-Fi disconnected. Attempting reconnect...")
-                wlan.connect(ssid, password)
-
-                retry_count = 0
-                while not wlan.isconnected() and retry_count < 5:
-                    await asyncio.sleep(2)
-                    retry_count += 1
-
-                if wlan.isconnected():
-                    print("Wi-Fi reconnected")
-                    system_log("Wi-Fi reconnected")
-                else:
-                    print("Wi-Fi reconnect failed")
-                    system_log("Wi-Fi reconnect failed")
-
-            # Clear any previous errors for Wi-Fi
-            state.clear_error("wifi_watch")
-
-        except Exception as e:
-            print(f"Wi-Fi watch error: {e}")
-            system_log(f"Wi-Fi watch error: {e}")
-            state.add_error("wifi_watch")
-
-        await asyncio.sleep(check_interval)
-
+    try:
+        if not wlan.isconnected():
+            print("Wi-Fi disconnected. Attempting reconnect...")
+            system_log("Wi-Fi disconnected. Attempting reconnect...")
+            # Kept-alive connections did not survive the drop
+            await ahttp.close_all()
+            wlan.connect(ssid, password)
+
+            retry_count = 0
+            while not wlan.isconnected() and retry_count < 5:
+                await asyncio.sleep(2)
+                retry_count += 1
+
+            if wlan.isconnected():
+                print("Wi-Fi reconnected")
+                system_log("Wi-Fi reconnected")
+                # Send anything queued while offline now, not after the backoff
+                notifier.retry_now()
+            else:
+                print("Wi-Fi reconnect failed")
+                system_log("Wi-Fi reconnect failed")
+
+        if wlan.isconnected():
+            state.clear_error("connect_wifi")
+            # Start-up steps that failed (see start_up) are tried again
+            # once online, rather than at their daily runs
+            if errors.failing("start_clock_sync"):
+                scheduler.retry("clock_sync", clock_sync, 10, timeout=60)
+            if errors.failing("start_weather_data"):
+                scheduler.retry("weather_check", weather_check, 20, timeout=60)
+
+        # Clear any previous errors for Wi-Fi
+        state.clear_error("wifi_watch")
+
+    except Exception as e:
+        print(f"Wi-Fi watch error: {e}")
+        system_log(f"Wi-Fi watch error: {e}")
+        state.add_error("wifi_watch", e)
@@ -3,19 +3,20 @@ import network
 import time
 import utime
 import machine
-import state
-from location import get_location, get_timezone
+import bootprof
+import forecast_cache
+from alerts import engine as alert_engine
+from state import state
+from location import get_geo
 from logging import system_log
 from weather import (
     get_weather_data,
-    get_sunrise_hour,
-    get_sunrise_time,
-    get_sunset_time,
-    get_temperature_at_hour,
-    weather_message,
+    apply_forecast,
+    forecast_day,
     api_url_gen,
+    log_forecast,
 )
-from utils import get_local_time, load_config
+from utils import get_local_time, load_config, offset_seconds
 
 async def connect_wifi():
     config = load_config()
@@ -45,10 +46,12 @@ async def start_clock_sync(api_retries=3, delay=0.2):
     Sync Pi RTC at startup.
     """
     t = await get_local_time(state.timezone)
-    struct = t["struct_time"][:8]
+    struct = tuple(int(x) for x in t["struct_time"][:6])
+    weekday = utime.localtime(time.mktime(struct + (0, 0, -1)))[6]
 
+    # RTC order is (year, month, day, weekday, hours, minutes, seconds, subseconds)
     rtc = machine.RTC()
-    rtc.datetime(tuple(int(x) for x in struct))
+    rtc.datetime((struct[0], struct[1], struct[2], weekday, struct[3], struct[4], struct[5], 0))
     state.rtc = rtc
     
     year, month, day, *_ = state.rtc.datetime()
@@ -57,82 +60,59 @@ async def start_clock_sync(api_retries=3, delay=0.2):
     if year == 1970:
         print("Clock sync returned default time")
         system_log("Clock sync returned default timer")
-        state.add_error("start_clock_sync")
+        state.add_error("start_clock_sync", "default time")
         return rtc
 
+    state.utc_offset = offset_seconds(t["offset"])
     print("Clock synced at startup")
     system_log("Clock synced at startup")
     return rtc
 
 
-async def start_timezone(api_retries=3):
+async def start_geo(api_retries=3):
     for attempt in range(api_retries):
         try:
-            state.timezone = get_timezone()
-            print(f"Timezone acquired")
-            system_log(f"Timezone acquired")
-            return state.timezone
+            geo = await get_geo()
+            if geo is None:
+                raise ValueError("Geo-IP service returned no data")
+            timezone, latitude, longitude = geo
+            with state.batch():
+                state.timezone = timezone
+                state.latitude = latitude
+                state.longitude = longitude
+            print(f"Timezone and location acquired")
+            system_log(f"Timezone and location acquired")
+            return
         except Exception as e:
-            print(f"Attempt {attempt+1} to get timezone failed: {e}")
-            system_log(f"Attempt {attempt+1} to get timezone failed: {e}")
+            print(f"Attempt {attempt+1} to get timezone and location failed: {e}")
+            system_log(f"Attempt {attempt+1} to get timezone and location failed: {e}")
             await asyncio.sleep(2)
     else:
-        raise RuntimeError("Failed to get timezone after multiple attempts")
-
-async def start_location(api_retries=3):
-    for attempt in range(api_retries):
-        try:
-            state.latitude, state.longitude = get_location()
-            print(f"Location acquired")
-            system_log(f"Location acquired")
-            return state.latitude, state.longitude
-        except Exception as e:
-            print(f"Attempt {attempt+1} to get location failed: {e}")
-            system_log(f"Attempt {attempt+1} to get location failed: {e}")
-            await asyncio.sleep(2)
-    else:
-        raise RuntimeError("Failed to get location after multiple attempts")
+        raise RuntimeError("Failed to get timezone and location after multiple attempts")
 
 async def start_weather_data(api_retries=3):
     for attempt in range(api_retries):
         try:
             api_url = api_url_gen(state.latitude, state.longitude, state.timezone)
-            data = get_weather_data(api_url)
-            year, month, day, *_ = state.rtc.datetime()
-            date = f"{int(year):04d}-{int(month):02d}-{int(day):02d}"
-            if data is None:
+            forecast = await get_weather_data(api_url, state.forecast)
+            if forecast is None:
                 raise ValueError("Weather API returned no data")
+            if forecast.sunrise_temp(forecast_day(forecast, time.time())) is None:
+                raise ValueError("No temperature at sunrise")
+
+            # Assign to state. Before the clock is synced this is the
+            # forecast's first day
+            day, date = apply_forecast(forecast, time.time())
+            sunrise_time = state.sunrise_time
+            temp_at_sunrise = state.temp_at_sunrise
+            sunset_time = state.sunset_time
+
+            log_forecast(forecast, day, date)
 
-            # Type-safe assignments
-            sunrise_hour = str(get_sunrise_hour(data))
-            sunrise_time = str(get_sunrise_time(data))
-            temp_at_sunrise = float(get_temperature_at_hour(data, sunrise_hour))
-            sunset_time = int(get_sunset_time(data))  # timestamp
-
-            # Assign to state
-            state.sunrise_hour = sunrise_hour
-            state.sunrise_time = sunrise_time
-            state.temp_at_sunrise = temp_at_sunrise
-            state.sunset_time = sunset_time
-
-            print(
-                f"Weather data acquired. Sunrise at {sunrise_time} on {date}. "
-                f"Temperature at sunrise is {temp_at_sunrise}°C"
-            )
-            system_log(
-                f"Weather data acquired. Sunrise at {sunrise_time} on {date}. "
-                f"Temperature at sunrise is {temp_at_sunrise}°C"
-            )
-
-            # Send weather message
-            weather_message(15, temp_at_sunrise)
-
-            # Log sunset time
-            sunset_struct = utime.localtime(sunset_time)
-            year, month, day, hour, minute, second, weekday, yearday = sunset_struct
-            system_log(f"Sunset time is {int(hour)}:{int(minute)} on {date}")
-
-            return sunrise_hour, sunrise_time, temp_at_sunrise, sunset_time
+            # Chilly night message, by the alert rules
+            alert_engine.sample("temp_at_sunrise")
+
+            return state.sunrise_hour, sunrise_time, temp_at_sunrise, sunset_time
 
         except Exception as e:
             print(f"Attempt {attempt+1} to get weather data failed: {e}")
@@ -143,4 +123,137 @@ async def start_weather_data(api_retries=3):
         raise RuntimeError("Failed to get weather data after multiple attempts")
 
 
+# How long values kept from an earlier boot (see snapshot.py) are trusted, in seconds
+GEO_TTL = 7 * 24 * 3600
+WEATHER_TTL = 12 * 3600
+
+
+def is_fresh(fetched_at, ttl):
+    return fetched_at is not None and 0 <= time.time() - fetched_at < ttl
+
+
+async def run_steps(steps):
+    """
+    Run (name, coroutine function, names it needs) steps as a graph: each
+    starts as soon as the steps it needs are done, so independent ones
+    overlap. Each step's run time goes to the boot profile. Raises the
+    first failure.
+    """
+    done = {name: asyncio.Event() for name, _, _ in steps}
+
+    async def run(name, fn, needs):
+        for need in needs:
+            await done[need].wait()
+        start = bootprof.now()
+        await fn()
+        bootprof.span("  " + name, start)
+        done[name].set()
+
+    await asyncio.gather(*(run(name, fn, needs) for name, fn, needs in steps))
+
+
+async def refresh(name, fn, stamp):
+    try:
+        await fn()
+        setattr(state, stamp, time.time())
+        state.clear_error(name)
+    except Exception as e:
+        print(f"Background refresh of {name} failed: {e}")
+        system_log(f"Background refresh of {name} failed: {e}")
+        state.add_error(name, e)
+
+
+async def fetch_weather():
+    """start_weather_data for a background refresh; keeps the result on flash."""
+    await start_weather_data()
+    forecast_cache.save(state.forecast, time.time())
+
+
+async def start_up():
+    """
+    Network start-up. Wi-Fi comes first. Then one geo-IP call gives the
+    timezone and location. The clock sync (needs the timezone) and the
+    forecast (needs the location) run side by side after that.
+
+    A timezone and location restored from the snapshot, or a forecast
+    from the forecast cache (or failing that, the snapshot), is used as
+    is, so only Wi-Fi and the clock stand between a reboot and control.
+    Cached values older than their TTL are refreshed in the background
+    once the clock says how old they are.
+
+    With both cached, a failed Wi-Fi connection or clock sync is logged
+    and control starts anyway: wifi_watch reconnects and retries them.
+    """
+    cached_geo = state.timezone is not None and state.latitude is not None and state.longitude is not None
+    cached_weather = state.forecast is not None or (
+        state.sunset_time is not None and state.sunrise_hour is not None and state.temp_at_sunrise is not None
+    )
+
+    async def nothing():
+        pass
+
+    offline = False
+
+    async def wifi():
+        nonlocal offline
+        try:
+            await connect_wifi()
+        except Exception as e:
+            if not (cached_geo and cached_weather):
+                raise
+            offline = True
+            print(f"Wi-Fi failed, starting on cached values: {e}")
+            system_log(f"Wi-Fi failed, starting on cached values: {e}")
+            state.add_error("connect_wifi", e)
+
+    async def clock():
+        # Offline the sync would only set the clock to 1970
+        if offline:
+            state.add_error("start_clock_sync", "offline")
+            return
+        try:
+            await start_clock_sync()
+        except Exception as e:
+            if not (cached_geo and cached_weather):
+                raise
+            print(f"Clock sync failed, starting on cached values: {e}")
+            system_log(f"Clock sync failed, starting on cached values: {e}")
+            state.add_error("start_clock_sync", e)
+
+    await run_steps((
+        ("wifi", wifi, ()),
+        ("geo", nothing if cached_geo else start_geo, ("wifi",)),
+        ("clock", clock, ("geo",)),
+        ("weather", nothing if cached_weather else start_weather_data, ("geo",)),
+    ))
+
+    # Fetch times are only meaningful once the clock is right
+    now = time.time()
+    with state.batch():
+        if not cached_geo:
+            state.geo_fetched_at = now
+        if not cached_weather:
+            state.weather_fetched_at = now
+    if not cached_weather:
+        forecast_cache.save(state.forecast, now)
 
+    if cached_geo:
+        print("Timezone and location from snapshot")
+        system_log("Timezone and location from snapshot")
+        if not is_fresh(state.geo_fetched_at, GEO_TTL):
+            asyncio.create_task(refresh("start_geo", start_geo, "geo_fetched_at"))
+    if cached_weather:
+        fresh = is_fresh(state.weather_fetched_at, WEATHER_TTL)
+        if state.forecast is not None:
+            # Now the clock is right, take today's sunset and tomorrow's
+            # sunrise from the cached days
+            try:
+                apply_forecast(state.forecast, now)
+            except ValueError as e:
+                print(f"Cached forecast not used: {e}")
+                system_log(f"Cached forecast not used: {e}")
+                fresh = False
+        print("Weather data from cache")
+        system_log(f"Weather data from cache, sunrise at {state.sunrise_time}")
+        if not fresh:
+            asyncio.create_task(refresh("start_weather_data", fetch_weather, "weather_fetched_at"))
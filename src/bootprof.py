@@ -0,0 +1,68 @@
+import time
+
+from logging import system_log
+
+# ticks_ms() counts from power-on, so this is how long the firmware took
+# to reach main.py
+_t0 = time.ticks_ms()
+
+# (name, start, duration) in ms since power-on
+phases = [("power-on to main.py", 0, _t0)]
+_last = _t0
+
+PATH = "boot_report.txt"
+
+
+def now():
+    return time.ticks_ms()
+
+
+def mark(name):
+    """End phase `name` now; it started at the previous mark."""
+    global _last
+    t = now()
+    phases.append((name, _last, time.ticks_diff(t, _last)))
+    _last = t
+
+
+def span(name, start):
+    """
+    Record part of the current phase, from `start` (a now() value) to
+    now. Spans may overlap each other and do not move the phase clock.
+    """
+    phases.append((name, start, time.ticks_diff(now(), start)))
+
+
+def total():
+    return _last
+
+
+def lines():
+    out = []
+    # By start time, a phase before the (indented) spans inside it
+    for name, start, took in sorted(phases, key=lambda p: (p[1], p[0].startswith(" "))):
+        out.append(f"{start:>7} {took:>7}  {name}")
+    return out
+
+
+def finish(budget_ms=None):
+    """
+    Write the boot report to flash and check the total against
+    `budget_ms`. Returns True if the boot was within budget (or there is
+    none).
+    """
+    took = total()
+    ok = not budget_ms or took <= budget_ms
+    summary = f"Boot took {took} ms" + (f" (budget {budget_ms} ms)" if budget_ms else "")
+    if not ok:
+        summary += ", over budget"
+    with open(PATH, "w") as f:
+        f.write(summary + "\n")
+        f.write("  start    took  phase (ms since power-on)\n")
+        for line in lines():
+            f.write(line + "\n")
+    print(summary)
+    system_log(summary)
+    slowest = sorted(phases[1:], key=lambda p: -p[2])[:3]
+    system_log("Slowest boot phases: " + ", ".join(f"{name.strip()} {took} ms" for name, _, took in slowest))
+    return ok
@@ -0,0 +1,123 @@
+import math
+import time
+
+from logging import system_log
+
+# Decay time of the error rate, in seconds
+RATE_WINDOW = 3600
+
+
+class ErrorRecord:
+    """
+    Error history of one task: how often it failed, when first and last,
+    whether it is failing now, how often it went from clear to failing
+    (flaps), and a decaying count of errors over about the last hour.
+    """
+    __slots__ = ("name", "count", "first", "last", "active", "flaps", "rate")
+
+    def __init__(self, name, now):
+        self.name = name
+        self.count = 0
+        self.first = now
+        self.last = now
+        self.active = False
+        self.flaps = 0
+        self.rate = 0.0
+
+    def rate_now(self, now):
+        """Errors in about the last RATE_WINDOW seconds."""
+        return self.rate * math.exp(-(now - self.last) / RATE_WINDOW)
+
+
+class ErrorRegistry:
+    """
+    Errors by task name. Each add or clear is one dict lookup, and
+    `active` keeps the number of failing tasks. Recent messages go to a
+    fixed ring of `size` entries; `version` changes whenever anything is
+    recorded.
+    """
+
+    def __init__(self, size=16):
+        self.records = {}
+        self.active = 0
+        self.version = 0
+        self.reported = None
+        self.size = size
+        self.head = 0
+        self.ring_time = [0] * size
+        self.ring_name = [None] * size
+        self.ring_text = [None] * size
+
+    def add(self, name, message=None):
+        """Record an error for `name`; True if it was not already failing."""
+        now = time.time()
+        record = self.records.get(name)
+        if record is None:
+            record = self.records[name] = ErrorRecord(name, now)
+        record.rate = record.rate_now(now) + 1
+        record.count += 1
+        record.last = now
+        self.version += 1
+
+        if message is not None:
+            i = self.head
+            self.ring_time[i] = now
+            self.ring_name[i] = name
+            self.ring_text[i] = str(message)
+            self.head = (i + 1) % self.size
+
+        if record.active:
+            return False
+        record.active = True
+        if record.count > 1:
+            record.flaps += 1
+        self.active += 1
+        return True
+
+    def clear(self, name):
+        """Mark `name` as recovered; True if it was failing."""
+        record = self.records.get(name)
+        if record is None or not record.active:
+            return False
+        record.active = False
+        self.active -= 1
+        self.version += 1
+        return True
+
+    def failing(self, name):
+        """True if `name` is failing now."""
+        record = self.records.get(name)
+        return record is not None and record.active
+
+    def ranked(self):
+        """Records with failing ones first, then by recent rate."""
+        now = time.time()
+        return sorted(self.records.values(), key=lambda r: (not r.active, -r.rate_now(now)))
+
+    def recent(self):
+        """(time, name, message) for the ring, newest first."""
+        for k in range(1, self.size + 1):
+            i = (self.head - k) % self.size
+            if self.ring_name[i] is None:
+                break
+            yield self.ring_time[i], self.ring_name[i], self.ring_text[i]
+
+    def export(self):
+        """
+        The registry on one line: name:count/flaps/rate-per-hour for each
+        task, '!' after those failing now.
+        """
+        now = time.time()
+        return " ".join(
+            f"{r.name}:{r.count}/{r.flaps}/{r.rate_now(now):.1f}{'!' if r.active else ''}"
+            for r in self.ranked()
+        )
+
+    async def report(self):
+        """The export in the system log, if anything was recorded since the last report."""
+        if self.records and self.version != self.reported:
+            self.reported = self.version
+            system_log(f"Errors: {self.export()}")
+
+
+errors = ErrorRegistry()
@@ -0,0 +1,129 @@
+from array import array
+
+from jsonstream import Select
+
+# Forecast fields kept from the Open-Meteo response; everything else is
+# skipped as it streams in
+PATHS = (
+    ("utc_offset_seconds",),
+    ("hourly", "time", 0),
+    ("hourly", "temperature_2m", None),
+    ("daily", "sunrise", None),
+    ("daily", "sunset", None),
+)
+
+# An hour the API had no temperature for
+MISSING = -32768
+
+
+class Forecast:
+    """
+    The hourly temperatures, sunrises and sunsets of one forecast, parsed
+    once and kept for the day. Temperatures are int16 tenths of °C, one
+    per hour from `start`; times are local epoch minutes, which stay
+    small ints on the board. An hour's temperature is found by
+    arithmetic on its time, not by searching.
+    """
+
+    def __init__(self):
+        self.start = None  # local epoch minute of the first hour (midnight today)
+        self.temps = array("h")
+        self.sunrises = array("i")
+        self.sunsets = array("i")
+        self.offset = 0
+        # The response's validators, for a conditional refresh
+        self.etag = None
+        self.modified = None
+
+    # Parsing
+
+    def parser(self):
+        """A jsonstream.Select that fills this forecast; call done() after the body."""
+        return Select(PATHS, self.found)
+
+    def found(self, path, value):
+        field = path[1] if len(path) > 1 else path[0]
+        if field == "temperature_2m":
+            self.temps.append(MISSING if value is None else round(value * 10))
+        elif field == "time":
+            self.start = value // 60
+        elif field == "sunrise":
+            self.sunrises.append(value // 60)
+        elif field == "sunset":
+            self.sunsets.append(value // 60)
+        elif field == "utc_offset_seconds":
+            self.offset = value // 60
+
+    def done(self, parser):
+        """Finish parsing; raises ValueError if the forecast is missing fields."""
+        parser.close()
+        if self.start is None or not self.temps or len(self.sunrises) < 2 or not self.sunsets:
+            raise ValueError("forecast incomplete")
+        # UTC to local
+        offset = self.offset
+        self.start += offset
+        for times in (self.sunrises, self.sunsets):
+            for i in range(len(times)):
+                times[i] += offset
+        self.offset = 0
+        return self
+
+    # Queries; `t` is local epoch seconds, as time.time() once the clock is synced
+
+    def day(self, t):
+        """The forecast day holding time `t`: 0 for the first day, 1 for the next."""
+        return (int(t) // 60 - self.start) // 1440
+
+    def index(self, t):
+        """The hour slot holding time `t`, or None outside the forecast."""
+        i = (int(t) // 60 - self.start) // 60
+        if 0 <= i < len(self.temps):
+            return i
+        return None
+
+    def temp_at(self, t):
+        """Temperature in °C for the hour holding `t`, or None."""
+        i = self.index(t)
+        if i is None or self.temps[i] == MISSING:
+            return None
+        return self.temps[i] / 10
+
+    def sunrise(self, day=1):
+        """Sunrise as local epoch seconds; day 0 is today, 1 tomorrow."""
+        return self.sunrises[day] * 60
+
+    def sunset(self, day=0):
+        return self.sunsets[day] * 60
+
+    def night(self, day=0):
+        """(sunset, next sunrise) of the night after forecast day `day`."""
+        return self.sunset(day), self.sunrise(day + 1)
+
+    def sunrise_temp(self, day=0):
+        """Temperature at the sunrise after day `day`; by default tomorrow's."""
+        return self.temp_at(self.sunrise(day + 1))
+
+    def low(self, t0, t1):
+        """Lowest temperature in °C over the hours from `t0` to `t1`, or None."""
+        lo = None
+        for v in self.slots(t0, t1):
+            if v != MISSING and (lo is None or v < lo):
+                lo = v
+        return None if lo is None else lo / 10
+
+    def overnight_low(self, day=0):
+        """Lowest temperature in the night after day `day`; by default tonight."""
+        return self.low(*self.night(day))
+
+    def hours_below(self, threshold, t0=None, t1=None):
+        """Hours colder than `threshold` °C from `t0` to `t1` (default: tonight)."""
+        if t0 is None:
+            t0, t1 = self.night(0)
+        limit = threshold * 10
+        return sum(1 for v in self.slots(t0, t1) if v != MISSING and v < limit)
+
+    def slots(self, t0, t1):
+        """Stored values for the hours holding `t0` through `t1`."""
+        first = max(0, (int(t0) // 60 - self.start) // 60)
+        last = min(len(self.temps) - 1, (int(t1) // 60 - self.start) // 60)
+        return self.temps[first:last + 1] if first <= last else self.temps[0:0]
@@ -0,0 +1,110 @@
+import binascii
+import os
+import struct
+import time
+from array import array
+
+from forecast import Forecast
+from logging import system_log
+from state import state
+
+PATH = "forecast.bin"
+TMP_PATH = "forecast.tmp"
+MAGIC = b"ICUF"
+VERSION = 1
+
+# magic, version, fetched at, first hour (local epoch minute), then the
+# number of hourly temperatures, sunrises and sunsets
+FIXED = "<4sBIiHBB"
+# The response's validators, sent back on the next fetch
+STRINGS = ("etag", "modified")
+
+
+def encode(forecast, fetched_at):
+    """The forecast as bytes: fixed fields, validators, the three arrays, CRC32."""
+    parts = [struct.pack(
+        FIXED, MAGIC, VERSION, fetched_at, forecast.start,
+        len(forecast.temps), len(forecast.sunrises), len(forecast.sunsets),
+    )]
+    for name in STRINGS:
+        text = (getattr(forecast, name) or "").encode()
+        parts.append(bytes((len(text),)) + text)
+    parts.append(bytes(forecast.temps))
+    parts.append(bytes(forecast.sunrises))
+    parts.append(bytes(forecast.sunsets))
+
+    body = b"".join(parts)
+    return body + struct.pack("<I", binascii.crc32(body) & 0xFFFFFFFF)
+
+
+def decode(data):
+    """The (Forecast, fetched at) in a cache file's bytes."""
+    body = data[:-4]
+    if struct.unpack("<I", data[-4:])[0] != binascii.crc32(body) & 0xFFFFFFFF:
+        raise ValueError("bad checksum")
+    magic, version, fetched_at, start, n_temps, n_sunrises, n_sunsets = struct.unpack_from(FIXED, body)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("unknown format")
+
+    forecast = Forecast()
+    forecast.start = start
+    pos = struct.calcsize(FIXED)
+    for name in STRINGS:
+        n = body[pos]
+        setattr(forecast, name, body[pos + 1:pos + 1 + n].decode() or None)
+        pos += 1 + n
+
+    forecast.temps = array("h", struct.unpack_from("<%dh" % n_temps, body, pos))
+    pos += 2 * n_temps
+    forecast.sunrises = array("i", struct.unpack_from("<%di" % n_sunrises, body, pos))
+    pos += 4 * n_sunrises
+    forecast.sunsets = array("i", struct.unpack_from("<%di" % n_sunsets, body, pos))
+    return forecast, fetched_at
+
+
+def save(forecast, fetched_at):
+    """
+    Write the forecast to a temporary file and rename it over the old
+    one. A failure is logged, not raised: the forecast in memory is still
+    good.
+    """
+    try:
+        data = encode(forecast, fetched_at)
+        with open(TMP_PATH, "wb") as f:
+            f.write(data)
+        os.rename(TMP_PATH, PATH)
+        return True
+    except Exception as e:
+        print(f"Forecast cache not saved: {e}")
+        system_log(f"Forecast cache not saved: {e}")
+        return False
+
+
+def load():
+    """The cached (Forecast, fetched at), or None if there is no good cache."""
+    start = time.ticks_ms()
+    try:
+        with open(PATH, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        forecast, fetched_at = decode(data)
+    except Exception as e:
+        print(f"Forecast cache not loaded: {e}")
+        system_log(f"Forecast cache not loaded: {e}")
+        return None
+    took = time.ticks_diff(time.ticks_ms(), start)
+    print(f"Forecast cache loaded in {took} ms")
+    system_log(f"Forecast cache loaded in {took} ms (fetched at {fetched_at})")
+    return forecast, fetched_at
+
+
+def restore():
+    """Put the cached forecast in state, if there is one. Returns True if it was."""
+    cached = load()
+    if cached is None:
+        return False
+    with state.batch():
+        state.forecast, state.weather_fetched_at = cached
+    return True
@@ -0,0 +1,143 @@
+# Parser modes
+VALUE = 0
+STRING = 1
+ESCAPE = 2
+SCALAR = 3
+
+# Characters by byte value
+QUOTE = 0x22
+BACKSLASH = 0x5C
+OPEN_OBJECT = 0x7B
+CLOSE_OBJECT = 0x7D
+OPEN_ARRAY = 0x5B
+CLOSE_ARRAY = 0x5D
+COMMA = 0x2C
+COLON = 0x3A
+WHITESPACE = b" \t\r\n"
+# Ends a number or true/false/null
+DELIMITERS = b" \t\r\n,]}"
+
+ESCAPES = {0x62: 0x08, 0x66: 0x0C, 0x6E: 0x0A, 0x72: 0x0D, 0x74: 0x09}
+LITERALS = {b"true": True, b"false": False, b"null": None}
+
+
+class Select:
+    """
+    Streaming JSON parser that keeps only the values at chosen paths.
+
+    Feed it the document in pieces of any size. For each string, number,
+    true, false or null whose path matches one of `paths`,
+    `found(path, value)` is called. A path is a tuple of object keys and
+    array indexes, e.g. ("daily", "sunset", 0); None in a pattern matches
+    any key or index. Everything else is scanned and dropped, so memory
+    is the nesting depth plus the longest key or wanted value, whatever
+    the document's size. \\u escapes in strings are kept as written.
+    """
+
+    def __init__(self, paths, found):
+        self.paths = paths
+        self.lengths = set(len(p) for p in paths)
+        self.found = found
+        # Keys and indexes down to the current value, and whether each
+        # level is an object
+        self.path = []
+        self.objects = []
+        self.mode = VALUE
+        self.token = bytearray()
+        self.keep = False
+        self.is_key = False
+
+    def wanted(self):
+        path = self.path
+        if len(path) not in self.lengths:
+            return False
+        for pattern in self.paths:
+            if len(pattern) == len(path):
+                for want, have in zip(pattern, path):
+                    if want is not None and want != have:
+                        break
+                else:
+                    return True
+        return False
+
+    def start(self, c):
+        """A string or scalar starts; keep its text if it is a key or wanted."""
+        self.is_key = bool(self.objects) and self.objects[-1] and self.path[-1] is None
+        self.keep = self.is_key or self.wanted()
+        self.token = bytearray() if self.keep else None
+        if c is not None and self.keep:
+            self.token.append(c)
+
+    def end_string(self):
+        if self.is_key:
+            self.path[-1] = self.token.decode()
+        elif self.keep:
+            self.found(tuple(self.path), self.token.decode())
+        self.token = None
+
+    def end_scalar(self):
+        if self.keep:
+            text = bytes(self.token)
+            if text in LITERALS:
+                value = LITERALS[text]
+            elif b"." in text or b"e" in text or b"E" in text:
+                value = float(text)
+            else:
+                value = int(text)
+            self.found(tuple(self.path), value)
+        self.token = None
+
+    def feed(self, data):
+        for c in data:
+            mode = self.mode
+            if mode == STRING:
+                if c == QUOTE:
+                    self.mode = VALUE
+                    self.end_string()
+                elif c == BACKSLASH:
+                    self.mode = ESCAPE
+                elif self.keep:
+                    self.token.append(c)
+                continue
+            if mode == ESCAPE:
+                self.mode = STRING
+                if self.keep:
+                    self.token.append(ESCAPES.get(c, c))
+                continue
+            if mode == SCALAR:
+                if c not in DELIMITERS:
+                    if self.keep:
+                        self.token.append(c)
+                    continue
+                self.mode = VALUE
+                self.end_scalar()
+
+            # Between values
+            if c in WHITESPACE or c == COLON:
+                continue
+            if c == QUOTE:
+                self.mode = STRING
+                self.start(None)
+            elif c == OPEN_OBJECT:
+                self.path.append(None)
+                self.objects.append(True)
+            elif c == OPEN_ARRAY:
+                self.path.append(0)
+                self.objects.append(False)
+            elif c == CLOSE_OBJECT or c == CLOSE_ARRAY:
+                self.path.pop()
+                self.objects.pop()
+            elif c == COMMA:
+                if self.objects[-1]:
+                    self.path[-1] = None
+                else:
+                    self.path[-1] += 1
+            else:
+                self.mode = SCALAR
+                self.start(c)
+
+    def close(self):
+        """End of the document: finish a scalar still being read."""
+        if self.mode == SCALAR:
+            self.mode = VALUE
+            self.end_scalar()
@@ -0,0 +1,266 @@
+import time
+
+import monitor
+from errors import errors
+from state import state
+from screen import retained, fmt_degrees, fmt_percent, fmt_on_off, fmt_count, fmt_ms
+from trends import TRENDS, EMPTY
+
+
+class Field:
+    """
+    One label/value pair on a page.
+    The value comes from `<source>.<key>`, `state` unless given (called if
+    it is a function), and is
+    turned into text by `fmt`. The last raw value and its text are cached,
+    so an unchanged value is neither re-formatted nor redrawn.
+    """
+    __slots__ = ("label", "key", "fmt", "x", "y", "value_x", "source", "raw", "text")
+
+    def __init__(self, label, key, fmt, x, y, value_x=None, source=None):
+        self.label = label
+        self.key = key
+        self.fmt = fmt
+        self.x = x
+        self.y = y
+        self.value_x = value_x
+        self.source = state if source is None else source
+        self.raw = None
+        self.text = None
+
+    def read(self):
+        value = getattr(self.source, self.key)
+        if callable(value):
+            value = value()
+        if self.text is None or value != self.raw:
+            self.raw = value
+            self.text = self.fmt(value)
+        return self.text
+
+
+class Page:
+    """A titled page of fields, drawn by render_page()."""
+    __slots__ = ("title", "fields")
+
+    def __init__(self, title, fields):
+        self.title = title
+        self.fields = fields
+
+    def draw_static(self, display, ORANGE):
+        display.set_pen(ORANGE)
+        for field in self.fields:
+            display.text(field.label, field.x, field.y, 200, 2)
+            if field.value_x is None:
+                field.value_x = field.x + display.measure_text(field.label, 2)
+
+    def draw(self, display, BG, WHITE, ORANGE):
+        for field in self.fields:
+            retained.value(display, BG, WHITE, field.key, field.read(), field.value_x, field.y)
+
+
+class TrendPage:
+    """
+    24h sparkline of one trend, one screen column per trend column,
+    drawn as a min-max bar. Redrawn only when the trend has changed.
+    """
+    __slots__ = ("title", "key", "fmt", "drawn")
+
+    PLOT_X = 20
+    PLOT_Y = 100
+    PLOT_H = 100
+    LABEL_Y = 210
+
+    def __init__(self, title, key, fmt):
+        self.title = title
+        self.key = key
+        self.fmt = fmt
+        self.drawn = None
+
+    def draw_static(self, display, ORANGE):
+        display.set_pen(ORANGE)
+        display.text("Lo ", self.PLOT_X, self.LABEL_Y, 200, 2)
+        display.text("Hi ", self.PLOT_X + 110, self.LABEL_Y, 200, 2)
+        self.drawn = None
+
+    def draw(self, display, BG, WHITE, ORANGE):
+        trend = TRENDS[self.key]
+        if trend.version == self.drawn:
+            return
+        self.drawn = trend.version
+
+        x0 = self.PLOT_X
+        y0 = self.PLOT_Y
+        h = self.PLOT_H
+        display.set_pen(BG)
+        display.rectangle(x0, y0, trend.columns, h)
+        retained.mark(x0, y0, trend.columns, h)
+
+        bounds = trend.bounds()
+        if bounds is None:
+            lo_text = hi_text = self.fmt(None)
+        else:
+            vmin, vmax = bounds
+            span = max(vmax - vmin, 1)
+            lo = trend.lo
+            hi = trend.hi
+            bottom = y0 + h - 1
+            display.set_pen(WHITE)
+            for x, i in enumerate(trend.order()):
+                if lo[i] == EMPTY:
+                    continue
+                top = bottom - (hi[i] - vmin) * (h - 1) // span
+                base = bottom - (lo[i] - vmin) * (h - 1) // span
+                display.rectangle(x0 + x, top, 1, base - top + 1)
+            lo_text = self.fmt(vmin / trend.scale)
+            hi_text = self.fmt(vmax / trend.scale)
+
+        retained.value(display, BG, WHITE, "lo", lo_text, x0 + 36, self.LABEL_Y)
+        retained.value(display, BG, WHITE, "hi", hi_text, x0 + 146, self.LABEL_Y)
+
+
+class ErrorsPage:
+    """
+    The tasks with errors, failing ones first in orange, each with its
+    error count and flaps (times it went from clear to failing), and the
+    newest error message in the small font underneath.
+    Redrawn only when the error registry has changed.
+    """
+    __slots__ = ("title", "drawn")
+
+    ROWS = 5
+    ROW_Y = 100
+    ROW_H = 25
+    MESSAGE_Y = 222
+
+    def __init__(self, title):
+        self.title = title
+        self.drawn = None
+
+    def draw_static(self, display, ORANGE):
+        self.drawn = None
+
+    def draw(self, display, BG, WHITE, ORANGE):
+        if errors.version == self.drawn:
+            return
+        self.drawn = errors.version
+
+        ranked = errors.ranked()
+        for row in range(self.ROWS):
+            if row < len(ranked):
+                r = ranked[row]
+                text = f"{r.name[:12]} {r.count}x ~{r.flaps}{' !' if r.active else ''}"
+                pen = ORANGE if r.active else WHITE
+            else:
+                text = "None" if row == 0 else ""
+                pen = WHITE
+            retained.value(display, BG, pen, f"error_{row}", text, 20, self.ROW_Y + row * self.ROW_H)
+
+        text = ""
+        for when, name, message in errors.recent():
+            hour, minute = time.localtime(when)[3:5]
+            text = f"{hour:02d}:{minute:02d} {name}: {message}"[:33]
+            break
+        retained.value(display, BG, WHITE, "error_message", text, 20, self.MESSAGE_Y, 1)
+
+
+class TasksPage:
+    """
+    Every monitored task, the slowest first, with its run time p95 and
+    max, wake-up lag p95 and longest loop stall in ms, in the small font
+    so they all fit. Redrawn when its figures change.
+    """
+    __slots__ = ("title",)
+
+    ROWS = 14
+    ROW_Y = 92
+    ROW_H = 10
+
+    def __init__(self, title):
+        self.title = title
+
+    def draw_static(self, display, ORANGE):
+        display.set_pen(ORANGE)
+        display.text(f"{'task':<13}{'run':>4}/{'max':<4}{'lag':>4}{'stall':>5}", 12, self.ROW_Y - 12, 200, 1)
+
+    def draw(self, display, BG, WHITE, ORANGE):
+        ranked = sorted(monitor.probes.values(), key=lambda p: p.slice_max, reverse=True)
+        for row in range(self.ROWS):
+            if row < len(ranked):
+                p = ranked[row]
+                run95, run_max, lag95, stall = p.figures()
+                text = f"{p.name[:12]:<13}{run95:>4}/{run_max:<4}{lag95:>4}{stall:>5}"
+            else:
+                text = ""
+            retained.value(display, BG, WHITE, f"task_{row}", text, 12, self.ROW_Y + row * self.ROW_H, 1)
+
+
+def stat_page(title, prefix, fmt):
+    """Current / average / low / high page for one measured column."""
+    return Page(title, (
+        Field("Current: ", prefix + "_current", fmt, 40, 105, 132),
+        Field("Average: ", prefix + "_average", fmt, 40, 130, 132),
+        Field("Low: ", prefix + "_low", fmt, 40, 155, 90),
+        Field("High: ", prefix + "_high", fmt, 40, 180, 90),
+    ))
+
+
+PAGES = {
+    "temperature_inside": stat_page("Temperature (Inside)", "temp_celc", fmt_degrees),
+    "temperature_outside": stat_page("Temperature (Outside)", "temp_celc_outside", fmt_degrees),
+    "humidity": stat_page("Humidity (Inside)", "rh", fmt_percent),
+    "actuations": Page("Actuations and Errors", (
+        Field("Fan: ", "fan_on", fmt_on_off, 40, 105, 84),
+        Field("Roof Opening: ", "roof_open", fmt_percent, 40, 130, 185),
+        Field("Heating: ", "heat_pad_on", fmt_on_off, 40, 155, 127),
+        Field("Errors: ", "errors_active", fmt_count, 40, 180, 117),
+    )),
+    "errors": ErrorsPage("Errors"),
+    "diagnostics": Page("Diagnostics", (
+        Field("Loop lag p95: ", "lag_p95", fmt_ms, 40, 105, 185, monitor),
+        Field("Loop lag max: ", "lag_max", fmt_ms, 40, 130, 185, monitor),
+        Field("Worst: ", "worst_task_name", fmt_count, 40, 155, 108, monitor),
+        Field("Stall: ", "worst_slice", fmt_ms, 40, 180, 108, monitor),
+        Field("Heap: ", "heap_text", fmt_count, 40, 205, 96, monitor),
+    )),
+    "tasks": TasksPage("Tasks"),
+    "trend_temperature_inside": TrendPage("Inside 24h", "temp_celc_current", fmt_degrees),
+    "trend_temperature_outside": TrendPage("Outside 24h", "temp_celc_outside_current", fmt_degrees),
+    "trend_humidity": TrendPage("Humidity 24h", "rh_current", fmt_percent),
+}
+
+
+def watched(name):
+    """The state fields page `name` shows, whose changes should redraw it."""
+    page = PAGES[name]
+    if isinstance(page, ErrorsPage):
+        return ("errors_active",)
+    if not isinstance(page, Page):
+        return ()
+    return tuple(field.key for field in page.fields if field.source is state)
+
+
+def polled(name):
+    """True if page `name` shows anything not in the state store, so it needs refreshing."""
+    page = PAGES[name]
+    if not isinstance(page, Page):
+        return True
+    for field in page.fields:
+        if field.source is not state:
+            return True
+    return False
+
+
+def render_page(display, name, BG, WHITE, ORANGE):
+    """
+    Draw page `name`. The title and static parts are drawn when the page
+    changes; after that only what changed is repainted.
+    """
+    page = PAGES[name]
+    if retained.begin(display, BG, name):
+        # Title
+        display.set_pen(WHITE)
+        display.text(page.title, 40, 50, 200, 3)
+        page.draw_static(display, ORANGE)
+    page.draw(display, BG, WHITE, ORANGE)
+
+    retained.flush(display)
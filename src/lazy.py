@@ -0,0 +1,37 @@
+import time
+
+from logging import system_log
+
+# Module name -> ms its import took, for modules loaded through lazy()
+loaded = {}
+_proxies = {}
+
+
+class Lazy:
+    """
+    Stands in for a module until one of its attributes is first used,
+    then imports it and passes every lookup on to the module.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            start = time.ticks_ms()
+            module = self._module = __import__(self._name)
+            took = time.ticks_diff(time.ticks_ms(), start)
+            loaded[self._name] = took
+            print(f"Imported {self._name} in {took} ms")
+            system_log(f"Imported {self._name} in {took} ms")
+        return getattr(module, attr)
+
+
+def lazy(name):
+    """`name` as a module that is imported on first use; one proxy per module."""
+    proxy = _proxies.get(name)
+    if proxy is None:
+        proxy = _proxies[name] = Lazy(name)
+    return proxy
@@ -1,59 +1,30 @@
-import urequests
-import utime
-import time
-import ujson
+import ahttp
 
-def get_location():
-    while True:
-        response = None
-        try:
-            # Ping location API with Timeout
-            response = urequests.get("http://ip-api.com/json/",timeout=5)
-            
-            # Check HTTP status
-            if response.status_code != 200:
-                raise Exception(f"HTTP {response.status_code}")
-            
-            data = response.json()
+async def get_geo():
+    """
+    One request to the geo-IP service for both the timezone and the
+    location. Returns (timezone, latitude, longitude), or None on failure.
+    """
+    response = None
+    try:
+        # Ping location API with Timeout
+        response = await ahttp.get("http://ip-api.com/json/", timeout=5)
 
-            # Make sure keys exist before returning
-            if "lat" in data and "lon" in data:
-                return data["lat"], data["lon"]
+        # Check HTTP status
+        if response.status_code != 200:
+            raise Exception(f"HTTP {response.status_code}")
 
-        except Exception as e:
-            print("Location request failed:", e)
-            
-        finally:
-            if response:
-                response.close()
+        data = response.json()
 
-        # Wait a bit before retrying, otherwise it hammers the API
-        time.sleep(5)
-        return
+        # Make sure keys exist before returning
+        if "timezone" in data and "lat" in data and "lon" in data:
+            return data["timezone"], data["lat"], data["lon"]
 
+    except Exception as e:
+        print("Location request failed:", e)
 
-def get_timezone():
-    while True:
-        response = None
-        try:
-            #Ping Timezone API with Timeout
-            response = urequests.get("http://ip-api.com/json/",timeout=5)
-            
-            # Check HTTP status
-            if response.status_code != 200:
-                raise Exception(f"HTTP {response.status_code}")
-            
-            data = response.json()
+    finally:
+        if response:
+            response.close()
 
-            if "timezone" in data:
-                return data["timezone"]
-
-        except Exception as e:
-            print("Timezone request failed:", e)
-            
-        finally:
-            if response:
-                response.close()
-
-        time.sleep(5)
-        return
\ No newline at end of file
+    return None
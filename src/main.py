@@ -1,58 +1,55 @@
+# Imported first so its clock starts before the other imports
+import bootprof
 import uasyncio as asyncio
 
-from alerts import high_temp_alert, goodnight_message
 from logging import system_log
 from picographics import PicoGraphics, DISPLAY_PICO_EXPLORER
-from pimoroni_i2c import PimoroniI2C
-from pimoroni import PICO_EXPLORER_I2C_PINS, Button
+from pimoroni import Button
 from screen import (
     title,
     clear_animation_area,
     start_screen,
     start_up_success,
     start_up_fail,
-    screen_temperature_inside,
-    screen_temperature_outside,
-    screen_humidity,
-    screen_actuations,
     menu,
+    boot_report,
+    retained,
 )
+bootprof.mark("import drivers and screen")
 
 from async_loop_functions import (
     sensor_log,
-    temp_inside_display,
-    temp_outside_display,
-    humidity_display,
-    actuations_display,
+    page_display,
     cloud_upload,
     actuators,
     weather_check,
-    temperature_alert,
     goodnight_routine,
     cover_check,
     clock_sync,
     wifi_watch,
     stats_check
 )
-from async_startup_functions import (
-    connect_wifi,
-    start_timezone,
-    start_location,
-    start_clock_sync,
-    start_weather_data,
-)
-
-from utils import get_local_time, load_config, seconds_until
-import state
-import machine
+from async_startup_functions import start_up
+bootprof.mark("import tasks")
+
+from alerts import engine as alert_engine
+from errors import errors
+from scheduler import scheduler
+from supervisor import Supervisor
+from utils import load_config
+import forecast_cache
+import monitor
+from notify import notifier
+import snapshot
+from state import state
 import sys
-import time
-import utime
+bootprof.mark("import services")
 
 # Set-up
 config = load_config()
 display = PicoGraphics(display=DISPLAY_PICO_EXPLORER)
-i2c = PimoroniI2C(**PICO_EXPLORER_I2C_PINS)
+# Only for a display driver known to do windowed writes
+retained.partial = config.get("partial_update", False)
 
 SSID = config["SSID"]
 PASSWORD = config["PASSWORD"]
@@ -62,6 +59,14 @@ button_b = Button(13)
 button_x = Button(14)
 button_y = Button(15)
 
+# Status pages shown by each button, pressing again steps through them
+PAGE_BUTTONS = (
+    (button_a, ("temperature_inside", "trend_temperature_inside")),
+    (button_b, ("temperature_outside", "trend_temperature_outside")),
+    (button_x, ("humidity", "trend_humidity")),
+    (button_y, ("actuations", "errors", "diagnostics", "tasks")),
+)
+
 # Screen Colours
 BG       = display.create_pen(15, 25, 35)
 STEM     = display.create_pen(30, 160, 60)
@@ -73,10 +78,19 @@ WHITE    = display.create_pen(255, 255, 255)
 GREEN    = display.create_pen(0, 255, 0)
 RED      = display.create_pen(255, 0, 0)
 ORANGE   = display.create_pen(255, 165, 0)
+bootprof.mark("set-up")
 
 
 # Async application
 async def main():
+    # Pick up the roof position, controller memory and cached values from before a reset
+    snapshot.restore()
+    # The last forecast, for night detection until the next fetch
+    forecast_cache.restore()
+    # Notifications an earlier boot could not send
+    notifier.restore()
+    bootprof.mark("snapshot restore")
+
     try:
         # Start Screen
         screen_running = asyncio.Event()
@@ -88,22 +102,12 @@ async def main():
         
         # Wait for USB to become ready
         await asyncio.sleep(0.1)
-        # Connect to Wi-Fi
-        await connect_wifi()
-        # Timezone
-        state.timezone = await start_timezone()
-        # Location
-        state.latitude, state.longitude = await start_location()
-        # Clock sync at start-up
-        rtc = await start_clock_sync(state.timezone)
-        state.rtc = rtc
-        # Acquire weather data
-        (
-            state.sunrise_hour,
-            state.sunrise_time,
-            state.temp_at_sunrise,
-            state.sunset_time,
-        ) = await start_weather_data()
+        bootprof.mark("splash")
+        # Wi-Fi, timezone and location, clock and weather
+        await start_up()
+        # Keep what start-up fetched for the next boot
+        snapshot.request()
+        bootprof.mark("start-up")
 
         # UI / Screen
         print("Start-up routine successful")
@@ -121,6 +125,7 @@ async def main():
             WHITE,
             ORANGE,
         )
+        bootprof.mark("success screen and menu")
 
     except Exception as e:
         print("Start-up routine failed:", e)
@@ -135,27 +140,54 @@ async def main():
     # Define Asyncio events for main loop
     csv_complete = asyncio.Event()
     actuator_update = asyncio.Event()
-    temp_alert = asyncio.Event()
-    goodnight = asyncio.Event()
-
-    # Start all tasks concurrently
-    await asyncio.gather(
-        sensor_log(csv_complete, actuator_update),
-        cloud_upload(csv_complete, actuator_update),
-        actuators(actuator_update, temp_alert),
-        weather_check(),
-        temperature_alert(temp_alert, goodnight),
-        goodnight_routine(goodnight),
-        clock_sync(),
-        cover_check(i2c),
-        stats_check(),
-        wifi_watch(SSID, PASSWORD),
-        temp_inside_display(display, button_a, button_b, button_x, button_y, BG, WHITE, ORANGE),
-        temp_outside_display(display, button_a, button_b, button_x, button_y, BG, WHITE, ORANGE),
-        humidity_display(display, button_a, button_b, button_x, button_y, BG, WHITE, ORANGE),
-        actuations_display(display, button_a, button_b, button_x, button_y, BG, WHITE, ORANGE),
+    # State change events
+    goodnight = state.event("is_night")
+    # Alert rules, checked as their channels change; subscribed only now,
+    # so values restored or cached at start-up don't raise alerts again
+    alert_engine.load(config.get("alert_rules"))
+
+    # Periodic work runs as scheduler jobs; timeouts are in seconds
+    scheduler.every("sensor_log", lambda: sensor_log(csv_complete), state.record_interval, first=0, timeout=20)
+    scheduler.every("cover_check", cover_check, 30, first=0, timeout=60)
+    scheduler.every("stats_check", stats_check, 10, timeout=30)
+    scheduler.every("wifi_watch", lambda: wifi_watch(SSID, PASSWORD), 10, timeout=30)
+    scheduler.daily("weather_check", weather_check, 3, timeout=60)
+    scheduler.daily("clock_sync", clock_sync, 3, timeout=60)
+    scheduler.every("scheduler_report", scheduler.report, 3600)
+    scheduler.every("errors_report", errors.report, 3600)
+    scheduler.every("notify_report", notifier.report, 3600)
+    scheduler.every("alerts_report", alert_engine.report, 3600)
+    scheduler.every("snapshot", snapshot.save_job, 600)
+    # Save soon after anything that must survive a reset changes
+    state.subscribe(
+        ("roof_open", "fan_on", "heat_pad_on", "last_goodnight_date", "geo_fetched_at", "weather_fetched_at"),
+        lambda names: snapshot.request(),
     )
 
+    # Long-lived tasks run under the supervisor; critical ones gate the watchdog
+    supervisor = Supervisor(watchdog_ms=config.get("watchdog_ms", 8000))
+    supervisor.add("scheduler", scheduler.run, critical=True, deadline=10)
+    supervisor.add("cloud_upload", lambda: cloud_upload(csv_complete, actuator_update), deadline=30)
+    supervisor.add("actuators", lambda: actuators(actuator_update), critical=True, deadline=20)
+    supervisor.add("alerts", alert_engine.run, critical=True, deadline=60)
+    supervisor.add("goodnight_routine", lambda: goodnight_routine(goodnight), deadline=60)
+    supervisor.add("notify", notifier.run, deadline=60)
+    supervisor.add("page_display", lambda: page_display(display, PAGE_BUTTONS, BG, WHITE, ORANGE), deadline=30)
+    supervisor.add("watch_lag", monitor.watch_lag)
+    supervisor.add("watch_memory", lambda: monitor.watch_memory(collect_every=config.get("gc_collect_every")))
+    supervisor.add("monitor_report", monitor.report)
+    bootprof.mark("jobs and tasks")
+
+    # Boot report to flash; a boot over budget is recorded as an error
+    budget_ms = config.get("boot_budget_ms", 30000)
+    if not bootprof.finish(budget_ms):
+        state.add_error("boot", f"{bootprof.total()} ms, budget {budget_ms} ms")
+    if config.get("boot_report_screen"):
+        await boot_report(display, BG, WHITE, ORANGE, bootprof.lines())
+        await menu(display, BG, WHITE, ORANGE)
+
+    await supervisor.run()
+
 # Run the whole program
 asyncio.run(main())
 
@@ -0,0 +1,313 @@
+import uasyncio as asyncio
+import gc
+import time
+from array import array
+from logging import system_log
+
+# Heap counters, where the port has them
+_mem_alloc = getattr(gc, "mem_alloc", None)
+_mem_free = getattr(gc, "mem_free", None)
+
+# Histogram buckets in ms: <1, <2, <4, ... <1024, <2048, >=2048
+BUCKETS = 13
+
+
+class Histogram:
+    """Fixed-size log2 histogram of millisecond durations."""
+    __slots__ = ("counts", "max")
+
+    def __init__(self):
+        self.counts = array("I", [0] * BUCKETS)
+        self.max = 0
+
+    def add(self, ms):
+        bucket = 0
+        v = ms
+        while v > 0 and bucket < BUCKETS - 1:
+            v >>= 1
+            bucket += 1
+        self.counts[bucket] += 1
+        if ms > self.max:
+            self.max = ms
+
+    def count(self):
+        return sum(self.counts)
+
+    def percentile(self, p):
+        """Upper bound in ms of the bucket holding the p-th percentile."""
+        total = self.count()
+        if total == 0:
+            return 0
+        target = total * p // 100
+        seen = 0
+        for bucket in range(BUCKETS):
+            seen += self.counts[bucket]
+            if seen > target:
+                return 1 << bucket if bucket < BUCKETS - 1 else self.max
+        return self.max
+
+
+class Probe:
+    """
+    Timing for one task: run time per iteration (wake-up to next wait),
+    scheduling lag (how late a sleep woke up) and the longest loop stall
+    seen while this task was the last one to wake.
+    Also the heap growth over each iteration: the total and the largest.
+    """
+    __slots__ = ("name", "run", "lag", "slice_max", "woke", "mem", "alloc_total", "alloc_max", "reported")
+
+    def __init__(self, name):
+        self.name = name
+        self.run = Histogram()
+        self.lag = Histogram()
+        self.slice_max = 0
+        self.woke = None
+        self.mem = None
+        self.alloc_total = 0
+        self.alloc_max = 0
+        self.reported = None
+
+    def figures(self):
+        """(run p95, run max, lag p95, longest stall) in ms."""
+        return self.run.percentile(95), self.run.max, self.lag.percentile(95), self.slice_max
+
+    def begin(self):
+        global _current
+        self.woke = time.ticks_ms()
+        _current = self
+        if _mem_alloc is not None:
+            self.mem = _mem_alloc()
+
+    def end(self):
+        if self.woke is not None:
+            self.run.add(time.ticks_diff(time.ticks_ms(), self.woke))
+            self.woke = None
+        if self.mem is not None:
+            alloc = _mem_alloc()
+            # A collection mid-iteration shows up as a drop; only count growth
+            grown = alloc - self.mem
+            if grown > 0:
+                self.alloc_total += grown
+                if grown > self.alloc_max:
+                    self.alloc_max = grown
+            heap.note(alloc)
+            self.mem = None
+
+    async def sleep(self, seconds):
+        """asyncio.sleep() that records the iteration and the wake-up lag."""
+        self.end()
+        expected = time.ticks_add(time.ticks_ms(), int(seconds * 1000))
+        await asyncio.sleep(seconds)
+        self.lag.add(max(0, time.ticks_diff(time.ticks_ms(), expected)))
+        self.begin()
+
+    async def wait(self, event, timeout=None):
+        """event.wait() that records the iteration; gives up after `timeout` seconds if given."""
+        self.end()
+        if timeout is None:
+            await event.wait()
+        else:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self.begin()
+
+
+class Heap:
+    """
+    Heap watermarks and a ring of periodic samples. Each sample is
+    (seconds, free, allocated, largest free block) in one uint32 array,
+    so the ring never allocates once it exists. The largest block is only
+    measured on request, as it forces collections; samples repeat the
+    last one measured.
+
+    The ring is written to flash by dump(), on request (e.g. at the REPL)
+    and when free memory first drops below `low_free` bytes.
+    """
+    FIELDS = 4
+
+    def __init__(self, size=64, low_free=16 * 1024):
+        self.size = size
+        self.ring = array("I", [0] * (size * self.FIELDS))
+        self.head = 0
+        self.count = 0
+        self.alloc_high = 0
+        self.free_low = None
+        self.largest = 0
+        self.low_free = low_free
+        self.low = False
+
+    def note(self, alloc):
+        if alloc > self.alloc_high:
+            self.alloc_high = alloc
+
+    def largest_block(self, limit):
+        """
+        Largest single allocation that succeeds right now, found by binary
+        search on bytearray sizes. Each failed allocation runs a full
+        collection first, so this is only for right after gc.collect().
+        """
+        lo = 0
+        hi = limit
+        while hi - lo > 64:
+            mid = (lo + hi) // 2
+            try:
+                block = bytearray(mid)
+                del block
+                lo = mid
+            except MemoryError:
+                hi = mid
+        return lo
+
+    def sample(self, probe_block=False):
+        if _mem_free is None:
+            return
+        free = _mem_free()
+        alloc = _mem_alloc()
+        self.note(alloc)
+        if self.free_low is None or free < self.free_low:
+            self.free_low = free
+        if probe_block:
+            self.largest = self.largest_block(free)
+        i = self.head * self.FIELDS
+        self.ring[i] = time.time() & 0xFFFFFFFF
+        self.ring[i + 1] = free
+        self.ring[i + 2] = alloc
+        self.ring[i + 3] = self.largest
+        self.head = (self.head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+        # Once on the way down, not again until memory has recovered
+        if free < self.low_free:
+            if not self.low:
+                self.low = True
+                print(f"Low memory: {free} bytes free")
+                system_log(f"Low memory: {free} bytes free")
+                self.dump()
+        elif free > 2 * self.low_free:
+            self.low = False
+
+    def dump(self, path="mem_ring.bin"):
+        """Write the ring to flash, oldest sample first."""
+        try:
+            with open(path, "wb") as f:
+                for k in range(self.count):
+                    n = (self.head - self.count + k) % self.size
+                    i = n * self.FIELDS
+                    f.write(self.ring[i:i + self.FIELDS])
+        except OSError as e:
+            print(f"Heap ring not written: {e}")
+            system_log(f"Heap ring not written: {e}")
+
+    def text(self):
+        if self.free_low is None:
+            return "N/A"
+        return f"{self.ring[((self.head - 1) % self.size) * self.FIELDS + 1] // 1024}k low {self.free_low // 1024}k"
+
+
+heap = Heap()
+
+# Probes by task name, and the one that woke most recently
+probes = {}
+_current = None
+
+# Loop-wide lag, measured by watch_lag()
+loop_lag = Histogram()
+
+
+def probe(name):
+    p = probes.get(name)
+    if p is None:
+        p = probes[name] = Probe(name)
+    return p
+
+
+async def watch_lag(period_ms=100):
+    """
+    Sleeps `period_ms` at a time and records how late it wakes. A late
+    wake-up means something held the loop; it is charged to the task
+    that woke last before it.
+    """
+    while True:
+        expected = time.ticks_add(time.ticks_ms(), period_ms)
+        await asyncio.sleep_ms(period_ms)
+        late = max(0, time.ticks_diff(time.ticks_ms(), expected))
+        loop_lag.add(late)
+        culprit = _current
+        if culprit is not None and late > culprit.slice_max:
+            culprit.slice_max = late
+
+
+# Values for the diagnostics page
+
+def lag_max():
+    return loop_lag.max
+
+
+def lag_p95():
+    return loop_lag.percentile(95)
+
+
+def worst_task():
+    worst = None
+    for p in probes.values():
+        if worst is None or p.slice_max > worst.slice_max:
+            worst = p
+    return worst
+
+
+def worst_task_name():
+    worst = worst_task()
+    return worst.name if worst is not None else None
+
+
+def worst_slice():
+    worst = worst_task()
+    return worst.slice_max if worst is not None else 0
+
+
+def heap_text():
+    return heap.text()
+
+
+async def watch_memory(interval=60, collect_every=None):
+    """
+    Samples the heap every `interval` seconds into the ring. With
+    `collect_every`, also runs gc.collect() on that schedule so the
+    collector runs at a quiet moment rather than mid-allocation.
+    """
+    since_collect = 0
+    while True:
+        await asyncio.sleep(interval)
+        if collect_every is not None:
+            since_collect += interval
+            if since_collect >= collect_every:
+                gc.collect()
+                since_collect = 0
+        heap.sample()
+
+
+async def report(interval=3600):
+    """
+    One line in the system log every `interval` seconds: the loop lag,
+    the heap and, as name=run95/runmax/lag95/stall ms, only the probes
+    whose figures changed since the last line. Every probe is on the
+    Tasks page.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        parts = [f"lag95={lag_p95()}ms lagmax={lag_max()}ms"]
+        if heap.free_low is not None:
+            # The one place the largest block is measured: right after a
+            # collection, so the probe's failed allocations find nothing
+            # left to collect
+            gc.collect()
+            heap.sample(probe_block=True)
+            parts.append(f"heap high={heap.alloc_high} low={heap.free_low} block={heap.largest}")
+        for p in probes.values():
+            figures = p.figures()
+            if figures != p.reported:
+                p.reported = figures
+                parts.append(f"{p.name}={'/'.join(str(f) for f in figures)}")
+        system_log(f"Monitor: {' '.join(parts)}")
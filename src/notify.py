@@ -0,0 +1,169 @@
+import os
+import uasyncio as asyncio
+import ujson
+
+import ahttp
+import monitor
+from logging import system_log
+from state import state
+
+URL = "https://ntfy.sh/charitylane_greenhouse"
+
+# Messages not yet sent are kept here while the service can't be reached
+OUTBOX = "outbox.json"
+OUTBOX_TMP = "outbox.tmp"
+
+# Retry delays after a failed send, in seconds: doubles up to the maximum
+BACKOFF = 5
+BACKOFF_MAX = 600
+
+
+class Notifier:
+    """
+    Outgoing notifications. send() only queues and returns at once; the
+    run() task posts the queue in order, retrying with exponential
+    backoff while Wi-Fi or the service is down.
+
+    A message with the same `key` as one still queued replaces it, so a
+    repeated alert is sent once with the latest text, and an identical
+    message already queued is not added again. The queue holds `size`
+    messages, dropping the oldest when full. While sending fails the
+    queue is kept in OUTBOX, so a reset doesn't lose it.
+    """
+
+    def __init__(self, url=URL, size=8):
+        self.url = url
+        self.size = size
+        self.queue = []  # [key, message], oldest first
+        self.wake = asyncio.Event()
+        self.offline = False
+        self.stored = False
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.reported = None
+
+    def send(self, message, key=None):
+        """Queue `message` for sending; never blocks."""
+        for entry in self.queue:
+            if (key is not None and entry[0] == key) or entry[1] == message:
+                entry[0], entry[1] = key, message
+                self.coalesced += 1
+                break
+        else:
+            if len(self.queue) >= self.size:
+                old = self.queue.pop(0)
+                self.dropped += 1
+                print(f"Notification queue full; dropped {old[1]!r}")
+                system_log(f"Notification queue full; dropped {old[1]!r}")
+            self.queue.append([key, message])
+        if self.offline:
+            # Left to the backoff, so alerts don't hammer a dead link
+            self.save()
+        else:
+            self.wake.set()
+
+    def retry_now(self):
+        """Cut a backoff short, e.g. once Wi-Fi is back."""
+        self.wake.set()
+
+    def save(self):
+        """Write the queue to OUTBOX, or remove OUTBOX once the queue is empty."""
+        try:
+            if self.queue:
+                with open(OUTBOX_TMP, "w") as f:
+                    ujson.dump(self.queue, f)
+                os.rename(OUTBOX_TMP, OUTBOX)
+                self.stored = True
+            elif self.stored:
+                os.remove(OUTBOX)
+                self.stored = False
+        except Exception as e:
+            print(f"Outbox not saved: {e}")
+            system_log(f"Outbox not saved: {e}")
+
+    def restore(self):
+        """At boot, queue what an earlier boot left in OUTBOX, ahead of anything new."""
+        try:
+            with open(OUTBOX) as f:
+                saved = ujson.load(f)
+        except OSError:
+            return
+        except ValueError as e:
+            print(f"Outbox not restored: {e}")
+            system_log(f"Outbox not restored: {e}")
+            return
+        self.stored = True
+        self.queue[:0] = [[key, message] for key, message in saved]
+        del self.queue[:-self.size]
+        print(f"{len(saved)} notification(s) from the outbox")
+        system_log(f"{len(saved)} notification(s) from the outbox")
+
+    async def post(self, message):
+        """Send one message; raises if it should be tried again later."""
+        response = await ahttp.post(
+            self.url,
+            data=message.encode("utf-8"),
+            headers={"Content-Type": "text/plain"},
+            timeout=10,
+        )
+        response.close()
+        status = response.status_code
+        if status == 429 or status >= 500:
+            raise OSError(f"HTTP {status}")
+        if status >= 300:
+            # Sending it again will not help
+            print(f"Notification rejected: HTTP {status}")
+            system_log(f"Notification rejected: HTTP {status}: {message!r}")
+            self.dropped += 1
+        else:
+            self.sent += 1
+
+    async def report(self):
+        """Hourly line in the system log, left out if nothing changed since the last."""
+        text = (
+            f"Notify: sent={self.sent} coalesced={self.coalesced} dropped={self.dropped} "
+            f"queued={len(self.queue)}{' offline' if self.offline else ''}"
+        )
+        if text != self.reported:
+            self.reported = text
+            system_log(text)
+
+    async def run(self):
+        """Supervisor task: sends the queue, backing off while sends fail."""
+        probe = monitor.probe("notify")
+        delay = BACKOFF
+        while True:
+            if not self.queue:
+                self.wake.clear()
+                await probe.wait(self.wake)
+                continue
+            message = self.queue[0][1]
+            try:
+                await self.post(message)
+            except Exception as e:
+                if not self.offline:
+                    print(f"Notification not sent, will retry: {e}")
+                    system_log(f"Notification not sent, will retry: {e}")
+                    self.offline = True
+                    self.save()
+                state.add_error("notify", e)
+                self.wake.clear()
+                await probe.wait(self.wake, delay)
+                delay = min(delay * 2, BACKOFF_MAX)
+                continue
+
+            # The entry may have been coalesced into while it was posted
+            if self.queue and self.queue[0][1] == message:
+                self.queue.pop(0)
+            delay = BACKOFF
+            if self.offline:
+                self.offline = False
+                print("Notifications sending again")
+                system_log("Notifications sending again")
+                state.clear_error("notify")
+            if self.stored:
+                self.save()
+
+
+notifier = Notifier()
@@ -0,0 +1,212 @@
+import uasyncio as asyncio
+import heapq
+import random
+import time
+
+import monitor
+from state import state
+from logging import system_log
+from utils import seconds_until
+
+# Job kinds
+INTERVAL = 0
+DAILY = 1
+ONCE = 2
+
+
+class Job:
+    """
+    A scheduled call of `fn`, a coroutine function. Run times, lag and
+    allocation go to the monitor probe of the same name; `runs`,
+    `skipped` (due while a job of the same name was still running, or
+    missed while behind) and `errors` are counted here.
+    """
+    __slots__ = (
+        "name", "fn", "kind", "period", "hour", "minute", "jitter", "timeout",
+        "due", "runs", "skipped", "errors", "probe", "reported",
+    )
+
+    def __init__(self, name, fn, kind, period=0, hour=0, minute=0, jitter=0, timeout=None):
+        self.name = name
+        self.fn = fn
+        self.kind = kind
+        self.period = period
+        self.hour = hour
+        self.minute = minute
+        self.jitter = jitter
+        self.timeout = timeout
+        self.due = 0
+        self.runs = 0
+        self.skipped = 0
+        self.errors = 0
+        self.probe = monitor.probe(name)
+        self.reported = (0, 0, 0)
+
+
+class Scheduler:
+    """
+    One task that runs every periodic job. Due times sit in a heap keyed
+    on milliseconds since the scheduler started, so they never wrap. The
+    scheduler sleeps until the earliest one, then starts every job due
+    within `coalesce_ms` in the same wake-up. Interval jobs run at a fixed
+    rate, so jobs with the same period stay in step; daily jobs are worked
+    out from local time after each run, so a clock sync takes effect the
+    next day. Jobs of the same name never run at the same time.
+    """
+
+    def __init__(self, coalesce_ms=500):
+        self.coalesce_ms = coalesce_ms
+        self.heap = []
+        self.seq = 0
+        self.elapsed = 0
+        self.last = time.ticks_ms()
+        # Names of the jobs running now
+        self.running = set()
+        # Delay of the last retry() of each name, for the backoff
+        self.backoff = {}
+        # Set by push(), so the sleep is worked out again
+        self.wake = asyncio.Event()
+
+    def now(self):
+        t = time.ticks_ms()
+        self.elapsed += time.ticks_diff(t, self.last)
+        self.last = t
+        return self.elapsed
+
+    def push(self, job, due):
+        if job.jitter:
+            due += random.randint(0, int(job.jitter * 1000))
+        job.due = due
+        # The sequence number keeps equal due times in insertion order
+        self.seq += 1
+        heapq.heappush(self.heap, (due, self.seq, job))
+        self.wake.set()
+
+    def every(self, name, fn, period, first=None, jitter=0, timeout=None):
+        """Run every `period` seconds, first after `first` (default one period)."""
+        job = Job(name, fn, INTERVAL, period=period, jitter=jitter, timeout=timeout)
+        self.push(job, self.now() + int((period if first is None else first) * 1000))
+        return job
+
+    def daily(self, name, fn, hour, minute=0, jitter=0, timeout=None):
+        """Run every day at `hour`:`minute` local time."""
+        job = Job(name, fn, DAILY, hour=hour, minute=minute, jitter=jitter, timeout=timeout)
+        self.push(job, self.now() + seconds_until(hour, minute) * 1000)
+        return job
+
+    def once(self, name, fn, delay, timeout=None):
+        """Run once, `delay` seconds from now."""
+        job = Job(name, fn, ONCE, timeout=timeout)
+        self.push(job, self.now() + int(delay * 1000))
+        return job
+
+    def pending(self, name, kind):
+        """The queued job called `name` of `kind`, or None."""
+        for entry in self.heap:
+            job = entry[2]
+            if job.name == name and job.kind == kind:
+                return job
+        return None
+
+    def retry(self, name, fn, delay, timeout=None):
+        """
+        Run `fn` once more after a failure. The first retry of `name` is
+        `delay` seconds away and each one after waits twice as long, but
+        never past the next daily run of `name`, which starts the backoff
+        again. Does nothing if a retry is already queued. Returns the
+        retry job, or None if the daily run is due first.
+        """
+        job = self.pending(name, ONCE)
+        if job is not None:
+            return job
+        delay = self.backoff[name] * 2 if name in self.backoff else delay
+        self.backoff[name] = delay
+        due = self.now() + int(delay * 1000)
+        daily = self.pending(name, DAILY)
+        if daily is not None and due >= daily.due:
+            return None
+        job = Job(name, fn, ONCE, timeout=timeout)
+        self.push(job, due)
+        return job
+
+    def reschedule(self, job, now):
+        if job.kind == INTERVAL:
+            period = int(job.period * 1000)
+            due = job.due + period
+            if due <= now:
+                # Fell behind: skip the missed runs rather than bunch them up
+                missed = (now - due) // period + 1
+                job.skipped += missed
+                due += missed * period
+            self.push(job, due)
+        elif job.kind == DAILY:
+            due = now + seconds_until(job.hour, job.minute) * 1000
+            # Started up to coalesce_ms early, the next hour:minute from
+            # now is the one just run; the next run is a day after it
+            if due - job.due < 12 * 3600 * 1000:
+                due += 24 * 3600 * 1000
+            self.push(job, due)
+
+    async def run_job(self, job, late):
+        probe = job.probe
+        probe.lag.add(max(0, late))
+        probe.begin()
+        try:
+            if job.timeout is None:
+                await job.fn()
+            else:
+                await asyncio.wait_for(job.fn(), job.timeout)
+            job.runs += 1
+        except Exception as e:
+            job.errors += 1
+            print(f"Scheduler: {job.name} failed: {e}")
+            system_log(f"Scheduler: {job.name} failed: {e}")
+            state.add_error(job.name, e)
+        finally:
+            probe.end()
+            self.running.discard(job.name)
+
+    async def run(self):
+        probe = monitor.probe("scheduler")
+        while True:
+            self.wake.clear()
+            if self.heap:
+                wait = self.heap[0][0] - self.now()
+            else:
+                wait = 1000
+            if wait > 0:
+                # Cut short if push() queues something sooner
+                await probe.wait(self.wake, wait / 1000)
+
+            now = self.now()
+            while self.heap and self.heap[0][0] <= now + self.coalesce_ms:
+                job = heapq.heappop(self.heap)[2]
+                if job.name in self.running:
+                    job.skipped += 1
+                else:
+                    self.running.add(job.name)
+                    if job.kind == DAILY:
+                        self.backoff.pop(job.name, None)
+                    asyncio.create_task(self.run_job(job, now - job.due))
+                self.reschedule(job, now)
+
+    async def report(self):
+        """
+        One line in the system log: runs since the last report, and the
+        jobs that skipped or failed since then as name=skipped/errors.
+        """
+        runs = 0
+        parts = []
+        for job in self.jobs():
+            last_runs, last_skipped, last_errors = job.reported
+            runs += job.runs - last_runs
+            if job.skipped != last_skipped or job.errors != last_errors:
+                parts.append(f"{job.name}={job.skipped - last_skipped}/{job.errors - last_errors}")
+            job.reported = (job.runs, job.skipped, job.errors)
+        system_log(f"Scheduler: {runs} runs{' ' if parts else ''}{' '.join(parts)}")
+
+    def jobs(self):
+        return sorted((entry[2] for entry in self.heap), key=lambda job: job.name)
+
+
+scheduler = Scheduler()
@@ -1,6 +1,7 @@
 import uasyncio as asyncio
 import time
 import math
+from array import array
 from picographics import PicoGraphics, DISPLAY_PICO_EXPLORER
 
 def fmt_degrees(value):
@@ -15,6 +16,18 @@ def fmt_percent(value):
         except (TypeError, ValueError):
             return "N/A"
 
+def fmt_on_off(value):
+        return "on" if value else "off"
+
+def fmt_count(value):
+        return f"{value}"
+
+def fmt_ms(value):
+        try:
+            return f"{value:.0f} ms"
+        except (TypeError, ValueError):
+            return "N/A"
+
 async def title(display, BG, GREEN):
     """
     Animated flower growth screen.
@@ -31,18 +44,94 @@ async def title(display, BG, GREEN):
     display.update()
     
     
-def clear_animation_area(display, BG, top_y=40):
+def clear_animation_area(display, BG, top_y=40, update=True):
     """
     Clears only the area below the title, leaving the title intact.
     
     :param display: PicoGraphics display object
     :param BG: background pen color
     :param top_y: the y-coordinate where the animation starts
+    :param update: push the cleared frame to the panel straight away
     """
     width, height = display.get_bounds()
     display.set_pen(BG)
     display.rectangle(0, top_y, width, height - top_y)
-    display.update()
+    # Whatever the retained layer remembers is gone now
+    retained.invalidate()
+    if update:
+        display.update()
+
+
+class Retained:
+    """
+    Retained-mode layer for the status screens.
+    Remembers the page on screen and the last string drawn in each
+    value box, so a refresh only repaints the boxes that changed and
+    only pushes those rectangles to the panel.
+
+    Every PicoGraphics display has partial_update(), but it does nothing
+    on drivers without windowed writes (the Explorer's ST7789 among
+    them), so it is only used when `partial` is set, from config.json
+    "partial_update"; otherwise a change pushes the whole frame.
+    """
+    TEXT_HEIGHT = 8  # bitmap8 font, unscaled
+
+    def __init__(self):
+        self.page = None
+        self.values = {}
+        self.dirty = []
+        self.partial = False
+
+    def invalidate(self):
+        self.page = None
+        self.values = {}
+
+    def mark(self, x, y, w, h):
+        self.dirty.append((x, y, w, h))
+
+    def begin(self, display, BG, page, top_y=40):
+        """
+        Start drawing `page`. Returns True when the page is new and the
+        static parts (title, labels) have to be drawn.
+        """
+        if page == self.page:
+            return False
+        clear_animation_area(display, BG, top_y, update=False)
+        self.page = page
+        width, height = display.get_bounds()
+        self.mark(0, top_y, width, height - top_y)
+        return True
+
+    def value(self, display, BG, pen, key, text, x, y, scale=2):
+        """Draw a value box, skipping it if the text has not changed."""
+        old = self.values.get(key)
+        if old is not None and old[0] == text:
+            return
+        w = display.measure_text(text, scale)
+        h = self.TEXT_HEIGHT * scale
+        self.values[key] = (text, w)
+        if old is not None:
+            # Blank the previous value before drawing the new one
+            display.set_pen(BG)
+            display.rectangle(x, y, old[1], h)
+            w = max(w, old[1])
+        display.set_pen(pen)
+        display.text(text, x, y, 200, scale)
+        self.mark(x, y, w, h)
+
+    def flush(self, display):
+        """Push the dirty rectangles, or nothing if nothing changed."""
+        if not self.dirty:
+            return
+        if self.partial:
+            for x, y, w, h in self.dirty:
+                display.partial_update(x, y, w, h)
+        else:
+            display.update()
+        self.dirty = []
+
+
+retained = Retained()
     
 async def menu(display, BG, WHITE, ORANGE):
     clear_animation_area(display, BG)
@@ -69,95 +158,229 @@ async def menu(display, BG, WHITE, ORANGE):
     display.text(f"Press Y for: ", 40, 195, 200, 2)
     display.set_pen(WHITE)
     display.text(f"Actuations and Errors", 40, 210, 200, 2)
-    
+
     display.update()
     await asyncio.sleep(0.5)
+
+
+async def boot_report(display, BG, WHITE, ORANGE, lines, seconds=10):
+    """
+    Boot profile from bootprof.lines(), one phase per row.
+    """
+    clear_animation_area(display, BG)
+    display.set_pen(ORANGE)
+    display.text("Boot (ms)", 10, 45, 220, 2)
+    display.set_pen(WHITE)
+    y = 65
+    for line in lines[:17]:
+        display.text(line, 10, y, 230, 1)
+        y += 10
+    display.update()
+    await asyncio.sleep(seconds)
+
     
-    
+# Flower animation geometry
+STEM_X = 120
+STEM_BASE = 210
+STEM_WIDTH = 3
+MAX_HEIGHT = 110
+GROWTH_STEP = 6
+FLOWER_Y = STEM_BASE - MAX_HEIGHT
+
+# Leaf positions relative to stem: (y, side, max_size)
+LEAF_STAGES = (
+    (55, -1, 10),
+    (70, 1, 12),
+    (85, -1, 14),
+    (100, 1, 14),
+)
+
+# Lookup tables, built on the first call to start_screen()
+_stem_offsets = None
+_leaf_heights = None
+_petal_points = None
+
+
+def _build_luts():
+    """
+    Precompute everything the animation used to work out per frame:
+    the stem sway per row, the leaf half-heights per column and the
+    petal centres per bud size.
+    """
+    global _stem_offsets, _leaf_heights, _petal_points
+    rows = MAX_HEIGHT + GROWTH_STEP
+    _stem_offsets = array("b", (int(4 * math.sin(h / 25)) for h in range(rows)))
+
+    _leaf_heights = [b""]
+    for size in range(1, max(stage[2] for stage in LEAF_STAGES) + 1):
+        _leaf_heights.append(bytes(
+            int(math.sqrt(size**2 - dx**2) * 0.6) for dx in range(-size, size + 1, 2)
+        ))
+
+    _petal_points = [None] * 29
+    for bud_size in range(11, 29):
+        points = bytearray()
+        for angle in range(0, 360, 30):
+            rad = math.radians(angle)
+            points.append(int(STEM_X + math.cos(rad) * (bud_size + 5)))
+            points.append(int(FLOWER_Y + math.sin(rad) * (bud_size + 5)))
+        _petal_points[bud_size] = bytes(points)
+
+
+def _leaf_growth(plant_height, stage):
+    y, side, max_size = stage
+    if plant_height <= y:
+        return 0
+    return max(0, min((plant_height - y) // 3, max_size))
+
+
+def _leaf_rect(stage, size):
+    y, side, max_size = stage
+    x = STEM_X + side * (10 + size // 2)
+    half = _leaf_heights[size][size // 2]
+    return (x - size, STEM_BASE - y - half, 2 * size + 1, 2 * half + 1)
+
+
+def _bud_size(plant_height):
+    if plant_height <= MAX_HEIGHT * 0.6:
+        return 0
+    growth_progress = (plant_height - MAX_HEIGHT * 0.6) / (MAX_HEIGHT * 0.4)
+    return min(int(5 + growth_progress * 50 * 0.5), 28)
+
+
+def _flower_rect(bud_size):
+    reach = bud_size + 1
+    if bud_size > 10:
+        reach += 5 + bud_size // 3
+    return (STEM_X - reach, FLOWER_Y - reach, 2 * reach + 1, 2 * reach + 1)
+
+
+def _overlaps(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def _union(rects):
+    x0 = min(r[0] for r in rects)
+    y0 = min(r[1] for r in rects)
+    x1 = max(r[0] + r[2] for r in rects)
+    y1 = max(r[1] + r[3] for r in rects)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
 async def start_screen(display, screen_running, BG, STEM, LEAF, BUD_BASE, PETALS, CENTER, GREEN):
     """
     Memory-light animated flower growth.
-    Redraws stem, leaves, and flower each frame.
+    Draws only what grew since the last frame, using precomputed tables.
     Stops if `screen_running` is cleared.
     """
     await asyncio.sleep(0.1)
 
-    max_height = 110
-    stem_x = 120
-    stem_base = 210
-    stem_width = 3
-
-    # Leaf positions relative to stem
-    leaf_stages = [
-        {"y": 55, "side": -1, "max_size": 10},
-        {"y": 70, "side": 1,  "max_size": 12},
-        {"y": 85, "side": -1, "max_size": 14},
-        {"y": 100, "side": 1, "max_size": 14},
-    ]
-
-    def draw_leaf(x, y, size, flip=False):
-        step = 2  # reduces pixel count, saves memory
-        for dx in range(-size, size + 1, step):
-            height = int(math.sqrt(size**2 - dx**2) * 0.6)
-            for dy in range(-height, height + 1, step):
-                display.pixel(x + (-dx if flip else dx), y + dy)
-
-    def draw_flower(x, y, growth):
-        bud_size = min(int(5 + growth * 0.5), 28)
+    if _stem_offsets is None:
+        _build_luts()
+
+    def draw_stem(first, last, band=None):
+        display.set_pen(STEM)
+        for h in range(first, last):
+            x = STEM_X + _stem_offsets[h] - STEM_WIDTH // 2
+            y = STEM_BASE - h
+            if band is None or _overlaps((x, y, STEM_WIDTH, 1), band):
+                display.rectangle(x, y, STEM_WIDTH, 1)
+
+    def draw_leaf(stage, size):
+        y, side, max_size = stage
+        x = STEM_X + side * (10 + size // 2)
+        y = STEM_BASE - y
+        display.set_pen(LEAF)
+        heights = _leaf_heights[size]
+        # Leaves are symmetric, so the flip of the left-hand leaves is a no-op
+        for i, dx in enumerate(range(-size, size + 1, 2)):
+            height = heights[i]
+            for dy in range(-height, height + 1, 2):
+                display.pixel(x + dx, y + dy)
+
+    def draw_flower(bud_size):
         display.set_pen(BUD_BASE)
-        display.circle(x, y, bud_size)
+        display.circle(STEM_X, FLOWER_Y, bud_size)
 
         if bud_size > 10:
             display.set_pen(PETALS)
-            for angle in range(0, 360, 30):
-                rad = math.radians(angle)
-                px = int(x + math.cos(rad) * (bud_size + 5))
-                py = int(y + math.sin(rad) * (bud_size + 5))
-                display.circle(px, py, bud_size // 3)
+            points = _petal_points[bud_size]
+            for i in range(0, len(points), 2):
+                display.circle(points[i], points[i + 1], bud_size // 3)
 
         if bud_size > 12:
             display.set_pen(CENTER)
-            display.circle(x, y, bud_size // 3)
+            display.circle(STEM_X, FLOWER_Y, bud_size // 3)
 
     plant_height = 0
+    drawn_height = 0
+    leaves_drawn = [0] * len(LEAF_STAGES)
+    bud_drawn = 0
+    clear_animation_area(display, BG, update=False)
 
     while screen_running.is_set():
-        # Clear only animation area (optional, keep stem redraw simple)
-        width, height = display.get_bounds()
-        display.set_pen(BG)
-        display.rectangle(0, 40, width, height - 40)
-
-        # Draw stem
-        display.set_pen(STEM)
-        for h in range(plant_height):
-            offset = int(4 * math.sin(h / 25))
-            display.rectangle(stem_x + offset - stem_width // 2, stem_base - h, stem_width, 1)
+        cleared = []
+        dirty = []
 
-        # Draw leaves
-        display.set_pen(LEAF)
-        for leaf in leaf_stages:
-            if plant_height > leaf["y"]:
-                growth = min((plant_height - leaf["y"]) // 3, leaf["max_size"])
-                if growth > 0:
-                    draw_leaf(stem_x + (leaf["side"] * (10 + growth // 2)),
-                              stem_base - leaf["y"],
-                              growth,
-                              flip=(leaf["side"] < 0))
-
-        # Draw flower bud
-        if plant_height > max_height * 0.6:
-            growth_progress = (plant_height - max_height * 0.6) / (max_height * 0.4)
-            draw_flower(stem_x, stem_base - max_height, growth_progress * 50)
-
-        display.update()
+        # Clear leaves and flower that have grown since the last frame
+        leaves_now = [_leaf_growth(plant_height, stage) for stage in LEAF_STAGES]
+        display.set_pen(BG)
+        for i, stage in enumerate(LEAF_STAGES):
+            if leaves_drawn[i] and leaves_now[i] != leaves_drawn[i]:
+                cleared.append(_leaf_rect(stage, leaves_drawn[i]))
+        bud_now = _bud_size(plant_height)
+        if bud_drawn and bud_now != bud_drawn:
+            cleared.append(_flower_rect(bud_drawn))
+        for rect in cleared:
+            display.rectangle(*rect)
+        dirty.extend(cleared)
+
+        # New stem rows, plus any rows under a cleared area
+        if plant_height > drawn_height:
+            draw_stem(drawn_height, plant_height)
+            dirty.append((STEM_X - 6, STEM_BASE - plant_height + 1, 12, plant_height - drawn_height))
+        for rect in cleared:
+            draw_stem(0, min(drawn_height, plant_height), rect)
+
+        # Leaves that grew or sat under a cleared area
+        for i, stage in enumerate(LEAF_STAGES):
+            size = leaves_now[i]
+            if size <= 0:
+                continue
+            rect = _leaf_rect(stage, size)
+            if size != leaves_drawn[i] or any(_overlaps(rect, c) for c in cleared):
+                draw_leaf(stage, size)
+                dirty.append(rect)
+
+        # Flower goes on top of everything it overlaps
+        if bud_now:
+            rect = _flower_rect(bud_now)
+            if bud_now != bud_drawn or any(_overlaps(rect, d) for d in dirty):
+                draw_flower(bud_now)
+                dirty.append(rect)
+
+        drawn_height = plant_height
+        leaves_drawn = leaves_now
+        bud_drawn = bud_now
+
+        if dirty:
+            retained.mark(*_union(dirty))
+            retained.flush(display)
 
         # Increment growth
-        if plant_height < max_height:
-            plant_height += 6
+        if plant_height < MAX_HEIGHT:
+            plant_height += GROWTH_STEP
             await asyncio.sleep(0.05)  # growth speed
         else:
             await asyncio.sleep(0.5)
             plant_height = 0
+            drawn_height = 0
+            leaves_drawn = [0] * len(LEAF_STAGES)
+            bud_drawn = 0
+            clear_animation_area(display, BG, update=False)
+            width, height = display.get_bounds()
+            retained.mark(0, 40, width, height - 40)
+            retained.flush(display)
 
 
 async def start_up_success(display, BG, WHITE, GREEN):
@@ -208,171 +431,3 @@ async def start_up_fail(display, BG, RED, GREEN):
     display.set_pen(RED)
     display.text("Startup FAILED", 40, 50, 200, 4)
     display.update()
-
-
-async def screen_temperature_inside(display, BG, WHITE, ORANGE, temp_celc_current, temp_celc_average, temp_celc_low, temp_celc_high):
-    clear_animation_area(display, BG)
-    # Title
-    display.set_pen(WHITE)
-    display.text("Temperature (Inside)", 40, 50, 200, 3)
-    # Current label
-    display.set_pen(ORANGE)
-    display.text(f"Current: ", 40, 105, 200, 2)
-    # Current value
-    display.set_pen(WHITE)
-    display.text(fmt_degrees(temp_celc_current), 132, 105, 200, 2)
-    # Average label
-    display.set_pen(ORANGE)
-    display.text(f"Average: ", 40, 130, 200, 2)
-    # Average value
-    display.set_pen(WHITE)
-    display.text(fmt_degrees(temp_celc_average), 132, 130, 200, 2)
-    # Low label
-    display.set_pen(ORANGE)
-    display.text(f"Low: ", 40, 155, 200, 2)
-    # Low value
-    display.set_pen(WHITE)
-    display.text(fmt_degrees(temp_celc_low), 90, 155, 200, 2)
-    # High label
-    display.set_pen(ORANGE)
-    display.text(f"High: ", 40, 180, 200, 2)
-    # High value
-    display.set_pen(WHITE)
-    display.text(fmt_degrees(temp_celc_high), 90, 180, 200, 2)
-    
-    display.update()
-    await asyncio.sleep(0.5)
-    
-
-async def screen_temperature_outside(display, BG, WHITE, ORANGE, temp_celc_outside_current, temp_celc_outside_average, temp_celc_outside_low, temp_celc_outside_high):
-    clear_animation_area(display, BG)
-    # Title
-    display.set_pen(WHITE)
-    display.text("Temperature (Outside)", 40, 50, 200, 3)
-    # Current label
-    display.set_pen(ORANGE)
-    display.text(f"Current: ", 40, 105, 200, 2)
-    # Current value
-    display.set_pen(WHITE)
-    display.text(fmt_degrees(temp_celc_outside_current), 132, 105, 200, 2)
-    # Average label
-    display.set_pen(ORANGE)
-    display.text(f"Average: ", 40, 130, 200, 2)
-    # Average value
-    display.set_pen(WHITE)
-    display.text(fmt_degrees(temp_celc_outside_average), 132, 130, 200, 2)
-    # Low label
-    display.set_pen(ORANGE)
-    display.text(f"Low: ", 40, 155, 200, 2)
-    # Low value
-    display.set_pen(WHITE)
-    display.text(fmt_degrees(temp_celc_outside_low), 90, 155, 200, 2)
-    # High label
-    display.set_pen(ORANGE)
-    display.text(f"High: ", 40, 180, 200, 2)
-    # High value
-    display.set_pen(WHITE)
-    display.text(fmt_degrees(temp_celc_outside_high), 90, 180, 200, 2)
-    
-    display.update()
-    await asyncio.sleep(0.5)
-
-async def screen_humidity(display, BG, WHITE, ORANGE, rh_current, rh_average, rh_low, rh_high):
-    clear_animation_area(display, BG)
-    # Title
-    display.set_pen(WHITE)
-    display.text("Humidity (Inside)", 40, 50, 200, 3)
-    # Current label
-    display.set_pen(ORANGE)
-    display.text(f"Current: ", 40, 105, 200, 2)
-    # Current value
-    display.set_pen(WHITE)
-    display.text(fmt_percent(rh_current), 132, 105, 200, 2)
-    # Average label
-    display.set_pen(ORANGE)
-    display.text(f"Average: ", 40, 130, 200, 2)
-    # Average value
-    display.set_pen(WHITE)
-    display.text(fmt_percent(rh_average), 132, 130, 200, 2)
-    # Low label
-    display.set_pen(ORANGE)
-    display.text(f"Low: ", 40, 155, 200, 2)
-    # Low value
-    display.set_pen(WHITE)
-    display.text(fmt_percent(rh_low), 90, 155, 200, 2)
-    # High label
-    display.set_pen(ORANGE)
-    display.text(f"High: ", 40, 180, 200, 2)
-    # High value
-    display.set_pen(WHITE)
-    display.text(fmt_percent(rh_high), 90, 180, 200, 2)
-    
-    display.update()
-    await asyncio.sleep(0.5)
-
-
-async def screen_actuations(display, BG, WHITE, ORANGE, fan_on, roof_open, heat_pad_on, error_count):
-    clear_animation_area(display, BG)
-    # Title
-    display.set_pen(WHITE)
-    display.text("Actuations and Errors", 40, 50, 200, 3)
-    # Fan label
-    display.set_pen(ORANGE)
-    display.text(f"Fan: ", 40, 105, 200, 2)
-    # Fan value
-    display.set_pen(WHITE)
-    display.text(f"{'on' if fan_on else 'off'}", 84, 105, 200, 2)
-    # Roof label
-    display.set_pen(ORANGE)
-    display.text(f"Roof Opening: ", 40, 130, 200, 2)
-    # Roof value
-    display.set_pen(WHITE)
-    display.text(fmt_percent(roof_open), 185, 130, 200, 2)
-    # Heating label
-    display.set_pen(ORANGE)
-    display.text(f"Heating: ", 40, 155, 200, 2)
-    # Heating value
-    display.set_pen(WHITE)
-    display.text(f"{'on' if heat_pad_on else 'off'}", 127, 155, 200, 2)
-    # Error label
-    display.set_pen(ORANGE)
-    display.text(f"Errors: ", 40, 180, 200, 2)
-    # Error value
-    display.set_pen(WHITE)
-    display.text(f"{error_count}", 117, 180, 200, 2)
-    
-    display.update() 
-    await asyncio.sleep(0.5)
-
-
-# TESTING
-
-"""
-async def main():
-    
-    display = PicoGraphics(display=DISPLAY_PICO_EXPLORER)
-
-    # Screen Colours
-    BG       = display.create_pen(15, 25, 35)     # deep background
-    STEM     = display.create_pen(30, 160, 60)    # stem green
-    LEAF     = display.create_pen(50, 210, 100)   # leaf green
-    BUD_BASE = display.create_pen(60, 180, 80)    # green bud base
-    PETALS   = display.create_pen(240, 120, 160)  # petals (pink)
-    CENTER   = display.create_pen(255, 230, 120)  # yellow centre
-    WHITE    = display.create_pen(255, 255, 255)
-    GREEN = display.create_pen(0, 255, 0)
-    RED = display.create_pen(255, 0, 0)
-    ORANGE = display.create_pen(255, 165, 0)
-    
-    screen_running = asyncio.Event()
-    screen_running.set()
-    
-    await title(display, BG, GREEN)
-    await screen_temperature_inside(display, BG, WHITE, ORANGE, 25, 24, 18, 28)
-
-# Run the event loop
-asyncio.run(main())
-"""
-
-
-
@@ -1,20 +1,22 @@
-from breakout_bme280 import BreakoutBME280
-from breakout_ltr559 import BreakoutLTR559
-from logging import system_log
+from lazy import lazy
 from pimoroni_i2c import PimoroniI2C
 from pimoroni import PICO_EXPLORER_I2C_PINS
 from machine import Pin, ADC
 from moisture import Moisture
 import uasyncio as asyncio
-import onewire
-import ds18x20
 import time
 
+# Sensor drivers load on the first reading rather than at boot
+breakout_bme280 = lazy("breakout_bme280")
+breakout_ltr559 = lazy("breakout_ltr559")
+onewire = lazy("onewire")
+ds18x20 = lazy("ds18x20")
+
 async def sensor():
     """Set-up hardware connections"""
     i2c = PimoroniI2C(**PICO_EXPLORER_I2C_PINS) #explorer base
-    bme = BreakoutBME280(i2c, address=0x76) # temp and rh
-    ltr = BreakoutLTR559(i2c) # Lux
+    bme = breakout_bme280.BreakoutBME280(i2c, address=0x76) # temp and rh
+    ltr = breakout_ltr559.BreakoutLTR559(i2c) # Lux
     external_thermometer = Pin(0, Pin.IN)
     one_wire_sensor = ds18x20.DS18X20(onewire.OneWire(external_thermometer)) # also part of external temperature sensor
     moisture = Moisture(5) # Pin number
@@ -60,7 +62,7 @@ async def get_lux(ltr, no_reads=2, delay=0.1):
     # now trust readings
     reading = ltr.get_reading()
     if reading is not None:
-        return reading[BreakoutLTR559.LUX]
+        return reading[breakout_ltr559.BreakoutLTR559.LUX]
     raise ValueError("Lux Sensor returned None") 
     
 
@@ -0,0 +1,158 @@
+import binascii
+import os
+import struct
+import time
+
+from logging import system_log
+from scheduler import scheduler
+from state import state
+from trends import TRENDS
+
+PATH = "snapshot.bin"
+TMP_PATH = "snapshot.tmp"
+MAGIC = b"ICUS"
+VERSION = 2
+
+# magic, version, saved at, roof, flag bits, controller memory, then the
+# nine stats, latitude, longitude, temperature at sunrise, sunset time,
+# and when the geo-IP and forecast values were fetched
+FIXED = "<4sBIBBff9ffffiII"
+FLAGS = ("fan_on", "heat_pad_on", "cover_on", "is_night")
+FLOATS = (
+    "prev_temp", "prev_rh",
+    "temp_celc_average", "temp_celc_outside_average", "rh_average",
+    "temp_celc_low", "temp_celc_outside_low", "rh_low",
+    "temp_celc_high", "temp_celc_outside_high", "rh_high",
+    "latitude", "longitude", "temp_at_sunrise",
+)
+STRINGS = ("timezone", "sunrise_hour", "sunrise_time", "last_goodnight_date")
+
+NAN = float("nan")
+
+# Set while a save is queued, so bursts of changes write once
+_pending = False
+
+
+def _float(value):
+    return NAN if value is None else value
+
+
+def _unfloat(value):
+    return None if value != value else value
+
+
+def encode():
+    """The snapshot as bytes: fixed fields, strings, trends, CRC32."""
+    flags = 0
+    for bit, name in enumerate(FLAGS):
+        if getattr(state, name):
+            flags |= 1 << bit
+    floats = [_float(getattr(state, name)) for name in FLOATS]
+    sunset = state.sunset_time if state.sunset_time is not None else -1
+    fetched = (state.geo_fetched_at or 0, state.weather_fetched_at or 0)
+    parts = [struct.pack(FIXED, MAGIC, VERSION, time.time(), state.roof_open, flags, *floats, sunset, *fetched)]
+
+    for name in STRINGS:
+        text = (getattr(state, name) or "").encode()
+        parts.append(bytes((len(text),)) + text)
+
+    for trend in TRENDS.values():
+        parts.append(struct.pack("<i", -1 if trend.head is None else trend.head))
+        parts.append(bytes(trend.lo))
+        parts.append(bytes(trend.hi))
+
+    body = b"".join(parts)
+    return body + struct.pack("<I", binascii.crc32(body) & 0xFFFFFFFF)
+
+
+def decode(data):
+    """Apply a snapshot to the state and trends; returns the time it was saved."""
+    body = data[:-4]
+    if struct.unpack("<I", data[-4:])[0] != binascii.crc32(body) & 0xFFFFFFFF:
+        raise ValueError("bad checksum")
+    fixed = struct.unpack_from(FIXED, body)
+    if fixed[0] != MAGIC or fixed[1] != VERSION:
+        raise ValueError("unknown format")
+    saved_at, roof, flags = fixed[2:5]
+    floats = fixed[5:5 + len(FLOATS)]
+    sunset, geo_at, weather_at = fixed[-3:]
+
+    pos = struct.calcsize(FIXED)
+    strings = []
+    for _ in STRINGS:
+        n = body[pos]
+        strings.append(body[pos + 1:pos + 1 + n].decode() or None)
+        pos += 1 + n
+
+    with state.batch():
+        state.roof_open = roof
+        for bit, name in enumerate(FLAGS):
+            setattr(state, name, bool(flags & (1 << bit)))
+        for name, value in zip(FLOATS, floats):
+            setattr(state, name, _unfloat(value))
+        state.sunset_time = None if sunset < 0 else sunset
+        state.geo_fetched_at = geo_at or None
+        state.weather_fetched_at = weather_at or None
+        for name, value in zip(STRINGS, strings):
+            setattr(state, name, value)
+
+    for trend in TRENDS.values():
+        head = struct.unpack_from("<i", body, pos)[0]
+        pos += 4
+        columns = "<%dh" % trend.columns
+        for values in (trend.lo, trend.hi):
+            for i, v in enumerate(struct.unpack_from(columns, body, pos)):
+                values[i] = v
+            pos += 2 * trend.columns
+        trend.head = None if head < 0 else head
+        trend.version += 1
+
+    return saved_at
+
+
+def save():
+    """Write the snapshot to a temporary file and rename it over the old one."""
+    data = encode()
+    with open(TMP_PATH, "wb") as f:
+        f.write(data)
+    os.rename(TMP_PATH, PATH)
+
+
+def restore():
+    """Load the last snapshot, if there is a good one. Returns True if it was applied."""
+    start = time.ticks_ms()
+    try:
+        with open(PATH, "rb") as f:
+            data = f.read()
+    except OSError:
+        return False
+    try:
+        saved_at = decode(data)
+    except Exception as e:
+        print(f"Snapshot not restored: {e}")
+        system_log(f"Snapshot not restored: {e}")
+        return False
+    took = time.ticks_diff(time.ticks_ms(), start)
+    print(f"Snapshot restored in {took} ms: roof {state.roof_open}%")
+    system_log(f"Snapshot restored in {took} ms (saved at {saved_at}): roof {state.roof_open}%")
+    return True
+
+
+async def save_job():
+    global _pending
+    _pending = False
+    try:
+        save()
+        state.clear_error("snapshot")
+    except Exception as e:
+        print(f"Snapshot save failed: {e}")
+        system_log(f"Snapshot save failed: {e}")
+        state.add_error("snapshot", e)
+
+
+def request(delay=2):
+    """Queue a save `delay` seconds from now, unless one is already queued."""
+    global _pending
+    if not _pending:
+        _pending = True
+        scheduler.once("snapshot", save_job, delay)
@@ -1,59 +1,161 @@
 # State and Constant Values
-
-# Constants
-record_interval = 5 
-cloud_upload_interval = 5
-water_me_threshold = 25
-
-# States
-roof_open = 0
-fan_on = False
-irrigation_on = False
-heat_pad_on = False
-
-temp_celc_current = None
-rh_current = None
-temp_celc_outside_current = None
-lux_current = None
-
-temp_celc_average = None
-temp_celc_outside_average = None
-rh_average = None
-
-temp_celc_low = None
-temp_celc_outside_low = None
-rh_low = None
-
-temp_celc_high = None
-temp_celc_outside_high = None
-rh_high = None
-
-last_goodnight_date = None
-is_night = False
-cover_on = False
-
-timezone = None
-latitude = None
-longitude = None
-
-sunset_time = None
-sunrise_hour = None
-sunrise_time = None
-temp_at_sunrise = None
-
-rtc = None
-
-error_count = []
-
-def add_error(name: str):
-    if name not in error_count:
-        error_count.append(name)
-
-
-def clear_error(name: str):
-    if name in error_count:
-        error_count.remove(name)
-
-
-def error_total() -> int:
-    return len(error_count)
+import uasyncio as asyncio
+
+from errors import errors
+from logging import system_log
+
+# Field table: name, type, initial value. Any field may also hold None.
+FIELDS = (
+    # Constants
+    ("record_interval", int, 5),
+    ("cloud_upload_interval", int, 5),
+    ("water_me_threshold", int, 25),
+
+    # States
+    ("roof_open", int, 0),
+    ("fan_on", bool, False),
+    ("irrigation_on", bool, False),
+    ("heat_pad_on", bool, False),
+
+    ("temp_celc_current", float, None),
+    ("rh_current", float, None),
+    ("temp_celc_outside_current", float, None),
+    ("lux_current", float, None),
+
+    ("temp_celc_average", float, None),
+    ("temp_celc_outside_average", float, None),
+    ("rh_average", float, None),
+
+    ("temp_celc_low", float, None),
+    ("temp_celc_outside_low", float, None),
+    ("rh_low", float, None),
+
+    ("temp_celc_high", float, None),
+    ("temp_celc_outside_high", float, None),
+    ("rh_high", float, None),
+
+    # Controller memory, kept here so a snapshot can restore it
+    ("prev_temp", float, None),
+    ("prev_rh", float, None),
+
+    ("last_goodnight_date", str, None),
+    ("is_night", bool, False),
+    ("cover_on", bool, False),
+
+    ("timezone", str, None),
+    # Seconds east of UTC now (DST included), from the last clock sync
+    ("utc_offset", int, None),
+    ("latitude", float, None),
+    ("longitude", float, None),
+
+    ("sunset_time", int, None),
+    ("sunrise_hour", str, None),
+    ("sunrise_time", str, None),
+    ("temp_at_sunrise", float, None),
+    # The whole forecast (forecast.Forecast), for queries during the day
+    ("forecast", object, None),
+
+    # When the geo-IP and forecast values were fetched, for their TTLs
+    ("geo_fetched_at", int, None),
+    ("weather_fetched_at", int, None),
+
+    ("rtc", object, None),
+
+    # Number of tasks failing now; see errors.py for the history
+    ("errors_active", int, 0),
+)
+
+_TYPES = {name: kind for name, kind, _ in FIELDS}
+
+
+class Store:
+    """
+    The shared state, one slot per field in FIELDS.
+
+    Assigning a field checks its type (an int is accepted for a float)
+    and, if the value changed, notifies the subscribers of that field.
+    Inside `with state.batch():` notifications are held back and each
+    subscriber is called once at the end with every field that changed.
+    """
+    __slots__ = tuple(name for name, _, _ in FIELDS) + ("_subscribers", "_depth", "_pending")
+
+    def __init__(self):
+        for name, kind, initial in FIELDS:
+            object.__setattr__(self, name, initial)
+        object.__setattr__(self, "_subscribers", [])
+        object.__setattr__(self, "_depth", 0)
+        object.__setattr__(self, "_pending", [])
+
+    def __setattr__(self, name, value):
+        kind = _TYPES.get(name)
+        if kind is None:
+            raise AttributeError(f"state has no field {name}")
+        if value is not None and kind is not object and not isinstance(value, kind):
+            if kind is float and isinstance(value, int):
+                value = float(value)
+            else:
+                raise TypeError(f"state.{name} must be {kind.__name__}, not {type(value).__name__}")
+        if getattr(self, name) == value:
+            return
+        object.__setattr__(self, name, value)
+        self.changed(name)
+
+    def changed(self, name):
+        """Notify `name`'s subscribers, or queue it until the batch ends."""
+        if self._depth:
+            if name not in self._pending:
+                self._pending.append(name)
+        else:
+            self.notify((name,))
+
+    def notify(self, names):
+        for keys, callback in self._subscribers:
+            if keys is None or any(name in keys for name in names):
+                try:
+                    callback(names)
+                except Exception as e:
+                    print(f"State subscriber error: {e}")
+                    system_log(f"State subscriber error: {e}")
+
+    def subscribe(self, keys, callback):
+        """Call `callback(changed_names)` when any of `keys` changes; None means any field."""
+        self._subscribers.append((keys, callback))
+
+    def unsubscribe(self, callback):
+        """Stop calling `callback`, under whatever keys it was subscribed."""
+        self._subscribers[:] = [entry for entry in self._subscribers if entry[1] is not callback]
+
+    def event(self, *keys):
+        """An asyncio.Event set whenever one of `keys` (any field if none) changes."""
+        flag = asyncio.Event()
+        self.subscribe(keys or None, lambda names: flag.set())
+        return flag
+
+    def batch(self):
+        return self
+
+    def __enter__(self):
+        object.__setattr__(self, "_depth", self._depth + 1)
+        return self
+
+    def __exit__(self, *exc):
+        object.__setattr__(self, "_depth", self._depth - 1)
+        if self._depth == 0 and self._pending:
+            names = tuple(self._pending)
+            self._pending.clear()
+            self.notify(names)
+        return False
+
+    def add_error(self, name: str, message=None):
+        if errors.add(name, message):
+            self.errors_active = errors.active
+
+    def clear_error(self, name: str):
+        if errors.clear(name):
+            self.errors_active = errors.active
+
+    def error_total(self) -> int:
+        return self.errors_active
+
+
+state = Store()
@@ -0,0 +1,99 @@
+import math
+import time
+from array import array
+
+from logging import system_log
+
+# cos of the zenith at sunrise and sunset: the sun's centre 0.833° below
+# the horizon, for refraction and the sun's radius
+COS_ZENITH = math.cos(math.radians(90.833))
+
+# Stored for a day the sun never rises, or never sets; times are minutes
+# from UTC midnight, so these make every minute night, or day
+POLAR_NIGHT = (0, 0)
+POLAR_DAY = (-1440, 2880)
+
+
+def is_leap(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def sun_times(latitude, longitude, year, yday):
+    """
+    (sunrise, sunset) in minutes from UTC midnight on day `yday` (1 is
+    1 January) of `year`, from NOAA's general solar position equations.
+    Good to a minute or two away from the poles; either may fall before 0
+    or after 1440 far from Greenwich.
+    """
+    days = 366 if is_leap(year) else 365
+    # Fractional year at noon, in radians
+    g = 2 * math.pi / days * (yday - 1)
+    c1, s1 = math.cos(g), math.sin(g)
+    c2, s2 = math.cos(2 * g), math.sin(2 * g)
+    c3, s3 = math.cos(3 * g), math.sin(3 * g)
+    eqtime = 229.18 * (0.000075 + 0.001868 * c1 - 0.032077 * s1 - 0.014615 * c2 - 0.040849 * s2)
+    decl = 0.006918 - 0.399912 * c1 + 0.070257 * s1 - 0.006758 * c2 + 0.000907 * s2 - 0.002697 * c3 + 0.00148 * s3
+
+    lat = math.radians(latitude)
+    cos_ha = COS_ZENITH / (math.cos(lat) * math.cos(decl)) - math.tan(lat) * math.tan(decl)
+    if cos_ha >= 1:
+        return POLAR_NIGHT
+    if cos_ha <= -1:
+        return POLAR_DAY
+    ha = math.degrees(math.acos(cos_ha))
+    noon = 720 - 4 * longitude - eqtime
+    return round(noon - 4 * ha), round(noon + 4 * ha)
+
+
+class SunTable:
+    """
+    Sunrise and sunset for every day of one year at one place, as int16
+    minutes from UTC midnight: about 1.5 KB, and a lookup is an index.
+    """
+
+    def __init__(self, latitude, longitude, year):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.year = year
+        self.days = 366 if is_leap(year) else 365
+        self.times = array("h")
+        for yday in range(1, self.days + 1):
+            self.times.extend(sun_times(latitude, longitude, year, yday))
+
+    def day(self, yday):
+        """(sunrise, sunset) for day `yday`, held to the year's first and last day."""
+        i = 2 * (min(max(yday, 1), self.days) - 1)
+        return self.times[i], self.times[i + 1]
+
+    def is_day(self, yday, minute):
+        """Whether the sun is up at `minute` from UTC midnight on day `yday`."""
+        # A day's times can run past either midnight, so check the days
+        # either side too
+        for d, m in ((yday, minute), (yday - 1, minute + 1440), (yday + 1, minute - 1440)):
+            rise, set_ = self.day(d)
+            if rise <= m < set_:
+                return True
+        return False
+
+
+_table = None
+
+
+def table(latitude, longitude, year):
+    """The SunTable for a place and year, built on first use and kept."""
+    global _table
+    t = _table
+    if t is None or t.year != year or t.latitude != latitude or t.longitude != longitude:
+        start = time.ticks_ms()
+        t = _table = SunTable(latitude, longitude, year)
+        took = time.ticks_diff(time.ticks_ms(), start)
+        print(f"Sun table for {year} built in {took} ms")
+        system_log(f"Sun table for {year} at {latitude}, {longitude} built in {took} ms")
+    return t
+
+
+def is_night(latitude, longitude, utc):
+    """Whether the sun is down at `utc`, epoch seconds in UTC."""
+    t = time.gmtime(int(utc))
+    return not table(latitude, longitude, t[0]).is_day(t[7], t[3] * 60 + t[4])
+
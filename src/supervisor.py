@@ -0,0 +1,128 @@
+import uasyncio as asyncio
+import time
+import machine
+
+import monitor
+from state import state
+from logging import system_log
+
+
+class Job:
+    """
+    One supervised task. `factory` builds a fresh coroutine for every
+    (re)start. `deadline` is how many seconds one iteration may run,
+    measured from the task's monitor probe waking up, before the task
+    counts as stalled.
+    """
+    __slots__ = ("name", "factory", "critical", "deadline", "task", "failures", "started", "stalled", "waiting")
+
+    def __init__(self, name, factory, critical=False, deadline=None):
+        self.name = name
+        self.factory = factory
+        self.critical = critical
+        self.deadline = deadline
+        self.task = None
+        self.failures = 0
+        self.started = None
+        self.stalled = False
+        self.waiting = False
+
+
+class Supervisor:
+    """
+    Runs every job, restarts one that raises, returns or stalls with
+    exponential backoff, and feeds the hardware watchdog only while every
+    critical job is alive.
+
+    The heartbeat is the job's monitor probe: between probe.sleep() and
+    probe.wait() calls the probe holds the time it woke, so an iteration
+    that has not reached its next wait within `deadline` seconds is
+    cancelled and restarted. A stall that blocks the whole loop stops the
+    feeding instead, and the watchdog resets the board after `watchdog_ms`.
+    """
+
+    def __init__(self, watchdog_ms=8000, check_ms=1000, backoff=1, backoff_max=60, max_failures=5, healthy_after=600):
+        self.jobs = []
+        self.watchdog_ms = watchdog_ms
+        self.check_ms = check_ms
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.max_failures = max_failures
+        self.healthy_after = healthy_after
+        self.wdt = None
+
+    def add(self, name, factory, critical=False, deadline=None):
+        self.jobs.append(Job(name, factory, critical, deadline))
+
+    def alive(self, job):
+        """Running, or backing off without having failed too often in a row."""
+        if job.failures > self.max_failures:
+            return False
+        return job.task is not None or job.waiting
+
+    def check(self):
+        now = time.ticks_ms()
+        for job in self.jobs:
+            probe = monitor.probes.get(job.name)
+            if job.task is None or job.deadline is None or probe is None or probe.woke is None:
+                continue
+            if time.ticks_diff(now, probe.woke) > job.deadline * 1000:
+                print(f"Supervisor: {job.name} stalled for over {job.deadline}s")
+                system_log(f"Supervisor: {job.name} stalled for over {job.deadline}s")
+                job.stalled = True
+                job.task.cancel()
+
+    async def keep(self, job):
+        probe = monitor.probe(job.name) if job.deadline is not None else None
+        while True:
+            if probe is not None:
+                # Time the first iteration too, before the task's first wait
+                probe.begin()
+            job.started = time.ticks_ms()
+            job.stalled = False
+            job.task = asyncio.create_task(job.factory())
+            try:
+                await job.task
+                reason = "exited"
+            except asyncio.CancelledError:
+                if not job.stalled:
+                    raise
+                reason = "stalled"
+            except Exception as e:
+                reason = f"failed: {e}"
+            job.task = None
+            if probe is not None:
+                probe.woke = None
+
+            if time.ticks_diff(time.ticks_ms(), job.started) > self.healthy_after * 1000:
+                job.failures = 0
+            job.failures += 1
+            delay = min(self.backoff * 2 ** (job.failures - 1), self.backoff_max)
+            print(f"Supervisor: {job.name} {reason}; restart {job.failures} in {delay}s")
+            system_log(f"Supervisor: {job.name} {reason}; restart {job.failures} in {delay}s")
+            state.add_error(job.name, reason)
+            if job.critical and job.failures == self.max_failures + 1:
+                system_log(f"Supervisor: {job.name} keeps failing; letting the watchdog reset the board")
+
+            job.waiting = True
+            await asyncio.sleep(delay)
+            job.waiting = False
+
+    async def run(self):
+        for job in self.jobs:
+            asyncio.create_task(self.keep(job))
+
+        if self.watchdog_ms:
+            self.wdt = machine.WDT(timeout=self.watchdog_ms)
+            system_log(f"Supervisor: watchdog started ({self.watchdog_ms} ms)")
+
+        while True:
+            await asyncio.sleep_ms(self.check_ms)
+            self.check()
+            if self.wdt is None:
+                continue
+            for job in self.jobs:
+                if job.critical and not self.alive(job):
+                    break
+            else:
+                self.wdt.feed()
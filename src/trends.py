@@ -0,0 +1,96 @@
+import time
+from array import array
+
+# Marks a column with no samples
+EMPTY = -32768
+
+
+class Trend:
+    """
+    Bounded 24h history for one channel, kept as min/max per screen column.
+    Each sample is folded into the column for its time bucket as it
+    arrives, so the plot is already downsampled and the data log never
+    has to be re-read. Values are stored as int16 in units of 1/scale.
+    """
+
+    def __init__(self, columns=200, span=24 * 3600, scale=10):
+        self.columns = columns
+        self.bucket = span // columns
+        self.scale = scale
+        self.lo = array("h", [EMPTY] * columns)
+        self.hi = array("h", [EMPTY] * columns)
+        self.head = None  # bucket number of the newest column
+        self.version = 0  # bumped whenever a column changes
+
+    def add(self, value, t=None):
+        if value is None:
+            return
+        if t is None:
+            t = time.time()
+        b = int(t) // self.bucket
+        lo = self.lo
+        hi = self.hi
+
+        if self.head is None:
+            self.head = b
+        elif b > self.head:
+            # Blank the columns we are moving over
+            for n in range(min(b - self.head, self.columns)):
+                i = (self.head + 1 + n) % self.columns
+                lo[i] = EMPTY
+                hi[i] = EMPTY
+            self.head = b
+        elif b <= self.head - self.columns:
+            return  # older than the window
+
+        v = int(round(value * self.scale))
+        v = max(-32767, min(32767, v))
+        i = b % self.columns
+        if lo[i] == EMPTY or v < lo[i]:
+            lo[i] = v
+            self.version += 1
+        if hi[i] == EMPTY or v > hi[i]:
+            hi[i] = v
+            self.version += 1
+
+    def order(self):
+        """Ring indices from the oldest column to the newest."""
+        if self.head is None:
+            return range(0)
+        first = (self.head + 1) % self.columns
+        return (
+            (first + k) % self.columns for k in range(self.columns)
+        )
+
+    def bounds(self):
+        """(min, max) over the window in stored units, or None if empty."""
+        vmin = None
+        vmax = None
+        lo = self.lo
+        hi = self.hi
+        for i in range(self.columns):
+            if lo[i] == EMPTY:
+                continue
+            if vmin is None or lo[i] < vmin:
+                vmin = lo[i]
+            if vmax is None or hi[i] > vmax:
+                vmax = hi[i]
+        if vmin is None:
+            return None
+        return vmin, vmax
+
+
+# One trend per plotted state value
+TRENDS = {
+    "temp_celc_current": Trend(),
+    "temp_celc_outside_current": Trend(),
+    "rh_current": Trend(),
+}
+
+
+def record(state, t=None):
+    """Fold the current readings in `state` into the trends."""
+    if t is None:
+        t = time.time()
+    for key, trend in TRENDS.items():
+        trend.add(getattr(state, key), t)
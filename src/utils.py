@@ -1,28 +1,16 @@
-import urequests
 import ujson
 import uasyncio as asyncio
-import utime
 import time
-from location import get_timezone
+import ahttp
 from logging import system_log
 
-def seconds_until(hour):
-    # Calculate sleep time until 3am next day
+def seconds_until(hour, minute=0):
+    # Seconds until the next hour:minute local time, a full day if it is now
     now = time.localtime()
-    current_hour = now[3]  
-    current_minute = now[4]
-    current_second = now[5] 
-    
-    # If it's already past 'hour' today, sleep until 'hour' tomorrow
-    if current_hour >= hour:
-        hours_until_hour = (24 - current_hour) + hour
-    else:
-        hours_until_hour = hour - current_hour
-    
-    # Calculate total seconds to sleep
-    seconds_until_hour = (hours_until_hour * 3600) - (current_minute * 60) - current_second
-    
-    return seconds_until_hour
+    seconds = (hour * 3600 + minute * 60) - (now[3] * 3600 + now[4] * 60 + now[5])
+    if seconds <= 0:
+        seconds += 86400
+    return seconds
 
 def load_config():
     with open("config.json") as f:
@@ -39,6 +27,12 @@ def load_update_id():
     except:
         return 0
 
+def offset_seconds(offset):
+    # "+01:00" / "-05:30" as seconds east of UTC
+    sign = -1 if offset[0] == "-" else 1
+    hours, _, minutes = offset.lstrip("+-").partition(":")
+    return sign * (int(hours) * 3600 + int(minutes or 0) * 60)
+
 async def get_local_time(timezone, retries=2, delay=2):
     """
     Fetches local time from World Time API.
@@ -47,8 +41,8 @@ async def get_local_time(timezone, retries=2, delay=2):
     response = None
     for attempt in range(1, retries + 1):
         try:
-            response = urequests.get(f"http://worldtimeapi.org/api/timezone/{timezone}", timeout=10)
-            data = ujson.loads(response.text)
+            response = await ahttp.get(f"http://worldtimeapi.org/api/timezone/{timezone}", timeout=10)
+            data = response.json()
 
             datetime_str = data['datetime']
             utc_offset = data['utc_offset']  
@@ -1,129 +1,124 @@
-import urequests
-import ujson
 import utime
-import time
+import ahttp
+from forecast import Forecast
 from logging import system_log
-from utils import load_config
+from state import state
 
 def api_url_gen(latitude, longitude, timezone):
+    # Times as epoch seconds, so nothing has to parse date strings. The
+    # third day lets a cached forecast stand in for a day's failed fetch
     return (
         f"https://api.open-meteo.com/v1/forecast?"
         f"latitude={latitude}&longitude={longitude}"
         f"&hourly=temperature_2m"
         f"&daily=sunrise,sunset"
-        f"&forecast_days=2"
+        f"&forecast_days=3"
+        f"&timeformat=unixtime"
         f"&timezone={timezone}"
     )
 
-def get_weather_data(api_url):
+async def get_weather_data(api_url, cached=None):
+    """
+    Fetches weather data from the API (single attempt), parsing it as it
+    arrives into a Forecast. Returns the Forecast on success, None on
+    failure.
+
+    With a `cached` Forecast whose response carried validators, the
+    request is conditional: if the API answers 304 Not Modified the
+    cached Forecast is returned and nothing is parsed.
     """
-    Fetches weather data from the API (single attempt).
-    Returns data on success, None on failure.
-    """    
-    response = None
     try:
         print(f"Calling Weather API")
         system_log("Calling Weather API")
-        
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.modified:
+                headers["If-Modified-Since"] = cached.modified
+
+        forecast = Forecast()
+        parser = forecast.parser()
         # Ping weather data API with timeout
-        response = urequests.get(api_url,timeout=5)
-        
+        response = await ahttp.get(api_url, headers=headers, timeout=5, sink=parser.feed)
+
+        if response.status_code == 304 and cached is not None:
+            print("Forecast not modified")
+            system_log("Forecast not modified")
+            return cached
+
         # Check HTTP status
         if response.status_code != 200:
             raise Exception(f"HTTP {response.status_code}")
-        
-        data = response.json()
-        return data
-        
+
+        forecast.etag = response.headers.get("etag")
+        forecast.modified = response.headers.get("last-modified")
+        return forecast.done(parser)
+
     except Exception as e:
         print(f"Weather API error: {e}")
         system_log(f"Weather API error: {e}")
-        return None  
-        
-    finally:
-        if response:
-            response.close()
-
-def get_sunrise_hour(data):
-    sunrise = data['daily']['sunrise'][1].split("T")
-    sunrise_time = sunrise[1]
-    sunrise_hour = sunrise_time[:2]
-    return sunrise_hour
-
-def get_sunrise_time(data):
-    sunrise = data['daily']['sunrise'][1].split("T")
-    sunrise_time = sunrise[1]
-    sunrise_min_hour = sunrise_time[:5]
-    return sunrise_min_hour
+        return None
 
-def get_sunset_time(data):
+def forecast_day(forecast, now=None):
     """
-    Returns the sunset time as a timestamp in the same local time
-    reference as get_local_time().
+    The forecast day `now` falls on, so a forecast kept from an earlier
+    fetch still gives today's sunset and tomorrow's sunrise. Before the
+    clock is synced, or with no `now`, that is the first day. Raises
+    ValueError once the forecast no longer reaches tomorrow's sunrise.
     """
-    if data is not None:
-        # Get current local date
-        local_struct = time.localtime()
+    day = 0 if now is None else max(0, forecast.day(now))
+    if day + 1 >= len(forecast.sunrises) or day >= len(forecast.sunsets):
+        raise ValueError("forecast out of date")
+    return day
 
-        # Extract sunset hour and minute from API (already in local timezone)
-        sunset_str = data['daily']['sunset'][0]  # e.g., "2025-09-02T19:21"
-        _, time_str = sunset_str.split("T")
-        hour, minute = map(int, time_str.split(":")[:2])
+def forecast_summary(forecast, day=0):
+    """
+    The values kept in state for forecast day `day`: the next sunrise
+    hour ("06") and time ("06:12"), the temperature then, the day's
+    sunset as a timestamp in the same local time reference as
+    get_local_time(), and the day's date ("2025-09-02").
+    """
+    sunrise = utime.localtime(forecast.sunrise(day + 1))
+    year, month, date = utime.localtime((forecast.start + day * 1440) * 60)[:3]
+    return (
+        "{:02d}".format(sunrise[3]),
+        "{:02d}:{:02d}".format(sunrise[3], sunrise[4]),
+        forecast.sunrise_temp(day),
+        forecast.sunset(day),
+        "{:04d}-{:02d}-{:02d}".format(year, month, date),
+    )
 
-        # Construct a tuple for sunset on the current local day
-        sunset_tuple = (
-            local_struct[0],  # year
-            local_struct[1],  # month
-            local_struct[2],  # day
-            hour,             # hour
-            minute,           # minute
-            0,                # second
-            0, 0, -1          # weekday, yearday, dst
+def apply_forecast(forecast, now=None):
+    """
+    Put `forecast` and its values for the day `now` falls on in state.
+    Returns (forecast day, date); raises ValueError if the forecast is
+    out of date.
+    """
+    day = forecast_day(forecast, now)
+    sunrise_hour, sunrise_time, temp_at_sunrise, sunset_time, date = forecast_summary(forecast, day)
+    with state.batch():
+        state.forecast = forecast
+        state.sunrise_hour = sunrise_hour
+        state.sunrise_time = sunrise_time
+        state.temp_at_sunrise = temp_at_sunrise
+        state.sunset_time = sunset_time
+    return day, date
+
+
+def log_forecast(forecast, day, date):
+    """Log the values apply_forecast() put in state for `day`."""
+    if state.temp_at_sunrise is not None:
+        message = (
+            f"Weather data acquired. Sunrise at {state.sunrise_time} on {date}. "
+            f"Temperature at sunrise is {state.temp_at_sunrise}°C"
         )
-
-        # Convert to timestamp
-        sunset_timestamp = time.mktime(sunset_tuple)
-        return sunset_timestamp
-    return None
-
-def get_temperature_at_hour(data, target_hour):
-    if not data:
-        print("No data available")
-        return None
-
-    times = data['hourly']['time']
-    temps = data['hourly']['temperature_2m'] # parallel list of temps
-
-    for i, t in enumerate(times):
-        # Extract hour from timestamp, e.g. '2025-07-07T06:00' -> '06'
-        hour_str = t.split('T')[1][:2]
-        if hour_str == target_hour:
-            return temps[i+24]
-
-    print(f"No temperature found for hour {target_hour}")
-    return None
-
-def weather_message(target_temp, temp_at_sunrise):
-    if temp_at_sunrise is None:
-        print("No temperature data; message not sent")
-        return
-
-    if temp_at_sunrise < target_temp:
-        MESSAGE = (
-            f"Hey Clare!\n\n"
-            f"It's going to be chilly tonight... {temp_at_sunrise}°C 🥶\n"
-            "Best put some blankets on those plant babies!"
+        print(message)
+        system_log(
+            f"{message}, overnight low {forecast.overnight_low(day)}°C, "
+            f"{forecast.hours_below(15, *forecast.night(day))} hours below 15°C"
         )
-
-        try:
-            response = urequests.post(
-                "https://ntfy.sh/charitylane_greenhouse",
-                data=MESSAGE.encode("utf-8"),
-                headers={"Content-Type": "text/plain"},
-            )
-            response.close()
-        except Exception as e:
-            print("Error sending notification:", e)
-
-    else:
-        print("No message required; temperature above threshold")
\ No newline at end of file
+    if state.sunset_time is not None:
+        hour, minute = utime.localtime(state.sunset_time)[3:5]
+        system_log(f"Sunset time is {hour}:{minute:02d} on {date}")
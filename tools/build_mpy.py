@@ -0,0 +1,80 @@
+"""
+Precompile the firmware to .mpy bytecode for the board.
+
+    pip install mpy-cross
+    python tools/build_mpy.py                  # src/ -> build/
+    mpremote cp -r build/ :                     # copy to the Pico
+
+Importing a .mpy skips parsing and compiling on the board, which is
+most of an import's cost and its peak RAM. main.py stays as source
+(MicroPython only runs main.py), so keep it to imports and wiring.
+The mpy-cross version has to match the firmware's .mpy format: use
+the release that matches the MicroPython on the board.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run from source by MicroPython, so never compiled
+KEEP_SOURCE = ("main.py", "boot.py")
+
+
+def find_mpy_cross(path):
+    if path:
+        return [path]
+    found = shutil.which("mpy-cross")
+    if found:
+        return [found]
+    return [sys.executable, "-m", "mpy_cross"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src", default=os.path.join(ROOT, "src"), help="firmware sources")
+    parser.add_argument("--out", default=os.path.join(ROOT, "build"), help="output directory")
+    parser.add_argument("--mpy-cross", help="mpy-cross executable (default: from PATH)")
+    parser.add_argument("--march", default="armv6m", help="target architecture, armv6m for the RP2040")
+    parser.add_argument("-O", dest="opt", type=int, default=2, help="optimisation level; 1+ drops asserts, 3 line numbers too")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    mpy_cross = find_mpy_cross(args.mpy_cross)
+    source_total = mpy_total = 0
+    failed = []
+
+    for name in sorted(os.listdir(args.src)):
+        if not name.endswith(".py"):
+            continue
+        src = os.path.join(args.src, name)
+        size = os.path.getsize(src)
+        source_total += size
+        if name in KEEP_SOURCE:
+            shutil.copy(src, os.path.join(args.out, name))
+            mpy_total += size
+            print(f"{name:<30} {size:>7} B  (source)")
+            continue
+
+        out = os.path.join(args.out, name[:-3] + ".mpy")
+        cmd = mpy_cross + [f"-march={args.march}", f"-O{args.opt}", "-o", out, src]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"{name}: {result.stderr.strip() or result.stdout.strip()}", file=sys.stderr)
+            failed.append(name)
+            continue
+        mpy_size = os.path.getsize(out)
+        mpy_total += mpy_size
+        print(f"{name:<30} {size:>7} B -> {mpy_size:>6} B")
+
+    print(f"{'total':<30} {source_total:>7} B -> {mpy_total:>6} B")
+    if failed:
+        print(f"failed: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())